@@ -10,6 +10,7 @@ This allows easy and clean import from `admin.py`.
 from django.contrib import admin
 from . import admin_group
 from . import admin_instrument
+from . import admin_job
 from . import admin_observatory
 from . import admin_observing_block
 from . import admin_observing_run
@@ -25,6 +26,7 @@ admin.site.index_title = "dwarfs4MOSAIC Administration" # default: "Site adminis
 
 __all__ = ["admin_group",
            "admin_instrument",
+           "admin_job",
            "admin_observatory",
            "admin_observing_block",
            "admin_observing_run",
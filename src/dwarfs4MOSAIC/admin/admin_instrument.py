@@ -9,42 +9,26 @@ from django.urls import path
 from django.utils.html import format_html
 
 # Local application imports
-from . helpers import import_csv_file
+from .csv_import import CsvImporter
+from .helpers import import_csv_file
 from ..forms import InstrumentAdminForm
 from ..forms.form_import_csv import CsvImportForm
 from ..models import Tbl_instrument, Tbl_telescope
 
 
-# Process each row of the CSV when importing instruments
-def process_instrument_row(row, idx, errors):
-    # Get name, skip row if empty
-    name = row.get("name")
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
-
-    # Get telescope by name, if provided
-    tel_name = row.get("telescope")
-    telescope = None
-    if tel_name:
-        telescope = Tbl_telescope.objects.filter(name=tel_name).first()
-        if not telescope:
-            errors.append(f"Row {idx}: telescope '{tel_name}' not found, skipping")
-            return None
-
-    # Update or create the instrument entry in the database
-    obj, created_flag = Tbl_instrument.objects.update_or_create(
-        name=name,
-        defaults={
+# Bulk CSV importer for instruments
+class InstrumentCsvImporter(CsvImporter):
+    model = Tbl_instrument
+    foreign_keys = {"tel_ins": ("telescope", Tbl_telescope)}
+
+    def parse_row(self, row, idx):
+        return {
             "description": row.get("description", ""),
-            "tel_ins": telescope,
             "status": row.get("status", "unknown"),
             "website": row.get("website", ""),
             "filters": row.get("filters", ""),
             "configuration": row.get("configuration", ""),
-        },
-    )
-    return created_flag
+        }
 
 
 # Admin interface for Tbl_instrument with enhanced UI and CSV import support
@@ -125,6 +109,6 @@ class InstrumentAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_instrument,
-            process_instrument_row,
+            InstrumentCsvImporter,
             title="Import instruments from CSV"
         )
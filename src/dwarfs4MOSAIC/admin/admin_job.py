@@ -0,0 +1,79 @@
+"""
+This file defines how Tbl_job model is displayed and managed in the Django Admin interface.
+Jobs are created by the application (e.g. CSV imports) and are read-only here;
+their page polls the progress while the job is queued or running.
+"""
+
+# Third-party libraries
+from django.contrib import admin, messages
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path
+
+# Local application imports
+from ..jobs import resume
+from ..models import Tbl_job
+
+
+# Admin interface for Tbl_job with progress polling and resume action
+@admin.register(Tbl_job)
+class JobAdmin(admin.ModelAdmin):
+
+    # Display main identifying fields plus the progress
+    list_display = ("id", "description", "kind", "status", "progress", "created_by", "created_at", "finished_at")
+
+    # Sidebar filters for quick data segmentation in the admin changelist view
+    list_filter = ("status", "kind")
+
+    # Every field is read-only: jobs are only changed by the worker
+    readonly_fields = (
+        "kind", "description", "status", "progress", "result", "message", "errors",
+        "created_by", "created_at", "started_at", "finished_at", "updated_at",
+    )
+    fields = readonly_fields
+
+    actions = ["resume_jobs"]
+
+    # Progress as "processed / total (percent)"
+    @admin.display(description="Progress")
+    def progress(self, obj):
+        if obj.total is None:
+            return f"{obj.processed}"
+        return f"{obj.processed} / {obj.total} ({obj.percent}%)"
+
+    # Jobs are only created by the application
+    def has_add_permission(self, request):
+        return False
+
+    # Queue failed jobs again; they continue after the last committed batch
+    @admin.action(description="Resume selected failed jobs")
+    def resume_jobs(self, request, queryset):
+        count = resume(queryset)
+        self.message_user(request, f"{count} job(s) queued again.", level=messages.SUCCESS)
+
+    # Delete the input files together with the jobs
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.delete()
+
+    # Add the JSON progress URL polled by the job page
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:job_id>/progress/', self.admin_site.admin_view(self.progress_view), name='tbl_job_progress'),
+        ]
+        return custom_urls + urls
+
+    # Current state of one job
+    def progress_view(self, request, job_id):
+        job = get_object_or_404(Tbl_job, pk=job_id)
+        return JsonResponse({
+            "status": job.status,
+            "status_display": job.get_status_display(),
+            "processed": job.processed,
+            "total": job.total,
+            "percent": job.percent,
+            "result": job.result,
+            "errors": job.errors,
+            "message": job.message,
+        })
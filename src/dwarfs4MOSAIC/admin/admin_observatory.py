@@ -9,32 +9,25 @@ from django.urls import path
 from django.utils.html import format_html
 
 # Local application imports
+from .csv_import import CsvImporter
 from .helpers import import_csv_file
 from ..forms import ObservatoryAdminForm
 from ..forms.form_import_csv import CsvImportForm
 from ..models import Tbl_observatory
 
 
-# Process each row of the CSV when importing observatories
-def process_observatory_row(row, idx, errors):
-    # Get name, skip row if empty
-    name = row.get("name")
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
+# Bulk CSV importer for observatories
+class ObservatoryCsvImporter(CsvImporter):
+    model = Tbl_observatory
 
-    # Update or create the observatory entry in the database
-    obj, created_flag = Tbl_observatory.objects.update_or_create(
-        name=name,
-        defaults={
+    def parse_row(self, row, idx):
+        return {
             "location": row.get("location", ""),
             "website": row.get("website", ""),
             "longitude": row.get("longitude") or 0,
             "latitude": row.get("latitude") or 0,
             "altitude": float(row.get("altitude") or 0),
-        },
-    )
-    return created_flag
+        }
 
 # Admin interface for Tbl_observatory with enhanced UI and CSV import support
 @admin.register(Tbl_observatory)
@@ -93,7 +86,7 @@ class ObservatoryAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_observatory,
-            process_observatory_row,
+            ObservatoryCsvImporter,
             title="Import observatories from CSV"
         )
 
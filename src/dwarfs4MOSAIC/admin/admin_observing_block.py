@@ -2,126 +2,93 @@
 This file defines how Tbl_observing_block model is displayed and managed in the Django Admin interface.
 """
 
+# Standard libraries
+from datetime import datetime
+
 # Third-party libraries
 from django.contrib import admin
+from django.contrib.auth.models import Group
 from django.db.models.functions import Lower
 from django.urls import path
+from django.utils import timezone
 
 # Local application imports
+from .csv_import import CsvImporter
 from .helpers import import_csv_file
 from ..forms import ObservingBlockAdminForm
 from ..forms.form_import_csv import CsvImportForm
 from ..models import Tbl_observing_block, Tbl_observing_run, Tbl_target
+from ..visibility import refresh_users, users_for_blocks
 
 
-# Process each row of the CSV when importing observing blocks
-def process_observing_block_row(row, idx, errors):
-    from datetime import datetime, timedelta
-
-    # Required field: name, start_time
-    name = row.get("name")
-    start_time_str = row.get("start_time")
-
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
+# Bulk CSV importer for observing blocks
+class ObservingBlockCsvImporter(CsvImporter):
+    model = Tbl_observing_block
+    foreign_keys = {"obs_run": ("obs_run", Tbl_observing_run)}
 
-    if not start_time_str:
-        errors.append(f"Row {idx}: 'start_time' field is empty, skipping")
-        return None
+    # Comma-separated names of targets and allowed groups
+    many_to_many = {
+        "target": ("target", Tbl_target),
+        "allowed_groups": ("allowed_groups", Group),
+    }
 
-    # Parse start_time (expecting 'YYYY-MM-DD HH:MM:SS')
-    try:
-        start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
-        errors.append(f"Row {idx}: invalid start_time '{start_time_str}', skipping")
-        return None
+    def parse_row(self, row, idx):
+        # Required field: start_time (expecting 'YYYY-MM-DD HH:MM:SS')
+        start_time_str = row.get("start_time")
+        if not start_time_str:
+            self.errors.append(f"Row {idx}: 'start_time' field is empty, skipping")
+            return None
 
-    # Parse optional end_time (only HH:MM:SS)
-    end_time_str = row.get("end_time")
-    end_time = None
-    if end_time_str:
         try:
-            end_time = datetime.strptime(end_time_str, "%H:%M:%S").time()
+            start_time = timezone.make_aware(datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S"))
         except ValueError:
-            errors.append(f"Row {idx}: invalid end_time '{end_time_str}', ignoring")
-
-    # Lookup foreign key obs_run by name
-    obs_run_name = row.get("obs_run")
-    obs_run_obj = None
-    if obs_run_name:
-        obs_run_obj = Tbl_observing_run.objects.filter(name=obs_run_name).first()
-        if not obs_run_obj:
-            errors.append(f"Row {idx}: Observing Run with name='{obs_run_name}' not found, skipping")
+            self.errors.append(f"Row {idx}: invalid start_time '{start_time_str}', skipping")
             return None
 
-    # Create or update observing block by name
-    obj, created_flag = Tbl_observing_block.objects.update_or_create(
-        name=name,
-        defaults={
-            "obs_run": obs_run_obj,
+        values = {
             "description": row.get("description", ""),
             "semester": row.get("semester", ""),
             "start_time": start_time,
-            "end_time": end_time,
+            "end_time": None,
             "observation_mode": row.get("observation_mode", "photometry"),
             "filters": row.get("filters", ""),
             "configuration": row.get("configuration", ""),
-            "exposure_time": None,  # to parse below
-            "seeing": None,         # to parse below
+            "exposure_time": None,
+            "seeing": None,
             "weather_conditions": row.get("weather_conditions", ""),
             "comments": row.get("comments", ""),
         }
-    )
 
-    # Parse exposure_time (seconds) as duration
-    exposure_time_str = row.get("exposure_time")
-    if exposure_time_str:
-        try:
-            seconds = float(exposure_time_str)
-            obj.exposure_time = timedelta(seconds=seconds)
-        except ValueError:
-            errors.append(f"Row {idx}: invalid exposure_time '{exposure_time_str}', ignoring")
-            obj.exposure_time = None
-
-    # Parse seeing (float)
-    seeing_str = row.get("seeing")
-    if seeing_str:
-        try:
-            obj.seeing = float(seeing_str)
-        except ValueError:
-            errors.append(f"Row {idx}: invalid seeing '{seeing_str}', ignoring")
-            obj.seeing = None
-
-    # Save after modifying exposure_time and seeing
-    obj.save()
-
-    # Handle many-to-many target field (comma separated names)
-    targets_str = row.get("target")
-    if targets_str:
-        target_names = [t.strip() for t in targets_str.split(",") if t.strip()]
-        targets_qs = Tbl_target.objects.filter(name__in=target_names)
-        if len(target_names) != targets_qs.count():
-            missing = set(target_names) - set(targets_qs.values_list("name", flat=True))
-            errors.append(f"Row {idx}: targets not found: {', '.join(missing)}")
-        obj.target.set(targets_qs)
-    else:
-        obj.target.clear()
-
-    # Handle allowed_groups many-to-many (comma separated group names)
-    groups_str = row.get("allowed_groups")
-    if groups_str:
-        group_names = [g.strip() for g in groups_str.split(",") if g.strip()]
-        from django.contrib.auth.models import Group
-        groups_qs = Group.objects.filter(name__in=group_names)
-        if len(group_names) != groups_qs.count():
-            missing = set(group_names) - set(groups_qs.values_list("name", flat=True))
-            errors.append(f"Row {idx}: allowed_groups not found: {', '.join(missing)}")
-        obj.allowed_groups.set(groups_qs)
-    else:
-        obj.allowed_groups.clear()
-
-    return created_flag
+        # Parse optional end_time (only HH:MM:SS)
+        end_time_str = row.get("end_time")
+        if end_time_str:
+            try:
+                values["end_time"] = datetime.strptime(end_time_str, "%H:%M:%S").time()
+            except ValueError:
+                self.errors.append(f"Row {idx}: invalid end_time '{end_time_str}', ignoring")
+
+        # Parse exposure_time (seconds)
+        exposure_time_str = row.get("exposure_time")
+        if exposure_time_str:
+            try:
+                values["exposure_time"] = float(exposure_time_str)
+            except ValueError:
+                self.errors.append(f"Row {idx}: invalid exposure_time '{exposure_time_str}', ignoring")
+
+        # Parse seeing (float)
+        seeing_str = row.get("seeing")
+        if seeing_str:
+            try:
+                values["seeing"] = float(seeing_str)
+            except ValueError:
+                self.errors.append(f"Row {idx}: invalid seeing '{seeing_str}', ignoring")
+
+        return values
+
+    # Bulk inserts into the through tables do not send m2m_changed signals:
+    # refresh the stored visibility of the users concerned by the imported blocks
+    def after_import(self, objects):
+        refresh_users(users_for_blocks([obj.pk for obj in objects]))
 
 
 # Admin interface for Tbl_observing_block with enhanced UI and CSV import support
@@ -177,6 +144,6 @@ class ObservingBlockAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_observing_block,
-            process_observing_block_row,
+            ObservingBlockCsvImporter,
             title="Import observing blocks from CSV"
         )
@@ -2,82 +2,61 @@
 This file defines how Tbl_observing_run model is displayed and managed in the Django Admin interface.
 """
 
+# Standard libraries
+from datetime import datetime
+
 # Third-party libraries
 from django.contrib import admin
 from django.db.models.functions import Lower
 from django.urls import path
 
 # Local application imports
+from .csv_import import CsvImporter
 from .helpers import import_csv_file
 from ..forms import ObservingRunAdminForm
 from ..forms.form_import_csv import CsvImportForm
 from ..models import Tbl_observing_run, Tbl_instrument, Tbl_researcher
 
 
-# Process each row of the CSV when importing observing runs
-def process_observing_run_row(row, idx, errors):
-    # Required fields: name, start_date
-    name = row.get("name")
-    start_date_str = row.get("start_date")
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
-    if not start_date_str:
-        errors.append(f"Row {idx}: 'start_date' field is empty, skipping")
-        return None
-
-    # Parse dates (start_date and optional end_date)
-    from datetime import datetime
-    date_format = "%Y-%m-%d"  # adjust if your CSV uses a different format
-
-    try:
-        start_date = datetime.strptime(start_date_str, date_format).date()
-    except ValueError:
-        errors.append(f"Row {idx}: invalid start_date '{start_date_str}', skipping")
-        return None
-
-    end_date_str = row.get("end_date")
-    end_date = None
-    if end_date_str:
+# Bulk CSV importer for observing runs
+class ObservingRunCsvImporter(CsvImporter):
+    model = Tbl_observing_run
+    foreign_keys = {"instrument": ("instrument", Tbl_instrument)}
+
+    # Comma-separated names of researchers
+    many_to_many = {"researchers": ("researchers", Tbl_researcher)}
+
+    # Date format of start_date and end_date
+    date_format = "%Y-%m-%d"
+
+    def parse_row(self, row, idx):
+        # Required field: start_date
+        start_date_str = row.get("start_date")
+        if not start_date_str:
+            self.errors.append(f"Row {idx}: 'start_date' field is empty, skipping")
+            return None
+
         try:
-            end_date = datetime.strptime(end_date_str, date_format).date()
+            start_date = datetime.strptime(start_date_str, self.date_format).date()
         except ValueError:
-            errors.append(f"Row {idx}: invalid end_date '{end_date_str}', ignoring")
-
-    # Lookup instrument (foreign key)
-    instrument_name = row.get("instrument")
-    instrument_obj = None
-    if instrument_name:
-        instrument_obj = Tbl_instrument.objects.filter(name=instrument_name).first()
-        if not instrument_obj:
-            errors.append(f"Row {idx}: instrument '{instrument_name}' not found, skipping")
+            self.errors.append(f"Row {idx}: invalid start_date '{start_date_str}', skipping")
             return None
 
-    # Create or update the observing run instance
-    obj, created_flag = Tbl_observing_run.objects.update_or_create(
-        name=name,
-        defaults={
+        # Optional end_date
+        end_date_str = row.get("end_date")
+        end_date = None
+        if end_date_str:
+            try:
+                end_date = datetime.strptime(end_date_str, self.date_format).date()
+            except ValueError:
+                self.errors.append(f"Row {idx}: invalid end_date '{end_date_str}', ignoring")
+
+        return {
             "description": row.get("description", ""),
-            "instrument": instrument_obj,
             "start_date": start_date,
             "end_date": end_date,
             "comments": row.get("comments", ""),
-        },
-    )
-
-    # For many-to-many field 'researchers', update after creation/update
-    researchers_str = row.get("researchers")  # assume CSV has comma-separated names
-    if researchers_str:
-        researcher_names = [r.strip() for r in researchers_str.split(",") if r.strip()]
-        researchers = Tbl_researcher.objects.filter(name__in=researcher_names)
-        if len(researcher_names) != researchers.count():
-            missing = set(researcher_names) - set(researchers.values_list("name", flat=True))
-            errors.append(f"Row {idx}: researchers not found: {', '.join(missing)}")
-        obj.researchers.set(researchers)
-    else:
-        obj.researchers.clear()
-
-    return created_flag
+        }
 
 
 # Admin interface for Tbl_observing_run with enhanced UI and CSV import support
@@ -132,6 +111,6 @@ class ObservingRunAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_observing_run,
-            process_observing_run_row,
+            ObservingRunCsvImporter,
             title="Import observing runs from CSV"
         )
\ No newline at end of file
@@ -3,80 +3,117 @@ This file defines how Tbl_target model is displayed and managed in the Django Ad
 """
 
 # Standard libraries
+import base64
+import binascii
+import csv
+import json
 import os
 
 # Third-party libraries
-from django.conf import settings
 from django.contrib import admin, messages
+from django.db.models import BooleanField, Case, Exists, OuterRef, Value, When
 from django.db.models.functions import Lower
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.urls import path
 from django.urls import reverse
 from django.utils.html import format_html
 
 # Local application imports
+from .csv_import import CsvImporter
 from .helpers import import_csv_file
-from ..forms import TargetAdminForm
+from ..chunked_upload import (
+    ChecksumMismatch,
+    UploadConflict,
+    UploadError,
+    UploadNotFound,
+    abort_upload,
+    create_upload,
+    finish_upload,
+    upload_offset,
+    write_chunk,
+)
+from ..crossmatch import crossmatch, read_positions
+from ..forms import CrossmatchForm, TargetAdminForm
 from ..forms.form_import_csv import CsvImportForm
-from ..models import Tbl_target
+from ..manifest import forget_file, save_uploaded_file
+from ..media_folders import delete_targets
+from ..models import Tbl_datafile, Tbl_target
+from ..storage import get_storage
+from ..thumbnails import delete_thumbnails, generate_thumbnails
 from ..utils import sanitize_filename
 
 
-# Process each row of the CSV when importing observatories
-def process_target_row(row, idx, errors):
-    # Required fields: name
-    name = row.get("name")
-
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
-
-    # Build relative paths for image and datafiles based on the target name (safe filename)
-    safe_name = sanitize_filename(name)
-    base_path = os.path.join(settings.MEDIA_ROOT, safe_name)
-    image_path = os.path.join(base_path, "image")
-    datafiles_path = os.path.join(base_path, "datafiles")
-
-    # Create directories if they do not exist
-    os.makedirs(datafiles_path, exist_ok=True)
-    os.makedirs(image_path, exist_ok=True)
-
-    image = row.get("image")
-    image_file_path = os.path.join(image_path, image)
-
-    # Prepare defaults
-    defaults = {
-        "type": row.get("type", "galaxy"),  # default defined in model
-        "right_ascension": row.get("right_ascension") or None,
-        "website": row.get("website", ""),
-        "declination": row.get("declination") or None,
-        "magnitude": None,
-        "redshift_value": row.get("redshift_value") or None,
-        "redshift_error": row.get("redshift_error") or None,
-        "size": None,
-        "semester": row.get("semester"),
-        "comments": row.get("comments", ""),
-        "image": os.path.relpath(image_file_path, settings.MEDIA_ROOT),
-        "datafiles_path": os.path.relpath(datafiles_path, settings.MEDIA_ROOT),
-    }
-
-    # Parse float fields (magnitude, size)
-    for field in ["magnitude", "size"]:
-        value_str = row.get(field)
-        if value_str:
-            try:
-                defaults[field] = float(value_str)
-            except ValueError:
-                errors.append(f"Row {idx}: invalid {field} '{value_str}', ignoring")
-                defaults[field] = None
+# Bulk CSV importer for targets
+class TargetCsvImporter(CsvImporter):
+    model = Tbl_target
+    computed_fields = ("right_ascension_hours", "declination_deg", "dec_zone")
+
+    def parse_row(self, row, idx):
+        # Relative paths for image and datafiles based on the target name (safe filename)
+        safe_name = sanitize_filename(row["name"])
+        image_path = os.path.join(safe_name, "image", row.get("image") or "")
+
+        values = {
+            "type": row.get("type", "galaxy"),  # default defined in model
+            "right_ascension": row.get("right_ascension") or None,
+            "website": row.get("website", ""),
+            "declination": row.get("declination") or None,
+            "magnitude": None,
+            "redshift_value": row.get("redshift_value") or None,
+            "redshift_error": row.get("redshift_error") or None,
+            "size": None,
+            "semester": row.get("semester"),
+            "comments": row.get("comments", ""),
+            "image": os.path.normpath(image_path),
+            "datafiles_path": os.path.join(safe_name, "datafiles"),
+        }
+
+        # Parse float fields (magnitude, size)
+        for field in ["magnitude", "size"]:
+            value_str = row.get(field)
+            if value_str:
+                try:
+                    values[field] = float(value_str)
+                except ValueError:
+                    self.errors.append(f"Row {idx}: invalid {field} '{value_str}', ignoring")
+
+        return values
+
+    # bulk_create/bulk_update bypass save(): compute the numeric coordinates here
+    def prepare(self, obj):
+        obj.update_coordinates()
+
+    # Create the image and data files folders of the imported targets
+    def after_import(self, objects):
+        storage = get_storage()
+        for obj in objects:
+            base_path = sanitize_filename(obj.name)
+            storage.makedirs(os.path.join(base_path, "datafiles"))
+            storage.makedirs(os.path.join(base_path, "image"))
+
+
+# Changelist filter on an annotated boolean column (see TargetAdmin.get_queryset)
+class AnnotatedBooleanFilter(admin.SimpleListFilter):
+    def lookups(self, request, model_admin):
+        return (("yes", "Yes"), ("no", "No"))
+
+    def queryset(self, request, queryset):
+        if self.value() in ("yes", "no"):
+            return queryset.filter(**{self.annotation: self.value() == "yes"})
+        return queryset
+
+
+class HasImageFilter(AnnotatedBooleanFilter):
+    title = "image"
+    parameter_name = "has_image"
+    annotation = "_has_image"
 
-    # Create or update the target by unique name
-    obj, created_flag = Tbl_target.objects.update_or_create(
-        name=name,
-        defaults=defaults,
-    )
 
-    return created_flag
+class HasFilesFilter(AnnotatedBooleanFilter):
+    title = "data files"
+    parameter_name = "has_files"
+    annotation = "_has_files"
 
 
 # Admin interface for Tbl_target with enhanced UI and CSV import support
@@ -87,37 +124,34 @@ class TargetAdmin(admin.ModelAdmin):
     list_display = ("name", "type", "has_image", "has_files", "website_link")
 
     # Sidebar filters for quick data segmentation in the admin changelist view
-    list_filter = ("type", "semester")
+    list_filter = ("type", "semester", HasImageFilter, HasFilesFilter)
 
     # Default ordering in changelist (case-insensitive + fallback)
     ordering = (Lower("name"), "name")
 
-    # Indicate whether an image exists on disk for this target
-    @admin.display(boolean=True, description="Image")
-    def has_image(self, obj):
-
-        if not obj.image:
-            return False
+    # Image and data files flags computed by the changelist query instead of
+    # checking MEDIA_ROOT for every row: an image is set when the stored path
+    # points to a file (has an extension, as Tbl_target.image_name), and data
+    # files come from the datafile manifest
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _has_image=Case(
+                When(image__regex=r"\.[^./]+$", then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            _has_files=Exists(Tbl_datafile.objects.filter(target=OuterRef("pk"))),
+        )
 
-        image_path = os.path.join(settings.MEDIA_ROOT, obj.image)
-        return os.path.isfile(image_path)
+    # Indicate whether an image is set for this target
+    @admin.display(boolean=True, description="Image", ordering="_has_image")
+    def has_image(self, obj):
+        return obj._has_image
 
     # Indicate whether the target has at least one file in its data directory
-    @admin.display(boolean=True, description="Data Files")
+    @admin.display(boolean=True, description="Data Files", ordering="_has_files")
     def has_files(self, obj):
-
-        if not obj.datafiles_path:
-            return False
-
-        directory = os.path.join(settings.MEDIA_ROOT, obj.datafiles_path)
-
-        if not os.path.isdir(directory):
-            return False
-
-        return any(
-            os.path.isfile(os.path.join(directory, filename))
-            for filename in os.listdir(directory)
-        )
+        return obj._has_files
 
     # External website link opening in a new tab
     @admin.display(description="website")
@@ -150,9 +184,11 @@ class TargetAdmin(admin.ModelAdmin):
                 ]}),
         ]
 
-        # When creating new Target, show 'name' field
+        # Show 'name' field (renaming an existing Target also moves its folder)
+        base_fieldsets.insert(0, (None, {"fields": ["name"]}))
+
+        # When creating new Target, no file sections
         if obj is None:
-            base_fieldsets.insert(0, (None, {"fields": ["name"]}))
             return base_fieldsets
 
         # When editing existing Target, add file upload and deletion sections
@@ -162,7 +198,7 @@ class TargetAdmin(admin.ModelAdmin):
                 {
                     "description": "⚠️ Files with the same name will overwrite existing ones.",
                     "fields": [
-                        "upload_image", "upload_datafiles"
+                        "upload_image", "upload_datafiles", "upload_large_datafiles"
                     ]
                 })
             )
@@ -184,31 +220,34 @@ class TargetAdmin(admin.ModelAdmin):
         # Save the model normally first
         super().save_model(request, obj, form, change)
 
-        # Define safe filesystem paths for storing files related to this target
-        safe_name = sanitize_filename(obj.name)
-        base_path = os.path.join(settings.MEDIA_ROOT, safe_name) # Base folder: MEDIA_ROOT/target_name
-        datafiles_path = os.path.join(base_path, "datafiles")    # Folder for data files: MEDIA_ROOT/target_name/datafiles
-        image_path = os.path.join(base_path, "image")            # Folder for image file: MEDIA_ROOT/target_name/image
+        # Define the names (relative to the media storage) of the files related to this target.
+        # A renamed target keeps its current folder until the rename is committed.
+        storage = get_storage()
+        if obj.datafiles_path:
+            base_path = os.path.dirname(obj.datafiles_path)      # Base folder: target_name
+        else:
+            base_path = sanitize_filename(obj.name)
+        datafiles_path = os.path.join(base_path, "datafiles")    # Folder for data files: target_name/datafiles
+        image_path = os.path.join(base_path, "image")            # Folder for image file: target_name/image
 
         # Create directories if they do not exist
-        os.makedirs(datafiles_path, exist_ok=True)
-        os.makedirs(image_path, exist_ok=True)
+        storage.makedirs(datafiles_path)
+        storage.makedirs(image_path)
 
         if is_new:
             # For new objects, store relative paths and save again
-            obj.datafiles_path = os.path.relpath(datafiles_path, settings.MEDIA_ROOT)
-            obj.image = os.path.relpath(image_path, settings.MEDIA_ROOT)
+            obj.datafiles_path = datafiles_path
+            obj.image = image_path
             obj.save()
             return
 
         # Delete image if requested and exists
         if form.cleaned_data.get('delete_image') and obj.image_name:
-            image_file_path = os.path.join(settings.MEDIA_ROOT, obj.image)
-            if os.path.exists(image_file_path):
-                os.remove(image_file_path)
+            storage.delete(obj.image)
+            delete_thumbnails(obj.image)
 
             # Check if deletion succeeded
-            if os.path.exists(image_file_path):
+            if storage.exists(obj.image):
                 # Show warning if image could not be deleted
                 self.message_user(
                     request,
@@ -217,7 +256,7 @@ class TargetAdmin(admin.ModelAdmin):
                 )
             else:
                 # Reset image path to default folder
-                obj.image = os.path.relpath(image_path, settings.MEDIA_ROOT) # Reset to default image relative path
+                obj.image = image_path # Reset to default image relative path
 
         else:
             # Handle image upload if provided
@@ -226,15 +265,13 @@ class TargetAdmin(admin.ModelAdmin):
 
                 # Previous values before updating
                 previous_image_name = obj.image_name
-                previous_image_path = os.path.join(settings.MEDIA_ROOT, obj.image)
+                previous_image_path = obj.image
 
-                # Save uploaded image to disk
+                # Save uploaded image to the media storage
                 file_path = os.path.join(image_path, upload_image.name)
-                with open(file_path, 'wb+') as destination:
-                    for chunk in upload_image.chunks():
-                        destination.write(chunk)
+                storage.write(file_path, upload_image.chunks())
 
-                if not os.path.isfile(file_path):
+                if not storage.exists(file_path):
                     # Warn if upload failed
                     self.message_user(
                         request,
@@ -244,23 +281,29 @@ class TargetAdmin(admin.ModelAdmin):
 
                 else:
                     # Update image path to new file
-                    obj.image = os.path.relpath(file_path, settings.MEDIA_ROOT) # new image
+                    previous_image = obj.image
+                    obj.image = file_path # new image
+
+                    # Build the thumbnails shown on the site pages
+                    if previous_image_name:
+                        delete_thumbnails(previous_image)
+                    generate_thumbnails(obj.image)
 
                     # Delete the old image if it exists and its name is different from the new image's name.
                     # (Otherwise, new image could be deleted)
                     if (previous_image_name and
-                            os.path.exists(previous_image_path) and
+                            storage.exists(previous_image_path) and
                             previous_image_name != upload_image.name):
-                        os.remove(previous_image_path)
+                        storage.delete(previous_image_path)
 
         # Delete selected data files if requested
         files_to_delete = form.cleaned_data.get("datafiles", [])
         for filename in files_to_delete:
             safe_name = os.path.basename(filename)
             file_path = os.path.join(datafiles_path, safe_name)
-            if os.path.exists(file_path):
+            if storage.exists(file_path):
                 try:
-                    os.remove(file_path)
+                    storage.delete(file_path)
                 except Exception as e:
                     # Show error message if deletion fails
                     self.message_user(
@@ -268,14 +311,15 @@ class TargetAdmin(admin.ModelAdmin):
                         f'Error deleting file "{filename}": {e}',
                         level=messages.ERROR
                     )
+                    continue
 
-        # Save multiple data files uploaded by user
+            # Keep the datafile manifest in sync
+            forget_file(obj, safe_name)
+
+        # Save multiple data files uploaded by user and record them in the manifest
         datafiles = form.cleaned_data.get("upload_datafiles", [])
         for uploaded_file in datafiles:
-            dest_path = os.path.join(datafiles_path, uploaded_file.name)
-            with open(dest_path, "wb+") as destination:
-                for chunk in uploaded_file.chunks():
-                    destination.write(chunk)
+            save_uploaded_file(obj, uploaded_file)
 
         # Save the model instance after file operations
         obj.save()
@@ -291,19 +335,21 @@ class TargetAdmin(admin.ModelAdmin):
             )
         return actions
 
-    # Delete selected objects and show a summary message
+    # Delete selected objects and show a summary message.
+    # One database delete; the folders are moved to the trash and removed in the background.
     def custom_delete_selected(self, modeladmin, request, queryset):
 
-        deleted_count = 0
-        for obj in queryset:
-            obj.delete()
-            deleted_count += 1
+        deleted_count = delete_targets(queryset)
         self.message_user(
             request,
-            f" {deleted_count} target(s) and their associated folders were deleted.",
+            f" {deleted_count} target(s) were deleted; their folders will be removed in the background.",
             level=messages.SUCCESS,
         )
 
+    # Bulk deletes from other admin paths use the same queued folder removal
+    def delete_queryset(self, request, queryset):
+        delete_targets(queryset)
+
     # Override response after adding object: redirect to change page,
     # except when using "Save and add another" (then redirect to add new)
     def response_add(self, request, obj, post_url_continue=None):
@@ -342,6 +388,11 @@ class TargetAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('import-csv/', self.admin_site.admin_view(self.import_csv), name='tbl_target_import_csv'),
+            path('crossmatch/', self.admin_site.admin_view(self.crossmatch_view), name='tbl_target_crossmatch'),
+            path('<int:target_id>/uploads/',
+                 self.admin_site.admin_view(self.uploads_view), name='tbl_target_uploads'),
+            path('<int:target_id>/uploads/<str:upload_id>/',
+                 self.admin_site.admin_view(self.upload_view), name='tbl_target_upload'),
         ]
         return custom_urls + urls
 
@@ -351,6 +402,150 @@ class TargetAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_target,
-            process_target_row,
+            TargetCsvImporter,
             title="Import targets from CSV"
-        )
\ No newline at end of file
+        )
+
+    # Chunked uploads
+    # ---------------
+    # Resumable data file uploads (see chunked_upload.py), used by the
+    # "Large data files" widget of the change form:
+    # - POST uploads/ with JSON {name, size, checksum (optional)} starts an upload;
+    # - HEAD uploads/<id>/ returns the Upload-Offset to resume from;
+    # - PATCH uploads/<id>/ appends the request body at Upload-Offset, optionally
+    #   checked against 'Upload-Checksum: sha256 <base64 digest>'; the last chunk
+    #   checks the file checksum, moves the file into place and records it in
+    #   the manifest;
+    # - DELETE uploads/<id>/ cancels the upload.
+
+    # Target the user may change, or 404
+    def get_upload_target(self, request, target_id):
+        target = get_object_or_404(Tbl_target, pk=target_id)
+        if not self.has_change_permission(request, target) or not target.datafiles_path:
+            raise Http404
+        return target
+
+    # Start an upload
+    def uploads_view(self, request, target_id):
+        target = self.get_upload_target(request, target_id)
+        if request.method != "POST":
+            return HttpResponse(status=405, headers={"Allow": "POST"})
+
+        try:
+            data = json.loads(request.body)
+            upload_id = create_upload(target, data.get("name"), int(data.get("size")), data.get("checksum", ""))
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({"error": "Expected JSON with 'name' and 'size'."}, status=400)
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        url = reverse("admin:tbl_target_upload", args=[target.pk, upload_id])
+        return JsonResponse({"id": upload_id, "url": url, "offset": 0}, status=201, headers={"Location": url})
+
+    # Offset, chunks and cancellation of an upload
+    def upload_view(self, request, target_id, upload_id):
+        target = self.get_upload_target(request, target_id)
+
+        try:
+            if request.method in ("HEAD", "GET"):
+                offset, info = upload_offset(target, upload_id)
+                return JsonResponse(
+                    {"offset": offset, "size": info["size"], "name": info["name"]},
+                    headers={"Upload-Offset": offset, "Upload-Length": info["size"], "Cache-Control": "no-store"},
+                )
+
+            if request.method == "DELETE":
+                abort_upload(target, upload_id)
+                return HttpResponse(status=204)
+
+            if request.method != "PATCH":
+                return HttpResponse(status=405, headers={"Allow": "GET, HEAD, PATCH, DELETE"})
+
+            try:
+                offset = int(request.headers["Upload-Offset"])
+                length = int(request.headers.get("Content-Length") or 0)
+                checksum = self.upload_checksum(request.headers.get("Upload-Checksum", ""))
+            except (KeyError, ValueError):
+                return JsonResponse({"error": "Invalid Upload-Offset, Content-Length or Upload-Checksum."}, status=400)
+
+            # The body is streamed to the staging file, never loaded in memory
+            offset = write_chunk(target, upload_id, offset, request, length, checksum)
+            size = upload_offset(target, upload_id)[1]["size"]
+            if offset < size:
+                return HttpResponse(status=204, headers={"Upload-Offset": offset})
+
+            entry = finish_upload(target, upload_id)
+            return JsonResponse(
+                {"name": entry.name, "size": entry.size, "checksum": entry.checksum},
+                headers={"Upload-Offset": offset},
+            )
+
+        except UploadConflict as e:
+            return JsonResponse({"error": str(e)}, status=409)
+        except ChecksumMismatch as e:
+            return JsonResponse({"error": str(e)}, status=460, reason="Checksum Mismatch")
+        except UploadNotFound as e:
+            return JsonResponse({"error": str(e)}, status=404)
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    # Hex SHA-256 digest from an 'Upload-Checksum: sha256 <base64>' header ("" if absent)
+    @staticmethod
+    def upload_checksum(header):
+        if not header:
+            return ""
+        algorithm, _, value = header.partition(" ")
+        if algorithm != "sha256":
+            raise ValueError(header)
+        try:
+            return base64.b64decode(value, validate=True).hex()
+        except binascii.Error:
+            raise ValueError(header)
+
+    # Crossmatch
+    # ----------
+
+    # Match an uploaded list of positions against all targets.
+    # Results are shown as a table, or downloaded as CSV with the "Download CSV" button.
+    def crossmatch_view(self, request):
+        results = None
+        errors = []
+
+        if request.method == "POST":
+            form = CrossmatchForm(request.POST, request.FILES)
+            if form.is_valid():
+                positions, errors = read_positions(form.cleaned_data["positions_file"])
+                results = crossmatch(positions, Tbl_target.objects.all(), form.cleaned_data["tolerance"])
+
+                if "_download" in request.POST:
+                    return self.crossmatch_csv_response(results)
+        else:
+            form = CrossmatchForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            "form": form,
+            "results": results,
+            "matched": sum(1 for result in results if result["target"]) if results else 0,
+            "errors": errors,
+            "title": "Crossmatch positions with targets",
+            "opts": self.model._meta,
+        }
+        return render(request, "admin/dwarfs4MOSAIC/tbl_target/crossmatch.html", context)
+
+    # CSV file with one line per input position and its matched target (if any)
+    @staticmethod
+    def crossmatch_csv_response(results):
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="crossmatch.csv"'
+
+        writer = csv.writer(response)
+        writer.writerow(["name", "ra", "dec", "target_id", "target_name", "separation_arcsec"])
+        for result in results:
+            target = result["target"] or {}
+            writer.writerow([
+                result["name"], result["ra"], result["dec"],
+                target.get("id", ""), target.get("name", ""),
+                "" if result["separation_arcsec"] is None else result["separation_arcsec"],
+            ])
+        return response
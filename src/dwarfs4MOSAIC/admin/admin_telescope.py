@@ -9,42 +9,26 @@ from django.urls import path
 from django.utils.html import format_html
 
 # Local application imports
+from .csv_import import CsvImporter
 from .helpers import import_csv_file
 from ..forms import TelescopeAdminForm
 from ..forms.form_import_csv import CsvImportForm
 from ..models import Tbl_telescope, Tbl_observatory
 
 
-# Process each row of the CSV when importing telescopes
-def process_telescope_row(row, idx, errors):
-    # Get name, skip row if empty
-    name = row.get("name")
-    if not name:
-        errors.append(f"Row {idx}: 'name' field is empty, skipping")
-        return None
-
-    # Get observatory by name, if provided
-    obs_name = row.get("observatory")
-    observatory = None
-    if obs_name:
-        observatory = Tbl_observatory.objects.filter(name=obs_name).first()
-        if not observatory:
-            errors.append(f"Row {idx}: observatory '{obs_name}' not found, skipping")
-            return None
-
-    # Update or create the telescope entry in the database
-    obj, created_flag = Tbl_telescope.objects.update_or_create(
-        name=name,
-        defaults={
+# Bulk CSV importer for telescopes
+class TelescopeCsvImporter(CsvImporter):
+    model = Tbl_telescope
+    foreign_keys = {"obs_tel": ("observatory", Tbl_observatory)}
+
+    def parse_row(self, row, idx):
+        return {
             "description": row.get("description", ""),
-            "obs_tel": observatory,
             "owner": row.get("owner", ""),
             "aperture": float(row.get("aperture") or 0),
             "status": row.get("status", "unknown"),
             "website": row.get("website", ""),
-        },
-    )
-    return created_flag
+        }
 
 
 # Admin interface for Tbl_telescope with enhanced UI and CSV import support
@@ -123,6 +107,6 @@ class TelescopeAdmin(admin.ModelAdmin):
             request,
             CsvImportForm,
             Tbl_telescope,
-            process_telescope_row,
+            TelescopeCsvImporter,
             title="Import telescopes from CSV"
         )
\ No newline at end of file
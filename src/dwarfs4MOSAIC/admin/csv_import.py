@@ -0,0 +1,231 @@
+"""
+Bulk CSV import engine used by the admin 'Import CSV' views.
+
+An import is done in three steps instead of one update_or_create per row:
+1. The whole file is parsed and validated (CsvImporter.parse_row).
+2. Foreign keys, many-to-many references and existing objects are resolved
+   by name with one 'name__in' query per model.
+3. New and existing objects are written with bulk inserts and upserts, and
+   many-to-many relations with bulk inserts into the through tables, all in
+   one transaction: either the whole file is imported or nothing is.
+
+Objects are identified by their 'name' column. If a name appears several
+times in the file, the last row wins.
+"""
+
+# Third-party libraries
+from django.db import connection, transaction
+
+# Local application imports
+from ..fragment_cache import bump_data_version_on_commit
+
+# Number of names per 'name__in' query (keeps IN clauses below SQLite limits)
+LOOKUP_BATCH_SIZE = 900
+
+# Number of rows per bulk_create/bulk_update query
+BULK_BATCH_SIZE = 500
+
+
+# Split a comma separated list of names
+def split_names(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+# Return {name: [objects]} for the objects of 'model' with one of the given names
+def objects_by_name(model, names):
+    names = list(names)
+    found = {}
+    for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+        batch = names[start:start + LOOKUP_BATCH_SIZE]
+        for obj in model.objects.filter(name__in=batch).order_by("pk"):
+            found.setdefault(obj.name, []).append(obj)
+    return found
+
+
+# Base class of the CSV importers.
+# Subclasses set 'model', implement parse_row() and optionally declare
+# 'foreign_keys' and 'many_to_many' as {field name: (CSV column, related model)}.
+class CsvImporter:
+
+    model = None
+    foreign_keys = {}
+    many_to_many = {}
+
+    # Fields not returned by parse_row() but set by prepare(), to include in bulk updates
+    computed_fields = ()
+
+    def __init__(self):
+        self.errors = []
+        self.created = 0
+        self.updated = 0
+
+    # Return a dict of field values for one row (without foreign keys and
+    # many-to-many fields), or None to skip the row. Errors are added to self.errors.
+    def parse_row(self, row, idx):
+        raise NotImplementedError
+
+    # Hook called on each object before it is written (computed fields).
+    # Raising ValueError skips the row.
+    def prepare(self, obj):
+        pass
+
+    # Hook called once the import transaction has been committed
+    def after_import(self, objects):
+        pass
+
+    # Import the rows (dicts from csv.DictReader); 'start' is the file line of the first row
+    def run(self, rows, start=2):
+        parsed = self._parse(rows, start)
+        self._resolve_foreign_keys(parsed)
+        relations = self._resolve_many_to_many(parsed)
+        to_create, to_update = self._build_objects(parsed)
+
+        update_fields = sorted(
+            {field for _, values, _ in parsed.values() for field in values}
+            | set(self.foreign_keys) | set(self.computed_fields)
+        )
+
+        with transaction.atomic():
+            self.model.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            if to_update and update_fields:
+                self._update_existing(to_update, update_fields)
+
+            objects = to_create + to_update
+            self._fill_missing_pks(to_create)
+            self._write_many_to_many(objects, relations)
+
+        # Bulk writes send no model signals: invalidate cached fragments here
+        bump_data_version_on_commit()
+
+        self.created = len(to_create)
+        self.updated = len(to_update)
+        try:
+            self.after_import(objects)
+        except Exception as e:
+            self.errors.append(f"Rows were imported, but the post-import step failed: {e}")
+        return self.created, self.updated
+
+    # Parse every row; returns {name: (idx, values, row)}
+    def _parse(self, rows, start):
+        parsed = {}
+        for idx, row in enumerate(rows, start=start):
+            name = row.get("name")
+            if not name:
+                self.errors.append(f"Row {idx}: 'name' field is empty, skipping")
+                continue
+
+            try:
+                values = self.parse_row(row, idx)
+            except Exception as e:
+                self.errors.append(f"Row {idx}: error {e}")
+                continue
+
+            if values is not None:
+                parsed.pop(name, None)  # keep file order of the last occurrence
+                parsed[name] = (idx, values, row)
+        return parsed
+
+    # Replace foreign key names by objects; rows referencing unknown names are skipped
+    def _resolve_foreign_keys(self, parsed):
+        for field, (column, related_model) in self.foreign_keys.items():
+            referenced = {row.get(column) for _, _, row in parsed.values() if row.get(column)}
+            found = objects_by_name(related_model, referenced)
+
+            for name, (idx, values, row) in list(parsed.items()):
+                reference = row.get(column)
+                if not reference:
+                    values[field] = None
+                elif reference in found:
+                    values[field] = found[reference][0]
+                else:
+                    self.errors.append(f"Row {idx}: {column} '{reference}' not found, skipping")
+                    del parsed[name]
+
+    # Resolve many-to-many names; returns {field: {name: [related objects]}}.
+    # Unknown names are reported and left out.
+    def _resolve_many_to_many(self, parsed):
+        relations = {}
+        for field, (column, related_model) in self.many_to_many.items():
+            referenced = {name: split_names(row.get(column)) for name, (_, _, row) in parsed.items()}
+            found = objects_by_name(related_model, set().union(*referenced.values()))
+
+            relations[field] = {}
+            for name, references in referenced.items():
+                missing = [reference for reference in references if reference not in found]
+                if missing:
+                    self.errors.append(f"Row {parsed[name][0]}: {column} not found: {', '.join(missing)}")
+                relations[field][name] = [found[r][0] for r in references if r in found]
+        return relations
+
+    # Build the objects to create and to update
+    def _build_objects(self, parsed):
+        existing = objects_by_name(self.model, parsed)
+
+        to_create, to_update = [], []
+        for name, (idx, values, _) in list(parsed.items()):
+            matches = existing.get(name, [])
+            if len(matches) > 1:
+                self.errors.append(f"Row {idx}: several objects named '{name}' exist, skipping")
+                del parsed[name]
+                continue
+
+            obj = matches[0] if matches else self.model(name=name)
+            for field, value in values.items():
+                setattr(obj, field, value)
+
+            try:
+                self.prepare(obj)
+            except ValueError as e:
+                self.errors.append(f"Row {idx}: error {e}")
+                del parsed[name]
+                continue
+
+            (to_update if matches else to_create).append(obj)
+        return to_create, to_update
+
+    # Write existing objects back. Where the database supports it, this is an
+    # upsert on the primary key (INSERT ... ON CONFLICT DO UPDATE), much faster
+    # than bulk_update(), which builds one CASE WHEN expression per row and field.
+    def _update_existing(self, objects, fields):
+        if connection.features.supports_update_conflicts_with_target:
+            self.model.objects.bulk_create(
+                objects,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=[self.model._meta.pk.name],
+                update_fields=fields,
+            )
+        else:
+            self.model.objects.bulk_update(objects, fields, batch_size=BULK_BATCH_SIZE)
+
+    # Databases that cannot return ids from bulk inserts leave pk empty: look them up
+    def _fill_missing_pks(self, objects):
+        missing = [obj for obj in objects if obj.pk is None]
+        if not missing:
+            return
+
+        found = objects_by_name(self.model, {obj.name for obj in missing})
+        for obj in missing:
+            obj.pk = found[obj.name][-1].pk
+
+    # Replace the many-to-many relations of the imported objects
+    def _write_many_to_many(self, objects, relations):
+        for field, related_by_name in relations.items():
+            m2m_field = self.model._meta.get_field(field)
+            through = m2m_field.remote_field.through
+            source = m2m_field.m2m_column_name()
+            target = m2m_field.m2m_reverse_name()
+
+            ids = [obj.pk for obj in objects]
+            for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+                through.objects.filter(**{f"{source}__in": ids[start:start + LOOKUP_BATCH_SIZE]}).delete()
+
+            through.objects.bulk_create(
+                [
+                    through(**{source: obj.pk, target: related.pk})
+                    for obj in objects
+                    for related in related_by_name.get(obj.name, [])
+                ],
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
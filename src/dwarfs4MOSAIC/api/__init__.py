@@ -0,0 +1,7 @@
+"""
+Read-only JSON API over targets, observing blocks and observing runs.
+
+The API applies the same visibility rules as the home page (see visibility.py)
+and pages through results with keyset (cursor) pagination, so batch clients
+can pull the full catalogue in bounded, constant-cost pages.
+"""
@@ -0,0 +1,110 @@
+"""
+Keyset (cursor) pagination for the read-only API.
+
+Each page is fetched with a "WHERE key > last key ORDER BY key LIMIT n" query
+on a composite key declared by the view, so the cost of a page does not grow
+with its position in the catalogue (unlike OFFSET pagination).
+"""
+
+# Standard libraries
+import base64
+import binascii
+import json
+
+# Third-party libraries
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+
+    # Query parameters and page sizes
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    # Default key when the view does not declare 'keyset'
+    default_keyset = (('id', None),)
+
+    # Read the page size requested by the client, bounded by max_page_size
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # Encode / decode the values of the last row of a page as an opaque cursor
+    @staticmethod
+    def encode_cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor, length):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != length:
+            raise NotFound("Invalid cursor.")
+        return values
+
+    # Build "(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..." for a composite key
+    @staticmethod
+    def after(names, values):
+        condition = Q()
+        for i, name in enumerate(names):
+            equal = {names[j]: values[j] for j in range(i)}
+            condition |= Q(**equal, **{f"{name}__gt": values[i]})
+        return condition
+
+    # Return one page of results and remember the cursor of the next one.
+    # The view may declare 'keyset' as a sequence of (name, expression) pairs;
+    # a None expression means 'name' is a model field.
+    def paginate_queryset(self, queryset, request, view=None):
+        keyset = getattr(view, 'keyset', self.default_keyset)
+        names = [name for name, _ in keyset]
+        expressions = {name: expr for name, expr in keyset if expr is not None}
+
+        queryset = queryset.annotate(**expressions).order_by(*names)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(names, self.decode_cursor(cursor, len(names))))
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+
+        self.request = request
+        self.next_cursor = None
+        if len(rows) > page_size:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor([getattr(last, name) for name in names])
+        return page
+
+    # URL of the next page, or None on the last page
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
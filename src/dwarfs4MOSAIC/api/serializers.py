@@ -0,0 +1,83 @@
+"""
+Serializers for the read-only API.
+
+All serializers support sparse field selection: '?fields=name,declination'
+returns only the requested fields.
+"""
+
+# Third-party libraries
+from rest_framework import serializers
+
+# Local application imports
+from ..models import Tbl_observing_block, Tbl_observing_run, Tbl_target
+
+
+# Model serializer that keeps only the fields listed in the 'fields' query parameter
+class SparseFieldsSerializer(serializers.ModelSerializer):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
+class DatafileSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    size = serializers.IntegerField()
+    checksum = serializers.CharField()
+
+
+class TargetSerializer(SparseFieldsSerializer):
+
+    # Only blocks visible to the user (prefetched by the view)
+    observing_blocks = serializers.SerializerMethodField()
+
+    # Data files from the datafile manifest
+    datafiles = DatafileSerializer(source='manifest_files', many=True, read_only=True)
+
+    class Meta:
+        model = Tbl_target
+        fields = [
+            'id', 'name', 'type', 'website',
+            'right_ascension', 'declination', 'right_ascension_hours', 'declination_deg',
+            'magnitude', 'redshift_value', 'redshift_error', 'size', 'semester', 'comments',
+            'observing_blocks', 'datafiles',
+        ]
+
+    def get_observing_blocks(self, obj):
+        return [block.pk for block in obj.visible_observing_blocks]
+
+
+class ObservingBlockSerializer(SparseFieldsSerializer):
+
+    # Observing run name and only targets visible to the user (prefetched by the view)
+    obs_run = serializers.SlugRelatedField(slug_field='name', read_only=True)
+    targets = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tbl_observing_block
+        fields = [
+            'id', 'name', 'obs_run', 'description', 'semester', 'start_time', 'end_time',
+            'observation_mode', 'filters', 'configuration', 'exposure_time', 'seeing',
+            'weather_conditions', 'comments', 'targets',
+        ]
+
+    def get_targets(self, obj):
+        return [target.pk for target in obj.visible_targets]
+
+
+class ObservingRunSerializer(SparseFieldsSerializer):
+
+    # Instrument name
+    instrument = serializers.SlugRelatedField(slug_field='name', read_only=True)
+
+    class Meta:
+        model = Tbl_observing_run
+        fields = [
+            'id', 'name', 'description', 'instrument', 'start_date', 'end_date', 'comments',
+        ]
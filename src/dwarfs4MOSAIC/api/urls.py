@@ -0,0 +1,20 @@
+"""
+URL configuration for the read-only API.
+
+    api/targets/          api/targets/<id>/
+    api/observing_blocks/ api/observing_blocks/<id>/
+    api/observing_runs/   api/observing_runs/<id>/
+"""
+
+# Third-party libraries
+from rest_framework.routers import DefaultRouter
+
+# Local application imports
+from . import views
+
+router = DefaultRouter()
+router.register('targets', views.TargetViewSet, basename='api-target')
+router.register('observing_blocks', views.ObservingBlockViewSet, basename='api-observing-block')
+router.register('observing_runs', views.ObservingRunViewSet, basename='api-observing-run')
+
+urlpatterns = router.urls
@@ -0,0 +1,146 @@
+"""
+Read-only API views over targets, observing blocks and observing runs.
+
+Querysets are restricted with the same rules as the home page:
+core team members and superusers see everything, collaborators only
+the targets and blocks visible to them (see visibility.py).
+"""
+
+# Third-party libraries
+from django.db.models import Prefetch
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Local application imports
+from ..crossmatch import MAX_POSITIONS, crossmatch, read_positions
+from ..forms import ConeSearchForm
+from ..forms.form_crossmatch import DEFAULT_TOLERANCE_ARCSEC, MAX_TOLERANCE_ARCSEC
+from ..models import Tbl_observing_run
+from ..models.tbl_target import HOME_DEC_KEY, HOME_RA_KEY
+from ..spatial import cone_search, parse_declination, parse_right_ascension
+from ..visibility import sees_everything, visible_blocks, visible_targets
+from .pagination import KeysetPagination
+from .serializers import ObservingBlockSerializer, ObservingRunSerializer, TargetSerializer
+
+
+class TargetViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = TargetSerializer
+    pagination_class = KeysetPagination
+
+    # Targets are paged in (RA, Dec, id) order, with the sort keys of the home
+    # page, so pages are read from the 'target_home_order_idx' index.
+    keyset = (
+        ('ra_key', HOME_RA_KEY),
+        ('dec_key', HOME_DEC_KEY),
+        ('id', None),
+    )
+
+    def get_queryset(self):
+        user = self.request.user
+        return (
+            visible_targets(user)
+            .prefetch_related(
+                Prefetch('observing_blocks', queryset=visible_blocks(user).only('pk'),
+                         to_attr='visible_observing_blocks'),
+                'manifest_files')
+        )
+
+    # Targets within 'radius' arcsec of (ra, dec), closest first, with their separation.
+    # Same parameters as the cone search page; results are not paginated
+    # (the radius is bounded by the form).
+    @action(detail=False, url_path='cone')
+    def cone(self, request):
+        form = ConeSearchForm(request.query_params)
+        if not form.is_valid():
+            raise ValidationError(form.errors)
+
+        matches = cone_search(
+            self.get_queryset(),
+            form.cleaned_data['ra'],
+            form.cleaned_data['dec'],
+            form.cleaned_data['radius'] / 3600)
+
+        results = []
+        for target, separation in matches:
+            data = self.get_serializer(target).data
+            data['separation_arcsec'] = round(separation, 3)
+            results.append(data)
+        return Response({'results': results})
+
+    # Crossmatch a list of positions with the visible targets.
+    # Positions are sent either as an uploaded 'file' (CSV or VOTable) or as a JSON
+    # 'positions' list of {"name", "ra", "dec"} objects; 'tolerance' is in arcsec.
+    # Each position gets its nearest target within the tolerance, or null.
+    @action(detail=False, methods=['post'], url_path='crossmatch')
+    def crossmatch(self, request):
+        try:
+            tolerance = float(request.data.get('tolerance', DEFAULT_TOLERANCE_ARCSEC))
+        except (TypeError, ValueError):
+            raise ValidationError({'tolerance': "A number is required."})
+        if not 0 <= tolerance <= MAX_TOLERANCE_ARCSEC:
+            raise ValidationError({'tolerance': f"Must be between 0 and {MAX_TOLERANCE_ARCSEC} arcsec."})
+
+        if 'file' in request.FILES:
+            positions, errors = read_positions(request.FILES['file'])
+        elif isinstance(request.data.get('positions'), list):
+            positions, errors = self._read_json_positions(request.data['positions'])
+        else:
+            raise ValidationError("Send a 'file' or a 'positions' list.")
+
+        results = crossmatch(positions, self.filter_queryset(self.get_queryset()), tolerance)
+        return Response({
+            'matched': sum(1 for result in results if result['target']),
+            'errors': errors,
+            'results': results,
+        })
+
+    # Convert the JSON positions of a crossmatch request, collecting errors
+    @staticmethod
+    def _read_json_positions(items):
+        if len(items) > MAX_POSITIONS:
+            raise ValidationError({'positions': f"At most {MAX_POSITIONS} positions are accepted."})
+
+        positions, errors = [], []
+        for idx, item in enumerate(items):
+            try:
+                positions.append((
+                    str(item.get('name', idx)),
+                    parse_right_ascension(item['ra']),
+                    parse_declination(item['dec']),
+                ))
+            except ValueError as e:
+                errors.append(f"Position {idx}: {e}")
+            except (AttributeError, KeyError):
+                errors.append(f"Position {idx}: 'ra' and 'dec' are required.")
+        return positions, errors
+
+
+class ObservingBlockViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ObservingBlockSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return (
+            visible_blocks(user)
+            .select_related('obs_run')
+            .prefetch_related(
+                Prefetch('target', queryset=visible_targets(user).only('pk'),
+                         to_attr='visible_targets'))
+        )
+
+
+class ObservingRunViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ObservingRunSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        runs = Tbl_observing_run.objects.select_related('instrument')
+        if sees_everything(user):
+            return runs
+
+        # Collaborators only see runs with at least one visible block
+        return runs.filter(pk__in=visible_blocks(user).values('obs_run'))
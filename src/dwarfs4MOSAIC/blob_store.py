@@ -0,0 +1,109 @@
+"""
+Content-addressed data file store (DATAFILE_STORE = 'content').
+
+Each distinct file content is stored once in BLOB_ROOT, named after its
+SHA-256 checksum, and the data files folders of the targets hold hardlinks to
+these blobs. The folder layout (MEDIA_ROOT/<target>/datafiles/<name>) seen by
+the download views and the web server is unchanged, while a calibration file
+uploaded to many targets takes the disk space (and backup time) of one.
+
+A blob is referenced by the datafile manifest entries with its checksum: when
+the last one is removed (file deleted, target deleted), the blob is removed
+too. A blob still linked from a folder (link count above 1) is kept.
+BLOB_ROOT must be on the same filesystem as MEDIA_ROOT; where hardlinks are
+not possible, files are copied and nothing is saved. The store needs local
+media storage (MEDIA_STORAGE = 'local'); it is ignored with an object store.
+"""
+
+# Standard libraries
+import os
+import shutil
+import uuid
+
+# Third-party libraries
+from django.conf import settings
+
+# Local application imports
+from .models import Tbl_datafile
+from .storage import get_storage
+
+
+# True if data files are stored by content
+def content_addressed():
+    return getattr(settings, 'DATAFILE_STORE', 'folders') == 'content' and get_storage().local
+
+
+# Absolute path of the blob with this checksum (two levels of sub-folders)
+def blob_path(checksum):
+    return os.path.join(settings.BLOB_ROOT, checksum[:2], checksum[2:4], checksum)
+
+
+# Move the file at 'path' into the store as the blob 'checksum', or drop it if
+# the blob already exists. Returns the blob path.
+def store_blob(path, checksum):
+    blob = blob_path(checksum)
+    if os.path.exists(blob):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.replace(path, blob)
+    return blob
+
+
+# Make 'dest' a hardlink to the blob 'checksum' (atomically replacing any file
+# at 'dest'); copy the blob where hardlinks are not supported
+def link_blob(checksum, dest):
+    blob = blob_path(checksum)
+    temporary = os.path.join(os.path.dirname(dest), f".{uuid.uuid4().hex}.link")
+    try:
+        os.link(blob, temporary)
+    except OSError:
+        shutil.copyfile(blob, temporary)
+    os.replace(temporary, dest)
+
+
+# Replace the file at 'path' by a link to its blob, storing the blob if new
+def store_file(path, checksum):
+    blob = blob_path(checksum)
+    if os.path.exists(blob) and os.path.samefile(blob, path):
+        return
+    store_blob(path, checksum)
+    link_blob(checksum, path)
+
+
+# Remove the blobs with these checksums that no manifest entry references
+# and no folder links to any more. Returns (number of blobs removed, bytes freed).
+def release_blobs(checksums):
+    checksums = {checksum for checksum in checksums if checksum}
+    if not checksums:
+        return 0, 0
+
+    referenced = set(
+        Tbl_datafile.objects.filter(checksum__in=checksums).values_list('checksum', flat=True).distinct()
+    )
+    removed, freed = 0, 0
+    for checksum in checksums - referenced:
+        blob = blob_path(checksum)
+        try:
+            stat = os.stat(blob)
+        except FileNotFoundError:
+            continue
+        if stat.st_nlink <= 1:
+            os.remove(blob)
+            removed += 1
+            freed += stat.st_size
+    return removed, freed
+
+
+# Remove every unreferenced blob. Returns (number of blobs removed, bytes freed).
+def collect_garbage():
+    checksums = []
+    for _, _, filenames in os.walk(settings.BLOB_ROOT):
+        checksums.extend(name for name in filenames if len(name) == 64)
+
+    removed, freed = 0, 0
+    for start in range(0, len(checksums), 1000):
+        batch_removed, batch_freed = release_blobs(checksums[start:start + 1000])
+        removed += batch_removed
+        freed += batch_freed
+    return removed, freed
@@ -0,0 +1,167 @@
+"""
+Cache backends with hit/miss counters.
+
+The CACHES setting uses these thin subclasses of Django's file-based and Redis
+backends. They count hits and misses of every cache alias in memory and add
+them to shared counters stored in the cache itself every STATS_FLUSH_INTERVAL
+seconds, so the numbers of all workers can be read with cache_stats() or the
+'cache' management command.
+"""
+
+# Standard libraries
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Third-party libraries
+from django.core.cache import caches
+from django.core.cache.backends import filebased, redis
+
+# Cache key of the shared counters ('hits' and 'misses')
+STATS_KEY = 'cache_stats:{}'
+
+# Seconds between two flushes of the counters of a process
+STATS_FLUSH_INTERVAL = 10
+
+# Marker of a missing value (None may be a cached value)
+_MISSING = object()
+
+
+class StatsMixin:
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._stats_local = threading.local()
+        self._stats_pending = Counter()
+        self._stats_flushed_at = time.monotonic()
+
+    # Operations of the cache itself (e.g. get_many calling get, or the
+    # counters being flushed) are not counted
+    @contextmanager
+    def _stats_paused(self):
+        previous = getattr(self._stats_local, 'paused', False)
+        self._stats_local.paused = True
+        try:
+            yield
+        finally:
+            self._stats_local.paused = previous
+
+    def _record(self, hits, misses):
+        if getattr(self._stats_local, 'paused', False):
+            return
+        with self._stats_lock:
+            self._stats_pending['hits'] += hits
+            self._stats_pending['misses'] += misses
+            if time.monotonic() - self._stats_flushed_at < STATS_FLUSH_INTERVAL:
+                return
+            pending, self._stats_pending = self._stats_pending, Counter()
+            self._stats_flushed_at = time.monotonic()
+        self._flush_stats(pending)
+
+    def _flush_stats(self, pending):
+        with self._stats_paused():
+            for name, count in pending.items():
+                if not count:
+                    continue
+                key = STATS_KEY.format(name)
+                try:
+                    self.incr(key, count)
+                except ValueError:
+                    # First flush (or counters cleared): concurrent workers may
+                    # race here, the counters are approximate by design
+                    if not self.add(key, count, timeout=None):
+                        self.incr(key, count)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._record(0, 1)
+            return default
+        self._record(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with self._stats_paused():
+            values = super().get_many(keys, version=version)
+        self._record(len(values), len(keys) - len(values))
+        return values
+
+    def stats(self):
+        """
+        Returns the shared counters plus the ones of this process not flushed yet.
+        """
+        with self._stats_lock:
+            pending = Counter(self._stats_pending)
+        with self._stats_paused():
+            return {
+                name: (self.get(STATS_KEY.format(name)) or 0) + pending[name]
+                for name in ('hits', 'misses')
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats_pending = Counter()
+        with self._stats_paused():
+            self.delete_many([STATS_KEY.format(name) for name in ('hits', 'misses')])
+
+
+# Cache stored as files in a folder shared by every worker of the host
+class FileBasedCache(StatsMixin, filebased.FileBasedCache):
+
+    def summary(self):
+        """
+        Returns the number of files and their total size in bytes.
+        """
+        files = self._list_cache_files()
+        size = 0
+        for path in files:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass  # removed by another worker meanwhile
+        return {'entries': len(files), 'bytes': size}
+
+
+# Redis cache (requires the 'redis' package)
+class RedisCache(StatsMixin, redis.RedisCache):
+
+    # Keys deleted per request by clear()
+    CLEAR_BATCH_SIZE = 1000
+
+    def summary(self):
+        return {'server': ', '.join(self._servers)}
+
+    def clear(self):
+        """
+        Deletes the keys of this alias only. The aliases share one Redis database,
+        kept apart by KEY_PREFIX, so Django's FLUSHDB would clear all of them.
+        """
+        if not self.key_prefix:
+            return super().clear()
+
+        client = self._cache.get_client(write=True)
+        pattern = re.sub(r'([*?\[\]\\])', r'\\\1', self.key_prefix) + ':*'
+        batch = []
+        for key in client.scan_iter(match=pattern, count=self.CLEAR_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= self.CLEAR_BATCH_SIZE:
+                client.delete(*batch)
+                batch = []
+        if batch:
+            client.delete(*batch)
+        return True
+
+
+# Hit/miss counters of every configured cache alias
+def cache_stats():
+    stats = {}
+    for alias in caches:
+        cache = caches[alias]
+        if isinstance(cache, StatsMixin):
+            stats[alias] = cache.stats()
+    return stats
@@ -0,0 +1,244 @@
+"""
+Resumable chunked uploads of target data files (a small subset of the tus
+protocol, https://tus.io).
+
+An upload is created with the file name, its size and optionally its SHA-256
+checksum. Chunks are then appended in order, each one streamed from the
+request straight into a local staging file in the '.uploads' folder of the
+target's data files folder. The offset of an upload is the size of its staging
+file, so it survives disconnects and server restarts: a client asks for the
+offset and sends the rest. Each chunk may carry its own checksum; a chunk that does
+not match is cut off again. Writes hold an exclusive lock on the staging file,
+so a duplicated request cannot interleave its bytes with another one.
+
+The SHA-256 of the whole file is computed while the chunks are written, by the
+process that received them (a hash state cannot be stored with the upload
+metadata): the staging file is only read again when the chunks were spread
+over several processes or the server restarted. Once complete, the file
+checksum is verified against the one given by the client and the staging file
+is moved into the media storage (renamed into place with local storage,
+uploaded to an object store) and recorded in the datafile manifest.
+
+The admin endpoints are in admin/admin_target.py, the client in
+static/js/chunked_upload.js.
+"""
+
+# Standard libraries
+import fcntl
+import hashlib
+import json
+import os
+import time
+import uuid
+
+# Third-party libraries
+from django.conf import settings
+
+# Local application imports
+from .manifest import datafile_name, datafiles_dir, file_checksum, record_file
+from .storage import get_storage
+
+# Folder of the staging files, inside each target's data files folder
+UPLOAD_DIR = '.uploads'
+
+# Bytes read from the request at a time while writing a chunk (1 MiB)
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+# Unknown (or removed) upload id
+class UploadNotFound(UploadError):
+    pass
+
+
+# The chunk offset does not match the upload offset
+class UploadConflict(UploadError):
+    pass
+
+
+# The checksum of a chunk does not match (the client sends it again)
+class ChecksumMismatch(UploadError):
+    pass
+
+
+# Running SHA-256 of the uploads written by this process: {upload id: (offset, hash)},
+# the hash of the first 'offset' bytes of the staging file
+_running_hashes = {}
+
+
+# Absolute paths of the staging file and of the metadata file of an upload
+def _paths(target, upload_id):
+    if not upload_id.isalnum():
+        raise UploadNotFound("Unknown upload.")
+    folder = os.path.join(datafiles_dir(target), UPLOAD_DIR)
+    return os.path.join(folder, f"{upload_id}.part"), os.path.join(folder, f"{upload_id}.json")
+
+
+# Metadata of an upload: {'name', 'size', 'checksum', 'created'}
+def _read_info(target, upload_id):
+    _, info_path = _paths(target, upload_id)
+    try:
+        with open(info_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadNotFound("Unknown upload.")
+
+
+# Open the staging file of an upload and hold an exclusive lock on it
+# (released when the file is closed)
+def _open_locked(target, upload_id):
+    part_path, _ = _paths(target, upload_id)
+    try:
+        f = open(part_path, 'r+b')
+    except FileNotFoundError:
+        raise UploadNotFound("Unknown upload.")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
+
+# Remove the staging and metadata files of an upload
+def _remove(target, upload_id):
+    _running_hashes.pop(upload_id, None)
+    for path in _paths(target, upload_id):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Remove uploads of the target not written to for UPLOAD_EXPIRY seconds
+def remove_stale_uploads(target):
+    folder = os.path.join(datafiles_dir(target), UPLOAD_DIR)
+    limit = time.time() - settings.UPLOAD_EXPIRY
+    try:
+        entries = list(os.scandir(folder))
+    except FileNotFoundError:
+        return 0
+
+    removed = 0
+    for entry in entries:
+        upload_id, extension = os.path.splitext(entry.name)
+        if extension == '.json' and entry.stat().st_mtime < limit:
+            part_path, _ = _paths(target, upload_id)
+            if not os.path.exists(part_path) or os.stat(part_path).st_mtime < limit:
+                _remove(target, upload_id)
+                removed += 1
+    return removed
+
+
+# Start an upload of 'size' bytes; returns its id.
+# 'checksum' (optional) is the SHA-256 hex digest of the whole file.
+def create_upload(target, name, size, checksum=""):
+    name = os.path.basename(name or "")
+    if not name or name.startswith('.'):
+        raise UploadError("Invalid file name.")
+    if size < 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"File size must be between 0 and {settings.UPLOAD_MAX_SIZE} bytes.")
+    checksum = (checksum or "").lower()
+    if checksum and (len(checksum) != 64 or any(c not in "0123456789abcdef" for c in checksum)):
+        raise UploadError("Invalid SHA-256 checksum.")
+
+    remove_stale_uploads(target)
+
+    upload_id = uuid.uuid4().hex
+    part_path, info_path = _paths(target, upload_id)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    open(part_path, 'wb').close()
+    with open(info_path, 'w') as f:
+        json.dump({'name': name, 'size': size, 'checksum': checksum, 'created': time.time()}, f)
+    return upload_id
+
+
+# Number of bytes received so far, and the upload metadata
+def upload_offset(target, upload_id):
+    info = _read_info(target, upload_id)
+    part_path, _ = _paths(target, upload_id)
+    try:
+        return os.stat(part_path).st_size, info
+    except FileNotFoundError:
+        raise UploadNotFound("Unknown upload.")
+
+
+# Append 'length' bytes read from 'stream' at 'offset'. 'checksum' (optional)
+# is the SHA-256 hex digest of the chunk: if it does not match, the chunk is
+# cut off again and ChecksumMismatch is raised. Returns the new offset.
+def write_chunk(target, upload_id, offset, stream, length, checksum=""):
+    with _open_locked(target, upload_id) as f:
+        # Checked with the lock held: the upload may have been finished or
+        # written to by another request meanwhile
+        current, info = upload_offset(target, upload_id)
+        if offset != current:
+            raise UploadConflict(f"Offset {offset} does not match the upload offset {current}.")
+        if offset + length > info['size']:
+            raise UploadError("Chunk goes past the end of the file.")
+
+        # Continue the running hash only if it covers every byte before the chunk
+        running = _running_hashes.pop(upload_id, None)
+        if offset == 0:
+            running = hashlib.sha256()
+        elif running is not None and running[0] == offset:
+            running = running[1]
+        else:
+            running = None
+
+        digest = hashlib.sha256()
+        f.seek(offset)
+        try:
+            remaining = length
+            while remaining:
+                data = stream.read(min(UPLOAD_READ_SIZE, remaining))
+                if not data:
+                    raise UploadError("Connection closed before the end of the chunk.")
+                f.write(data)
+                digest.update(data)
+                if running is not None:
+                    running.update(data)
+                remaining -= len(data)
+
+            if checksum and digest.hexdigest() != checksum.lower():
+                raise ChecksumMismatch("Chunk checksum mismatch.")
+        except Exception:
+            # A chunk with a checksum is kept only if complete and verified;
+            # otherwise the bytes received are kept and the client resumes after them
+            if checksum:
+                f.truncate(offset)
+            elif running is not None:
+                _running_hashes[upload_id] = (offset + length - remaining, running)
+            raise
+
+        if running is not None:
+            _running_hashes[upload_id] = (offset + length, running)
+    return offset + length
+
+
+# Verify a complete upload and move it into the data files folder
+# (replacing a file of the same name). Returns the manifest entry.
+def finish_upload(target, upload_id):
+    with _open_locked(target, upload_id):
+        offset, info = upload_offset(target, upload_id)
+        if offset != info['size']:
+            raise UploadError(f"Upload incomplete ({offset} of {info['size']} bytes).")
+
+        part_path, _ = _paths(target, upload_id)
+        running = _running_hashes.pop(upload_id, None)
+        if running is not None and running[0] == offset:
+            checksum = running[1].hexdigest()
+        else:
+            checksum = file_checksum(part_path)
+
+        if info['checksum'] and checksum != info['checksum']:
+            _remove(target, upload_id)
+            raise UploadError("File checksum mismatch, the upload was discarded.")
+
+        get_storage().move_in(part_path, datafile_name(target, info['name']))
+        _remove(target, upload_id)
+    return record_file(target, info['name'], checksum=checksum)
+
+
+# Cancel an upload
+def abort_upload(target, upload_id):
+    _read_info(target, upload_id)
+    _remove(target, upload_id)
@@ -0,0 +1,204 @@
+"""
+Bulk crossmatch of a list of sky positions against the registered targets.
+
+The target coordinates are loaded once into NumPy arrays, converted to unit
+vectors and indexed in a k-d tree (SciPy). Each input position is then matched
+to its nearest target with one tree query, bounded by the chord length of the
+tolerance: O(n log n) overall, and memory proportional to the number of
+positions, however the targets are clustered on the sky.
+
+Positions can be uploaded as CSV (columns 'ra' and 'dec', optionally 'name')
+or as a VOTable with TABLEDATA rows. Coordinates are given in decimal degrees
+or sexagesimal (HH:MM:SS / +-DD:MM:SS).
+"""
+
+# Standard libraries
+import csv
+import io
+import xml.etree.ElementTree as ET
+
+# Third-party libraries
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Local application imports
+from .spatial import parse_declination, parse_right_ascension
+
+# Largest number of positions accepted in one crossmatch
+MAX_POSITIONS = 100_000
+
+# Number of positions queried per batch (bounds the size of the query arrays)
+MATCH_BATCH_SIZE = 10_000
+
+# Accepted column names (lowercase) for each coordinate
+RA_COLUMNS = ('ra', 'right_ascension', 'raj2000', 'ra_deg')
+DEC_COLUMNS = ('dec', 'declination', 'dej2000', 'dec_deg')
+NAME_COLUMNS = ('name', 'id', 'source_id', 'label')
+
+
+# PARSING
+# -------
+
+# Return the first column of 'header' (case-insensitive) among 'candidates', or None
+def _find_column(header, candidates):
+    lowered = {column.strip().lower(): column for column in header if column}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    return None
+
+
+# Convert (row number, name, ra, dec) strings into positions, collecting errors
+def _build_positions(rows, errors):
+    positions = []
+    for idx, name, ra, dec in rows:
+        if len(positions) >= MAX_POSITIONS:
+            errors.append(f"Only the first {MAX_POSITIONS} positions are matched.")
+            break
+        try:
+            positions.append((name or str(idx), parse_right_ascension(ra), parse_declination(dec)))
+        except ValueError as e:
+            errors.append(f"Row {idx}: {e}")
+    return positions
+
+
+# Read positions from CSV text with a header line
+def _read_csv(text, errors):
+    reader = csv.DictReader(io.StringIO(text))
+    header = reader.fieldnames or []
+    ra_column = _find_column(header, RA_COLUMNS)
+    dec_column = _find_column(header, DEC_COLUMNS)
+    name_column = _find_column(header, NAME_COLUMNS)
+
+    if ra_column is None or dec_column is None:
+        errors.append("The file must have 'ra' and 'dec' columns.")
+        return []
+
+    rows = (
+        (idx, row.get(name_column, "") if name_column else "", row[ra_column], row[dec_column])
+        for idx, row in enumerate(reader, start=2)  # line 1 is the header
+    )
+    return _build_positions(rows, errors)
+
+
+# Read positions from the first TABLEDATA table of a VOTable
+def _read_votable(text, errors):
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        errors.append(f"Invalid VOTable: {e}")
+        return []
+
+    # Ignore XML namespaces (VOTable 1.1 to 1.4 use different ones)
+    def local(tag):
+        return tag.rsplit('}', 1)[-1]
+
+    fields = [element.get('name', '') for element in root.iter() if local(element.tag) == 'FIELD']
+    ra_index = next((fields.index(c) for c in fields if c.lower() in RA_COLUMNS), None)
+    dec_index = next((fields.index(c) for c in fields if c.lower() in DEC_COLUMNS), None)
+    name_index = next((fields.index(c) for c in fields if c.lower() in NAME_COLUMNS), None)
+
+    if ra_index is None or dec_index is None:
+        errors.append("The VOTable must have 'ra' and 'dec' fields.")
+        return []
+
+    def rows():
+        trs = (element for element in root.iter() if local(element.tag) == 'TR')
+        for idx, tr in enumerate(trs, start=1):
+            cells = [(td.text or "").strip() for td in tr if local(td.tag) == 'TD']
+            if len(cells) != len(fields):
+                errors.append(f"Row {idx}: expected {len(fields)} cells, got {len(cells)}")
+                continue
+            name = cells[name_index] if name_index is not None else ""
+            yield idx, name, cells[ra_index], cells[dec_index]
+
+    return _build_positions(rows(), errors)
+
+
+# Read positions from an uploaded file (CSV or VOTable, UTF-8).
+# Returns (positions, errors): positions is a list of (name, ra deg, dec deg).
+def read_positions(uploaded_file):
+    errors = []
+    try:
+        text = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return [], ["The file must be UTF-8 encoded."]
+
+    if text.lstrip().startswith('<'):
+        return _read_votable(text, errors), errors
+    return _read_csv(text, errors), errors
+
+
+# MATCHING
+# --------
+
+# Unit vectors (n x 3) of positions given in degrees
+def unit_vectors(ra_deg, dec_deg):
+    ra = np.radians(ra_deg)
+    dec = np.radians(dec_deg)
+    cos_dec = np.cos(dec)
+    return np.column_stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+
+
+# Match positions against a target catalogue, all coordinates in degrees.
+# Returns two arrays with one entry per position: the index of the nearest
+# catalogue entry within 'tolerance' (-1 if none) and its separation (degrees, NaN if none).
+def match_nearest(ra_deg, dec_deg, cat_ra_deg, cat_dec_deg, tolerance):
+    ra_deg = np.asarray(ra_deg, dtype=float)
+    dec_deg = np.asarray(dec_deg, dtype=float)
+    nearest = np.full(len(ra_deg), -1, dtype=np.int64)
+    separation = np.full(len(ra_deg), np.nan)
+    if len(ra_deg) == 0 or len(cat_ra_deg) == 0:
+        return nearest, separation
+
+    tree = cKDTree(unit_vectors(np.asarray(cat_ra_deg, dtype=float), np.asarray(cat_dec_deg, dtype=float)))
+
+    # Largest chord length (distance between unit vectors) within the tolerance
+    max_chord = 2 * np.sin(np.radians(tolerance) / 2)
+
+    for start in range(0, len(ra_deg), MATCH_BATCH_SIZE):
+        batch = slice(start, start + MATCH_BATCH_SIZE)
+        vectors = unit_vectors(ra_deg[batch], dec_deg[batch])
+
+        # Positions without a target within the bound get an infinite distance;
+        # the bound is widened by a rounding margin and checked exactly below
+        chord, index = tree.query(vectors, k=1, distance_upper_bound=max_chord * (1 + 1e-9))
+        found = np.flatnonzero(chord <= max_chord)
+
+        nearest[found + start] = index[found]
+        separation[found + start] = np.degrees(2 * np.arcsin(chord[found] / 2))
+
+    return nearest, separation
+
+
+# Crossmatch positions (list of (name, ra deg, dec deg)) against the targets of 'queryset'.
+# Returns one dict per position with the nearest target within 'tolerance_arcsec',
+# or None as target if there is no match.
+def crossmatch(positions, queryset, tolerance_arcsec):
+    catalogue = list(
+        queryset
+        .filter(right_ascension_hours__isnull=False, declination_deg__isnull=False)
+        .values_list('pk', 'name', 'right_ascension_hours', 'declination_deg')
+    )
+    cat_ra = np.array([row[2] * 15 for row in catalogue], dtype=float)
+    cat_dec = np.array([row[3] for row in catalogue], dtype=float)
+
+    nearest, separation = match_nearest(
+        [ra for _, ra, _ in positions],
+        [dec for _, _, dec in positions],
+        cat_ra, cat_dec, tolerance_arcsec / 3600)
+
+    results = []
+    for (name, ra, dec), index, sep in zip(positions, nearest.tolist(), separation.tolist()):
+        target = None
+        if index >= 0:
+            target_id, target_name, _, _ = catalogue[index]
+            target = {'id': target_id, 'name': target_name}
+        results.append({
+            'name': name,
+            'ra': ra,
+            'dec': dec,
+            'target': target,
+            'separation_arcsec': None if target is None else round(sep * 3600, 3),
+        })
+    return results
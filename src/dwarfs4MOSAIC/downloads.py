@@ -0,0 +1,276 @@
+"""
+Helpers to serve target data files to the browser.
+
+Provides:
+- A configurable offload backend (settings.FILE_SERVING_BACKEND): permission
+  checks stay in Django, but the bytes can be sent by the front-end web server
+  through X-Accel-Redirect (nginx) or X-Sendfile (Apache), with a pure-Python
+  fallback. With an object store (MEDIA_STORAGE = 's3'), downloads are
+  redirected to presigned URLs instead.
+- Single file responses honouring Range/If-Range and conditional GET
+  (If-None-Match/If-Modified-Since), so interrupted downloads can be
+  resumed and repeated downloads revalidated.
+- Streaming ZIP archives built on the fly while the response is sent,
+  so downloads start immediately, use constant memory and leave no
+  temporary files behind.
+
+Files are given by their name in the media storage (see storage.py).
+"""
+
+# Standard libraries
+import mimetypes
+import os
+import re
+import time
+import zipfile
+from urllib.parse import quote, unquote
+
+# Third-party libraries
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+# Local application imports
+from .storage import STORAGE_CHUNK_SIZE, clean_name, get_storage
+
+# Read size used when streaming files (1 MiB)
+STREAM_CHUNK_SIZE = STORAGE_CHUNK_SIZE
+
+# Extensions of files that are already compressed: they are stored as-is in
+# ZIP archives, since deflating them again only costs CPU time
+STORED_EXTENSIONS = (
+    '.gz', '.fz', '.bz2', '.xz', '.zip', '.zst',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp',
+)
+
+# Single range request header ("bytes=start-end", "bytes=start-" or "bytes=-suffix")
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# OFFLOAD BACKENDS
+# ----------------
+
+# Supported values of settings.FILE_SERVING_BACKEND
+FILE_SERVING_BACKENDS = ('python', 'nginx', 'apache')
+
+
+# Internal URL (nginx 'internal' location) of a file of the media storage
+def internal_url(name):
+    return settings.FILE_SERVING_INTERNAL_URL + quote(clean_name(name))
+
+
+# Name of the file referenced by an internal URL, or None if the URL
+# does not belong to the internal location
+def internal_name(url):
+    prefix = settings.FILE_SERVING_INTERNAL_URL
+    if not url.startswith(prefix):
+        return None
+    return unquote(url[len(prefix):])
+
+
+# Return a response sending one file of the media storage.
+# - Object store: a redirect to a presigned URL of the file.
+# - Local files, with the configured backend:
+#   - 'python': Django streams the file itself (see serve_file).
+#   - 'nginx': an empty response with X-Accel-Redirect to the internal location.
+#   - 'apache': an empty response with X-Sendfile and the absolute path.
+# The web server (or object store) then handles ranges and conditional requests itself.
+def send_file(request, name, filename, checksum="", as_attachment=True):
+    storage = get_storage()
+    url = storage.download_url(name, filename, as_attachment=as_attachment)
+    if url:
+        return HttpResponseRedirect(url)
+
+    backend = getattr(settings, 'FILE_SERVING_BACKEND', 'python')
+    if backend not in FILE_SERVING_BACKENDS:
+        raise ImproperlyConfigured(
+            f"FILE_SERVING_BACKEND must be one of {', '.join(FILE_SERVING_BACKENDS)}, not '{backend}'.")
+
+    if backend == 'python':
+        return serve_file(request, name, filename, checksum=checksum, as_attachment=as_attachment)
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = HttpResponse(content_type=content_type)
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+
+    if backend == 'nginx':
+        response['X-Accel-Redirect'] = internal_url(name)
+    else:
+        response['X-Sendfile'] = os.path.abspath(storage.path(name))
+    return response
+
+
+# SINGLE FILES
+# ------------
+
+# Build a strong ETag for a file (storage.FileInfo): the stored checksum if known,
+# otherwise derived from size and modification time.
+def file_etag(info, checksum=""):
+    if checksum:
+        return f'"{checksum}"'
+    return f'"{info.size:x}-{int(info.mtime * 1_000_000):x}"'
+
+
+# Parse a Range header against the file size.
+# Returns (start, end) inclusive, None if the header is absent or not a single
+# byte range (the full file is then served), or False if it is unsatisfiable.
+def parse_range(header, size):
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+# Return True if the If-Range precondition allows serving a partial response
+def if_range_matches(request, etag, mtime):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # Entity tags must match exactly (strong comparison)
+        return if_range == etag
+
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+# Serve one file (as an attachment by default) with ETag, Last-Modified and byte range support.
+# - Conditional requests are answered with 304 (or 412) without reading the file.
+# - A single satisfiable range is answered with 206 and the requested bytes.
+def serve_file(request, name, filename, checksum="", as_attachment=True):
+    storage = get_storage()
+    info = storage.stat(name)
+    etag = file_etag(info, checksum)
+    last_modified = http_date(info.mtime)
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(info.mtime))
+    if conditional is not None:
+        return conditional
+
+    byte_range = None
+    if if_range_matches(request, etag, info.mtime):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), info.size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{info.size}'
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            storage.read_range(name, start, length) if request.method != 'HEAD' else [],
+            status=206,
+            content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response['Content-Range'] = f'bytes {start}-{end}/{info.size}'
+        response['Content-Length'] = str(length)
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    else:
+        response = FileResponse(storage.open(name), as_attachment=as_attachment, filename=filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    return response
+
+
+# ZIP ARCHIVES
+# ------------
+
+# Write-only file object that buffers what zipfile writes until it is popped.
+# It provides tell() but not seek(), so zipfile writes data descriptors
+# after each entry instead of seeking back to patch the local headers.
+class _ZipStream:
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data):
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    # Return the buffered bytes and empty the buffer
+    def pop(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+# Return the compression method for a file name
+def zip_compress_type(filename):
+    if filename.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+# Generate a ZIP archive chunk by chunk.
+# 'files' is an iterable of (arcname, name, storage.FileInfo) triples.
+# ZIP64 extensions are used automatically for entries larger than 2 GiB.
+def iter_zip(files):
+    storage = get_storage()
+    stream = _ZipStream()
+
+    with zipfile.ZipFile(stream, 'w', allowZip64=True) as archive:
+        for arcname, name, info in files:
+            zinfo = zipfile.ZipInfo(arcname, time.localtime(info.mtime)[:6])
+            zinfo.file_size = info.size
+            zinfo.external_attr = 0o644 << 16
+            zinfo.compress_type = zip_compress_type(arcname)
+
+            with storage.open(name) as source, archive.open(zinfo, 'w') as destination:
+                for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b''):
+                    destination.write(chunk)
+                    data = stream.pop()
+                    if data:
+                        yield data
+
+            data = stream.pop()
+            if data:
+                yield data
+
+    # Central directory, written when the archive is closed
+    yield stream.pop()
+
+
+# Build a streaming response sending the given files, (arcname, name) pairs,
+# as a ZIP archive. Files that do not exist are skipped.
+def zip_response(files, filename):
+    storage = get_storage()
+    found = []
+    for arcname, name in files:
+        try:
+            found.append((arcname, name, storage.stat(name)))
+        except FileNotFoundError:
+            pass
+    files = found
+
+    response = StreamingHttpResponse(iter_zip(files), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
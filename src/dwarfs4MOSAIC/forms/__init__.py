@@ -4,6 +4,8 @@ from individual modules in the 'forms' package,
 allowing easy import of these models directly from 'forms'.
 """
 
+from .form_cone_search import ConeSearchForm
+from .form_crossmatch import CrossmatchForm
 from .form_group import GroupAdminForm
 from .form_instrument import InstrumentAdminForm
 from .form_observatory import ObservatoryAdminForm
@@ -13,7 +15,9 @@ from .form_researcher import ResearcherAdminForm
 from .form_target import TargetAdminForm
 from .form_telescope import TelescopeAdminForm
 
-__all__ = ["GroupAdminForm",
+__all__ = ["ConeSearchForm",
+           "CrossmatchForm",
+           "GroupAdminForm",
            "InstrumentAdminForm",
            "ObservatoryAdminForm",
            "ObservingBlockAdminForm",
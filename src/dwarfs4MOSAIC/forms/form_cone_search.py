@@ -0,0 +1,49 @@
+"""
+Form for cone searches over target coordinates.
+Right ascension and declination accept decimal degrees or sexagesimal values.
+"""
+
+# Third-party libraries
+from django import forms
+
+# Local application imports
+from ..constants import COORDINATE_WIDTH
+from ..spatial import parse_declination, parse_right_ascension
+
+# Largest accepted search radius, in arcsec (10 degrees)
+MAX_RADIUS_ARCSEC = 36000
+
+
+class ConeSearchForm(forms.Form):
+
+    ra = forms.CharField(
+        label       = "RA",
+        help_text   = "degrees or HH:MM:SS[.sss]",
+        widget      = forms.TextInput(attrs={'size': COORDINATE_WIDTH}),
+    )
+
+    dec = forms.CharField(
+        label       = "Dec",
+        help_text   = "degrees or ±DD:MM:SS[.sss]",
+        widget      = forms.TextInput(attrs={'size': COORDINATE_WIDTH}),
+    )
+
+    radius = forms.FloatField(
+        label       = "Radius",
+        help_text   = "arcsec",
+        min_value   = 0,
+        max_value   = MAX_RADIUS_ARCSEC,
+    )
+
+    # Convert coordinates to degrees
+    def clean_ra(self):
+        try:
+            return parse_right_ascension(self.cleaned_data['ra'])
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+
+    def clean_dec(self):
+        try:
+            return parse_declination(self.cleaned_data['dec'])
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
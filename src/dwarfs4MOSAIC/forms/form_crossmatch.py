@@ -0,0 +1,28 @@
+"""
+Form to crossmatch a list of positions (CSV or VOTable) against the targets.
+"""
+
+# Third-party libraries
+from django import forms
+
+# Local application imports
+from .widgets.custom_widgets import SingleFileField
+
+# Default and largest accepted match tolerance, in arcsec
+DEFAULT_TOLERANCE_ARCSEC = 5
+MAX_TOLERANCE_ARCSEC = 3600
+
+
+class CrossmatchForm(forms.Form):
+
+    positions_file = SingleFileField(
+        label       = "Positions file:",
+        help_text   = "CSV with 'ra' and 'dec' columns (and optionally 'name'), or VOTable",
+    )
+
+    tolerance = forms.FloatField(
+        label       = "Tolerance (arcsec):",
+        initial     = DEFAULT_TOLERANCE_ARCSEC,
+        min_value   = 0,
+        max_value   = MAX_TOLERANCE_ARCSEC,
+    )
@@ -3,13 +3,11 @@ Admin form for targets, supports uploading images and multiple data files
 with options to delete current image and display current files.
 """
 
-# Standard libraries
-import os
-
 # Third-party libraries
 from django import forms
 from django.conf import settings
 from django.contrib.admin.widgets import FilteredSelectMultiple
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 # Local application imports
@@ -23,7 +21,7 @@ from ..constants import (
     URL_WIDTH,
 )
 from ..models import Tbl_target
-from .widgets.custom_widgets import SingleFileField, MultipleFileField
+from .widgets.custom_widgets import ChunkedUploadWidget, SingleFileField, MultipleFileField
 
 
 class TargetAdminForm(forms.ModelForm):
@@ -38,6 +36,14 @@ class TargetAdminForm(forms.ModelForm):
         label       = "Data files",
     )
 
+    # Resumable uploads of large data files, sent by the browser outside the form
+    upload_large_datafiles = forms.Field(
+        required    = False,
+        label       = "Large data files",
+        help_text   = "Uploaded in resumable chunks as soon as selected, without saving the form.",
+        widget      = ChunkedUploadWidget(),
+    )
+
     delete_image = forms.BooleanField(required=False, label="Delete image")
 
     # Field for selecting data files to delete
@@ -94,17 +100,12 @@ class TargetAdminForm(forms.ModelForm):
             else:
                 self.fields['upload_image'].help_text = None
 
-            # List available data files if datafiles_path exists
-            if self.instance.datafiles_path:
-                files = []
-                try:
-                    files_path = os.path.join(settings.MEDIA_ROOT, self.instance.datafiles_path)
-                    if os.path.exists(files_path):
-                        files = sorted(os.listdir(files_path))
-                except Exception as e:
-                    files = [f"(Failed to access: {e})"]
-
-                if files:
-                    self.fields['datafiles'].choices = [(f, f) for f in files]
-                else:
-                    self.fields['datafiles'].choices = []
+            # Uploads endpoint of the chunked upload widget
+            self.fields['upload_large_datafiles'].widget.attrs.update({
+                'data_url': reverse('admin:tbl_target_uploads', args=[self.instance.pk]),
+                'data_chunk_size': settings.UPLOAD_CHUNK_SIZE,
+            })
+
+            # List available data files from the datafile manifest
+            files = self.instance.manifest_files.values_list('name', flat=True)
+            self.fields['datafiles'].choices = [(f, f) for f in files]
@@ -37,3 +37,15 @@ class MultipleFileField(forms.FileField):
         else:
             result = [single_file_clean(data, initial)]
         return result
+
+# Widget uploading large data files in resumable chunks from the browser
+# (static/js/chunked_upload.js); the files never go through the form submission.
+# 'data-url' (uploads endpoint) and 'data-chunk-size' are set by the form.
+class ChunkedUploadWidget(forms.Widget):
+    template_name = 'dwarfs4MOSAIC/custom_widgets/chunked_upload.html'
+
+    class Media:
+        js = ('js/chunked_upload.js',)
+
+    def value_from_datadict(self, data, files, name):
+        return None
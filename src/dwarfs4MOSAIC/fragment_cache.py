@@ -0,0 +1,89 @@
+"""
+Versioned cache of rendered page fragments (e.g. the home targets table).
+
+A fragment only depends on the data and on what the user may see, so it is
+cached under a key made of:
+- the user's visibility class: 'all' for superusers and core team members,
+  otherwise a hash of the collaborator's groups and denied blocks;
+- a global data version, bumped by the signal handlers in signals.py when
+  targets, observing blocks, observing runs, instruments or data files change.
+Bumping the version makes every cached fragment unreachable at once; old
+entries simply expire. Fragments are stored in the 'pages' cache, shared by
+all workers.
+"""
+
+# Standard libraries
+import hashlib
+import time
+
+# Third-party libraries
+from django.core.cache import caches
+from django.db import transaction
+
+# Local application imports
+from .models import Tbl_researcher
+from .visibility import sees_everything
+
+# Cache alias of the fragments (see CACHES in settings.py)
+FRAGMENT_CACHE = 'pages'
+
+# Cache key of the global data version
+DATA_VERSION_KEY = 'fragments:data_version'
+
+# Lifetime of cached fragments, in seconds
+FRAGMENT_TIMEOUT = 60 * 60
+
+
+# Current data version (initialised from the clock if missing, so a
+# version evicted from the cache is never reused)
+def data_version():
+    cache = caches[FRAGMENT_CACHE]
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+# Invalidate every cached fragment
+def bump_data_version():
+    cache = caches[FRAGMENT_CACHE]
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.set(DATA_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+# Bump the data version once the current transaction is committed, so no
+# request can cache data read before the commit under the new version
+def bump_data_version_on_commit():
+    transaction.on_commit(bump_data_version)
+
+
+# Key identifying the set of targets and blocks a user may see
+def visibility_class(user):
+    if sees_everything(user):
+        return 'all'
+
+    group_ids = sorted(user.groups.values_list('pk', flat=True))
+    denied_ids = sorted(
+        Tbl_researcher.denied_blocks.through.objects
+        .filter(tbl_researcher__user=user)
+        .values_list('tbl_observing_block_id', flat=True)
+    )
+    digest = hashlib.sha1(f"{group_ids}|{denied_ids}".encode()).hexdigest()
+    return f"collaborator:{digest}"
+
+
+# Return the fragment 'name' for this user, building it with build() on a cache miss.
+# 'variant' distinguishes fragments of the same page (e.g. the chunk of rows).
+def cached_fragment(name, user, variant, build):
+    cache = caches[FRAGMENT_CACHE]
+    variant_hash = hashlib.sha1(repr(variant).encode()).hexdigest()
+    key = f"fragments:{name}:{visibility_class(user)}:{data_version()}:{variant_hash}"
+
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = build()
+        cache.set(key, fragment, FRAGMENT_TIMEOUT)
+    return fragment
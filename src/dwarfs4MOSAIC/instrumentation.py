@@ -0,0 +1,223 @@
+"""
+Per-view instrumentation: SQL queries, template rendering and filesystem calls.
+
+InstrumentationMiddleware (see dwarfs4MOSAIC_website/middleware.py) measures
+each request with a RequestStats, then adds it to the totals of its view (once
+the response is closed for streaming responses, so the queries and storage
+calls made while the content is sent are counted):
+- SQL queries and their time, through a database execute wrapper;
+- template rendering time, by timing the Django template backend;
+- media storage calls (listdir, stat, exists, ...: filesystem calls with local
+  storage, requests with an object store), through the InstrumentedStorage
+  returned by get_storage() (see storage.py).
+Nothing is measured unless INSTRUMENTATION_ENABLED is True (off by default
+outside DEBUG).
+
+The totals are kept per process and exposed in the Prometheus text format by
+metrics_text() (the /metrics/ page). QUERY_BUDGETS declares the largest number
+of queries allowed per view; with QUERY_BUDGET_RAISE (set by the 'benchmark'
+command) going over budget raises QueryBudgetExceeded instead of logging a
+warning.
+"""
+
+# Standard libraries
+import functools
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+# Third-party libraries
+from django.conf import settings
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+# Statistics of the request being measured in this thread/task (None outside requests)
+current_stats = ContextVar('current_stats', default=None)
+
+# Totals per view: {view name: {counter: value}}
+_totals = {}
+_totals_lock = threading.Lock()
+_installed = False
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.fs_calls = 0
+        self.fs_seconds = 0.0
+        self.fs_depth = 0
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    # Database execute wrapper counting the queries of the request
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    def server_timing(self):
+        """
+        Returns the value of the Server-Timing header.
+        """
+        return ", ".join([
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f};desc="Templates"',
+            f'fs;dur={self.fs_seconds * 1000:.1f};desc="{self.fs_calls} storage calls"',
+            f'total;dur={self.total_seconds * 1000:.1f}',
+        ])
+
+
+# INSTALLATION
+# ------------
+
+# Count the calls of a media storage method made during a measured request
+def _count_fs_calls(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stats = current_stats.get()
+        if stats is None or stats.fs_depth:
+            # Not measured, or called by another counted call
+            return function(*args, **kwargs)
+        stats.fs_depth += 1
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.fs_depth -= 1
+            stats.fs_calls += 1
+            stats.fs_seconds += time.perf_counter() - start
+    return wrapper
+
+
+# Media storage whose method calls are counted (see get_storage())
+class InstrumentedStorage:
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __getattr__(self, name):
+        attribute = getattr(self._storage, name)
+        if callable(attribute):
+            attribute = _count_fs_calls(attribute)
+            setattr(self, name, attribute)  # wrapped once
+        return attribute
+
+
+# Time the rendering of templates (nested renders are counted once)
+def _time_template_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = current_stats.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_seconds += time.perf_counter() - start
+    return wrapper
+
+
+# Wrap the template backend (once per process)
+def install():
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    Template.render = _time_template_render(Template.render)
+
+
+# TOTALS
+# ------
+
+# Add the statistics of one request to the totals of its view
+def record(view_name, stats, status_code):
+    duration = stats.total_seconds
+    with _totals_lock:
+        totals = _totals.setdefault(view_name, {
+            'requests': 0,
+            'errors': 0,
+            'queries': 0,
+            'sql_seconds': 0.0,
+            'template_seconds': 0.0,
+            'fs_calls': 0,
+            'fs_seconds': 0.0,
+            'seconds': 0.0,
+        })
+        totals['requests'] += 1
+        totals['errors'] += status_code >= 500
+        totals['queries'] += stats.queries
+        totals['sql_seconds'] += stats.sql_seconds
+        totals['template_seconds'] += stats.template_seconds
+        totals['fs_calls'] += stats.fs_calls
+        totals['fs_seconds'] += stats.fs_seconds
+        totals['seconds'] += duration
+
+
+# Copy of the totals per view
+def view_totals():
+    with _totals_lock:
+        return {view: dict(totals) for view, totals in _totals.items()}
+
+
+def reset():
+    with _totals_lock:
+        _totals.clear()
+
+
+# Check the number of queries of a view against QUERY_BUDGETS
+def check_budget(view_name, stats):
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+    if budget is None or stats.queries <= budget:
+        return
+
+    message = f"View '{view_name}' ran {stats.queries} queries (budget: {budget})."
+    if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+# Totals in the Prometheus text exposition format (counters of this process)
+def metrics_text():
+    metrics = (
+        ('requests', 'requests_total', "Requests handled."),
+        ('errors', 'errors_total', "Requests answered with a server error."),
+        ('queries', 'sql_queries_total', "SQL queries run."),
+        ('sql_seconds', 'sql_seconds_total', "Time spent in SQL queries."),
+        ('template_seconds', 'template_seconds_total', "Time spent rendering templates."),
+        ('fs_calls', 'fs_calls_total', "Media storage calls (listdir, stat, exists, ...)."),
+        ('fs_seconds', 'fs_seconds_total', "Time spent in media storage calls."),
+        ('seconds', 'seconds_total', "Time spent handling requests."),
+    )
+
+    totals = view_totals()
+    pid = os.getpid()
+    lines = []
+    for key, name, description in metrics:
+        name = f"dwarfs4mosaic_view_{name}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for view, counters in sorted(totals.items()):
+            lines.append(f'{name}{{view="{view}",pid="{pid}"}} {counters[key]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,213 @@
+"""
+Background jobs queued in the database (Tbl_job).
+
+Long running work, such as large CSV imports, is queued with enqueue() and
+executed by the 'run_jobs' management command, so no external broker is
+needed. Handlers process their input in batches and commit the progress
+(Tbl_job.processed) together with each batch: a failed or interrupted job can
+be queued again and resumes after the last committed batch.
+
+Handlers are registered by kind with the @register decorator.
+Besides CSV imports, the 'purge_trash' job removes the folders of deleted
+targets moved to the trash (see media_folders.py) and the 'build_thumbnails'
+job generates missing target thumbnails (see thumbnails.py).
+"""
+
+# Standard libraries
+import csv
+import os
+import uuid
+from itertools import islice
+
+# Third-party libraries
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# Local application imports
+from .blob_store import content_addressed, release_blobs
+from .fragment_cache import bump_data_version
+from .models import Tbl_job
+from .storage import get_storage
+from .thumbnails import refresh_thumbnails
+
+# Number of CSV rows imported per batch (one transaction each)
+IMPORT_BATCH_SIZE = 5000
+
+# Largest number of item errors stored on a job
+MAX_JOB_ERRORS = 1000
+
+# Registered handlers: {kind: function(job)}
+JOB_HANDLERS = {}
+
+
+# Decorator registering the handler of one job kind
+def register(kind):
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+# QUEUE
+# -----
+
+# Absolute path of a job input file
+def job_file_path(job):
+    return os.path.join(settings.JOBS_ROOT, job.input_file)
+
+
+# Store an uploaded file in JOBS_ROOT and return its relative name
+def save_input_file(uploaded_file):
+    os.makedirs(settings.JOBS_ROOT, exist_ok=True)
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    name = f"{uuid.uuid4().hex}{extension}"
+
+    with open(os.path.join(settings.JOBS_ROOT, name), 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+    return name
+
+
+# Queue a job. 'uploaded_file' (optional) is stored as the job input file.
+def enqueue(kind, description="", params=None, uploaded_file=None, user=None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+
+    return Tbl_job.objects.create(
+        kind=kind,
+        description=description,
+        params=params or {},
+        input_file=save_input_file(uploaded_file) if uploaded_file else "",
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+# Queue failed jobs again; they resume after their last committed batch
+def resume(jobs):
+    return jobs.filter(status='failed').update(status='queued', message="", finished_at=None)
+
+
+# Put jobs left 'running' by a worker that stopped back into the queue
+def requeue_running():
+    return Tbl_job.objects.filter(status='running').update(status='queued')
+
+
+# Claim the oldest queued job for this worker, or return None.
+# The conditional update makes the claim safe with several workers.
+def claim_next():
+    for job in Tbl_job.objects.filter(status='queued').order_by('created_at', 'pk'):
+        claimed = (Tbl_job.objects
+                   .filter(pk=job.pk, status='queued')
+                   .update(status='running', started_at=job.started_at or timezone.now()))
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+# Run one claimed job with its handler and record the outcome
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'.")
+        handler(job)
+    except Exception as e:
+        job.status = 'failed'
+        job.message = f"{type(e).__name__}: {e}"
+    else:
+        job.status = 'done'
+        job.message = ""
+        if job.input_file:
+            # The input is no longer needed once everything is committed
+            path = job_file_path(job)
+            if os.path.exists(path):
+                os.remove(path)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+    return job
+
+
+# Append item errors to a job, keeping at most MAX_JOB_ERRORS
+def add_errors(job, errors):
+    room = MAX_JOB_ERRORS - len(job.errors)
+    if room > 0:
+        job.errors.extend(errors[:room])
+    if len(errors) > room:
+        job.result['errors_not_stored'] = job.result.get('errors_not_stored', 0) + len(errors) - max(room, 0)
+
+
+# HANDLERS
+# --------
+
+# Import a CSV file with a CsvImporter (params['importer'] is its dotted path).
+# Each batch of rows is imported and recorded as processed in one transaction.
+@register('csv_import')
+def import_csv_job(job):
+    importer_class = import_string(job.params['importer'])
+    path = job_file_path(job)
+
+    if job.total is None:
+        with open(path, newline='', encoding='utf-8') as f:
+            job.total = sum(1 for _ in csv.DictReader(f))
+        job.save(update_fields=['total', 'updated_at'])
+
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = islice(csv.DictReader(f), job.processed, None)  # resume after committed rows
+
+        while batch := list(islice(rows, IMPORT_BATCH_SIZE)):
+            importer = importer_class()
+            with transaction.atomic():
+                # Data rows start at line 2 (line 1 is the header)
+                created, updated = importer.run(batch, start=job.processed + 2)
+
+                job.processed += len(batch)
+                job.result['created'] = job.result.get('created', 0) + created
+                job.result['updated'] = job.result.get('updated', 0) + updated
+                add_errors(job, importer.errors)
+                job.save(update_fields=['processed', 'result', 'errors', 'updated_at'])
+
+
+# Remove the folders moved to the trash (params['folders'], tokens returned by
+# the trash_folder() of the media storage), one at a time, then release the
+# blobs they referenced (params['checksums'])
+@register('purge_trash')
+def purge_trash_job(job):
+    folders = job.params.get('folders', [])
+    if job.total is None:
+        job.total = len(folders)
+        job.save(update_fields=['total', 'updated_at'])
+
+    storage = get_storage()
+    for token in folders[job.processed:]:
+        storage.purge(token)
+        job.processed += 1
+        job.save(update_fields=['processed', 'updated_at'])
+
+    if content_addressed() and job.params.get('checksums'):
+        removed, freed = release_blobs(job.params['checksums'])
+        job.result.update({'blobs_removed': removed, 'bytes_freed': freed})
+        job.save(update_fields=['result', 'updated_at'])
+
+
+# Rebuild the missing or outdated thumbnails of the images in params['images']
+# (names in the media storage), one at a time; every thumbnail is rebuilt if
+# params['force'] is set. Cached page fragments are refreshed at the end, so
+# they show the new thumbnails.
+@register('build_thumbnails')
+def build_thumbnails_job(job):
+    images = job.params.get('images', [])
+    if job.total is None:
+        job.total = len(images)
+        job.save(update_fields=['total', 'updated_at'])
+
+    force = job.params.get('force', False)
+    for image in images[job.processed:]:
+        outcome = refresh_thumbnails(image, force=force)
+        job.result[outcome] = job.result.get(outcome, 0) + 1
+        job.processed += 1
+        job.save(update_fields=['processed', 'result', 'updated_at'])
+
+    bump_data_version()
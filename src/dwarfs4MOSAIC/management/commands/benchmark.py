@@ -0,0 +1,311 @@
+"""
+Management command timing the public views and the CSV imports on synthetic
+catalogues of several sizes (see synthetic.py).
+
+The benchmark runs on a separate test database and a temporary MEDIA_ROOT and
+cache folder, so the real data is never touched. Results are written as JSON
+and can be compared with a stored baseline: views slower than the baseline by
+more than the tolerance are reported as regressions.
+
+Instrumentation is enabled with QUERY_BUDGET_RAISE: a view running more
+queries than its QUERY_BUDGETS entry stops the benchmark with an error.
+
+Usage:
+    python manage.py benchmark                                  # 1k, 10k and 100k targets
+    python manage.py benchmark --scales 1000 --repeat 3 --output results.json
+    python manage.py benchmark --baseline benchmarks/baseline.json --fail-on-regression
+    python manage.py benchmark --baseline benchmarks/baseline.json --save-baseline
+"""
+
+# Standard libraries
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+
+# Third-party libraries
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+
+# Local application imports
+from ...admin.admin_observing_block import ObservingBlockCsvImporter
+from ...admin.admin_target import TargetCsvImporter
+from ...instrumentation import QueryBudgetExceeded
+from ...models import Tbl_observing_block, Tbl_target
+from ...synthetic import SYNTHETIC_PREFIX, generate_catalogue, random_position
+
+# Default catalogue sizes (number of targets)
+DEFAULT_SCALES = (1000, 10000, 100000)
+
+
+# Undo the changes of the transaction
+class Rollback(Exception):
+    pass
+
+
+# Time 'run' (a function without arguments) 'repeat' times after one warm-up call.
+# Queries are counted on the warm-up call, with an execute wrapper: the query log
+# of CaptureQueriesContext is reset by the test client at each request.
+def measure(run, repeat, before=None):
+    if before:
+        before()
+    queries = []
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+    with connection.execute_wrapper(count):
+        run()
+
+    durations = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        run()
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'median_ms': round(statistics.median(durations), 2),
+        'min_ms': round(min(durations), 2),
+        'max_ms': round(max(durations), 2),
+        'queries': len(queries),
+        'repeat': repeat,
+    }
+
+
+# GET or POST a page and read the whole response (streamed ZIP archives included)
+def fetch(client, url, data=None):
+    def run():
+        try:
+            response = client.post(url, data) if data is not None else client.get(url)
+        except QueryBudgetExceeded as e:
+            raise CommandError(f"{url}: {e}")
+        if response.status_code != 200:
+            raise CommandError(f"{url}: HTTP {response.status_code}")
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+    return run
+
+
+# Import CSV rows with an importer, then roll the import back
+def import_rows(importer_class, rows):
+    def run():
+        try:
+            with transaction.atomic():
+                importer = importer_class()
+                importer.run(rows)
+                if importer.errors:
+                    raise CommandError(f"{importer_class.__name__}: {importer.errors[0]}")
+                raise Rollback
+        except Rollback:
+            pass
+    return run
+
+
+# CSV rows updating half of the catalogue's targets and creating as many new ones
+def target_rows(scale):
+    rng = random.Random(scale)
+    rows = []
+    for i in range(scale):
+        name = f"{SYNTHETIC_PREFIX}Target {i:07d}" if i % 2 else f"{SYNTHETIC_PREFIX}Imported {i:07d}"
+        right_ascension, declination = random_position(rng)
+        rows.append({
+            'name': name,
+            'type': 'galaxy',
+            'right_ascension': right_ascension,
+            'declination': declination,
+            'magnitude': '18.5',
+            'semester': '2025A',
+        })
+    return rows
+
+
+# CSV rows of new observing blocks, each with a few existing targets
+def block_rows(count, target_names, group_names, run_name):
+    return [
+        {
+            'name': f"{SYNTHETIC_PREFIX}Imported block {i}",
+            'obs_run': run_name,
+            'start_time': '2025-03-01 21:00:00',
+            'observation_mode': 'photometry',
+            'target': ", ".join(target_names[(i * 5) % len(target_names):][:5]),
+            'allowed_groups': ", ".join(group_names[:1]),
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the public views and CSV imports on synthetic catalogues."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default=",".join(str(scale) for scale in DEFAULT_SCALES),
+            help="Comma separated numbers of targets (default: 1000,10000,100000).",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per view (default: 5).")
+        parser.add_argument("--import-repeat", type=int, default=1, help="Timed runs per CSV import (default: 1).")
+        parser.add_argument("--files-per-target", type=int, default=2, help="Data files per target (default: 2).")
+        parser.add_argument("--output", default="benchmark_results.json", help="Results file (JSON).")
+        parser.add_argument("--baseline", help="Baseline results file (JSON) to compare with.")
+        parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Slowdown over the baseline reported as a regression (default: 0.25 = 25%%).",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit with an error on regressions.")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError("--scales must be a comma separated list of integers.")
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requires --baseline.")
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_settings = {
+                alias: {**config, 'LOCATION': os.path.join(tmp, 'cache', alias)}
+                if config['BACKEND'].endswith('FileBasedCache') else config
+                for alias, config in settings.CACHES.items()
+            }
+            # SQLite test databases are in memory by default: use a file, as in production
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'benchmark.sqlite3')
+
+            with override_settings(MEDIA_ROOT=os.path.join(tmp, 'media'), MEDIA_STORAGE='local', CACHES=cache_settings,
+                                   ALLOWED_HOSTS=['testserver'], INSTRUMENTATION_ENABLED=True, QUERY_BUDGET_RAISE=True):
+                old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+                try:
+                    for scale in scales:
+                        results += self.run_scale(scale, options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+
+        report = {
+            'environment': {
+                'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'machine': platform.machine(),
+                'repeat': options["repeat"],
+            },
+            'results': results,
+        }
+        with open(options["output"], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+
+        if options["baseline"]:
+            if options["save_baseline"]:
+                with open(options["baseline"], 'w') as f:
+                    json.dump(report, f, indent=2)
+                self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}."))
+            else:
+                regressions = self.compare(results, options["baseline"], options["tolerance"])
+                if regressions and options["fail_on_regression"]:
+                    raise CommandError(f"{regressions} benchmark(s) slower than the baseline.")
+
+    # Generate a catalogue of 'scale' targets and time every benchmark on it
+    def run_scale(self, scale, options):
+        call_command('flush', interactive=False, verbosity=0)
+        start = time.perf_counter()
+        generate_catalogue(scale, files_per_target=options["files_per_target"])
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{scale} targets (generated in {time.perf_counter() - start:.1f} s)"))
+
+        superuser = User.objects.create_superuser('benchmark', 'benchmark@example.org', 'benchmark')
+        admin_client = Client()
+        admin_client.force_login(superuser)
+
+        collaborator = User.objects.filter(
+            researcher__role='collaborator', username__startswith=SYNTHETIC_PREFIX).first()
+        collaborator_client = Client()
+        collaborator_client.force_login(collaborator)
+
+        target = Tbl_target.objects.filter(name__startswith=SYNTHETIC_PREFIX).order_by('pk').first()
+        filenames = list(target.manifest_files.values_list('name', flat=True))
+        clear_pages = caches['pages'].clear
+        target_names = list(Tbl_target.objects.order_by('pk').values_list('name', flat=True)[:1000])
+        block = Tbl_observing_block.objects.select_related('obs_run').first()
+        group_names = list(block.allowed_groups.values_list('name', flat=True))
+        block_count = max(1, scale // 25)
+
+        benchmarks = [
+            ('home_view', fetch(admin_client, reverse('home')), clear_pages, options["repeat"]),
+            ('home_view (cached)', fetch(admin_client, reverse('home')), None, options["repeat"]),
+            ('home_view (collaborator)', fetch(collaborator_client, reverse('home')), clear_pages, options["repeat"]),
+            ('targets_view', fetch(admin_client, reverse('targets')), None, options["repeat"]),
+            ('observing_blocks_view', fetch(admin_client, reverse('observing_blocks')), None, options["repeat"]),
+            ('observing_blocks_view (collaborator)',
+             fetch(collaborator_client, reverse('observing_blocks')), None, options["repeat"]),
+            ('groups_view', fetch(admin_client, reverse('groups')), None, options["repeat"]),
+            ('download_files_view',
+             fetch(admin_client, reverse('download_files_view', args=[target.pk])), None, options["repeat"]),
+            ('download_files_view (zip)',
+             fetch(admin_client, reverse('download_files_view', args=[target.pk]),
+                   {'checkbox_single[]': filenames}), None, options["repeat"]),
+            (f'csv_import targets ({scale} rows)',
+             import_rows(TargetCsvImporter, target_rows(scale)), None, options["import_repeat"]),
+            (f'csv_import observing blocks ({block_count} rows)',
+             import_rows(ObservingBlockCsvImporter,
+                         block_rows(block_count, target_names, group_names, block.obs_run.name)),
+             None, options["import_repeat"]),
+        ]
+
+        results = []
+        for name, run, before, repeat in benchmarks:
+            result = {'name': name, 'scale': scale, **measure(run, repeat, before)}
+            results.append(result)
+            self.stdout.write(
+                f"  {name:<45} {result['median_ms']:>10.1f} ms  "
+                f"(min {result['min_ms']:.1f}, {result['queries']} queries)")
+        return results
+
+    # Print the results next to the baseline; returns the number of regressions
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            with open(baseline_path) as f:
+                baseline = {(r['name'], r['scale']): r for r in json.load(f)['results']}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read the baseline '{baseline_path}': {e}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Comparison with {baseline_path}"))
+        regressions = 0
+        for result in results:
+            reference = baseline.get((result['name'], result['scale']))
+            label = f"{result['name']} @ {result['scale']}"
+            if reference is None:
+                self.stdout.write(f"  {label:<55} new")
+                continue
+
+            ratio = result['median_ms'] / reference['median_ms'] if reference['median_ms'] else 1.0
+            line = (f"  {label:<55} {reference['median_ms']:>10.1f} -> {result['median_ms']:>10.1f} ms "
+                    f"({ratio:.2f}x, queries {reference['queries']} -> {result['queries']})")
+            if ratio > 1 + tolerance or result['queries'] > reference['queries']:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            elif ratio < 1 - tolerance:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+        return regressions
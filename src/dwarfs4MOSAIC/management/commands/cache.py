@@ -0,0 +1,57 @@
+"""
+Management command to inspect and clear the caches (see CACHES in settings.py).
+
+'clear' removes the entries of the given aliases only: the folder of the alias
+with the file cache, the keys with the alias's KEY_PREFIX with Redis (see
+cache_backends.RedisCache). Without aliases, every alias is cleared.
+
+Usage:
+    python manage.py cache stats
+    python manage.py cache clear [alias ...]
+    python manage.py cache reset-stats [alias ...]
+"""
+
+# Third-party libraries
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from ...cache_backends import StatsMixin
+
+
+class Command(BaseCommand):
+    help = ("Show the hit/miss counters and size of the caches, or clear them "
+            "(only the entries of the given aliases).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'clear', 'reset-stats'])
+        parser.add_argument('aliases', nargs='*', help="Cache aliases (default: every alias).")
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or list(settings.CACHES)
+        unknown = [alias for alias in aliases if alias not in settings.CACHES]
+        if unknown:
+            raise CommandError(f"Unknown cache alias: {', '.join(unknown)}.")
+
+        for alias in aliases:
+            cache = caches[alias]
+
+            if options['action'] == 'clear':
+                cache.clear()
+                self.stdout.write(self.style.SUCCESS(f"{alias}: cleared."))
+
+            elif options['action'] == 'reset-stats':
+                if isinstance(cache, StatsMixin):
+                    cache.reset_stats()
+                self.stdout.write(self.style.SUCCESS(f"{alias}: counters reset."))
+
+            else:
+                self.stdout.write(f"{alias} ({type(cache).__name__})")
+                if isinstance(cache, StatsMixin):
+                    stats = cache.stats()
+                    lookups = stats['hits'] + stats['misses']
+                    ratio = f"{100 * stats['hits'] / lookups:.1f}%" if lookups else "-"
+                    self.stdout.write(f"  hits: {stats['hits']}  misses: {stats['misses']}  hit ratio: {ratio}")
+                    for name, value in cache.summary().items():
+                        self.stdout.write(f"  {name}: {value}")
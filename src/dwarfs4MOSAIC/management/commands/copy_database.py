@@ -0,0 +1,99 @@
+"""
+Management command copying an existing SQLite database into the configured
+database (e.g. PostgreSQL, see DB_ENGINE in settings.py).
+
+The target database must be migrated first; its current rows are replaced.
+Primary keys are kept, and foreign keys are checked when the copy is committed.
+
+Usage:
+    DJANGO_DB_ENGINE=postgresql python manage.py migrate
+    DJANGO_DB_ENGINE=postgresql python manage.py copy_database db.sqlite3
+"""
+
+# Standard libraries
+import os
+
+# Third-party libraries
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Alias of the source database, added while the command runs
+SOURCE_ALIAS = 'copy_source'
+
+# Rows read and inserted per query
+COPY_BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Copy every table of a SQLite database into the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path of the SQLite database to copy.")
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Target database alias (default: 'default').",
+        )
+
+    def handle(self, *args, **options):
+        source_path = os.path.abspath(options["source"])
+        target = options["database"]
+        if not os.path.isfile(source_path):
+            raise CommandError(f"SQLite database '{source_path}' not found.")
+
+        target_connection = connections[target]
+        if (target_connection.vendor == "sqlite"
+                and os.path.abspath(str(target_connection.settings_dict["NAME"])) == source_path):
+            raise CommandError("The source and target databases are the same.")
+
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            **connections.settings,
+            SOURCE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": source_path},
+        })[SOURCE_ALIAS]
+
+        # Concrete tables, including automatic many-to-many tables
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+        ]
+
+        try:
+            with transaction.atomic(using=target):
+                # Empty the target tables (foreign keys are checked at commit)
+                tables = [model._meta.db_table for model in models]
+                target_connection.ops.execute_sql_flush(
+                    target_connection.ops.sql_flush(no_style(), tables, allow_cascade=True))
+
+                for model in models:
+                    copied = self.copy_table(model, target)
+                    self.stdout.write(f"{model._meta.label}: {copied} rows")
+
+                # Next primary keys follow the copied ones
+                with target_connection.cursor() as cursor:
+                    for sql in target_connection.ops.sequence_reset_sql(no_style(), models):
+                        cursor.execute(sql)
+        finally:
+            connections[SOURCE_ALIAS].close()
+            del connections.settings[SOURCE_ALIAS]
+
+        self.stdout.write(self.style.SUCCESS(f"Copied {len(models)} tables from {source_path}."))
+
+    # Copy the rows of one model in batches
+    def copy_table(self, model, target):
+        rows = model._base_manager.using(SOURCE_ALIAS).order_by("pk").iterator(chunk_size=COPY_BATCH_SIZE)
+        manager = model._base_manager.db_manager(target)
+
+        copied = 0
+        batch = []
+        for obj in rows:
+            batch.append(obj)
+            if len(batch) == COPY_BATCH_SIZE:
+                manager.bulk_create(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            manager.bulk_create(batch)
+            copied += len(batch)
+        return copied
@@ -0,0 +1,87 @@
+"""
+Management command moving the data files into the content-addressed store
+(DATAFILE_STORE = 'content', see blob_store.py) and removing unreferenced blobs.
+
+Each file of the datafile manifest is stored once by SHA-256 and replaced by a
+hardlink in its target's data files folder. Files without a checksum, or whose
+size or modification time no longer match the manifest, are hashed again first,
+so a file changed in place is never replaced by the blob of its old content.
+
+Usage:
+    python manage.py dedupe_datafiles --dry-run    # report the space that would be saved
+    python manage.py dedupe_datafiles
+    python manage.py dedupe_datafiles --gc-only    # only remove unreferenced blobs
+"""
+
+# Standard libraries
+import os
+
+# Third-party libraries
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+# Local application imports
+from ...blob_store import collect_garbage, content_addressed, store_file
+from ...manifest import datafiles_dir, file_checksum
+from ...models import Tbl_datafile
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = "Store the data files once by content (hardlinks) and remove unreferenced blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report the duplicated space.")
+        parser.add_argument("--gc-only", action="store_true", help="Only remove unreferenced blobs.")
+
+    def handle(self, *args, **options):
+        if not content_addressed() and not options["dry_run"]:
+            raise CommandError("Set DATAFILE_STORE = 'content' with MEDIA_STORAGE = 'local' first (or use --dry-run).")
+
+        duplicated = (
+            Tbl_datafile.objects.exclude(checksum="")
+            .values("checksum")
+            .annotate(copies=Count("id"), size=Sum("size"))
+            .filter(copies__gt=1)
+        )
+        saved = sum(group["size"] - group["size"] // group["copies"] for group in duplicated)
+        self.stdout.write(f"Duplicated data in the manifest: {format_size(saved)}.")
+        if options["dry_run"]:
+            return
+
+        if not options["gc_only"]:
+            stored, missing, rehashed = 0, 0, 0
+            entries = Tbl_datafile.objects.select_related("target").order_by("pk")
+            for entry in entries.iterator(chunk_size=1000):
+                path = os.path.join(datafiles_dir(entry.target), entry.name)
+                if not os.path.isfile(path):
+                    missing += 1
+                    continue
+
+                # The file is linked to the blob of its checksum (and dropped if the
+                # blob exists): hash it again if it changed since it was recorded
+                stat = os.stat(path)
+                if not entry.checksum or stat.st_size != entry.size or stat.st_mtime != entry.mtime:
+                    entry.checksum = file_checksum(path)
+                    entry.size = stat.st_size
+                    rehashed += 1
+                store_file(path, entry.checksum)
+
+                # Linked files share the blob's modification time
+                entry.mtime = os.stat(path).st_mtime
+                entry.save(update_fields=["checksum", "size", "mtime"])
+                stored += 1
+
+            self.stdout.write(f"{stored} files stored by content ({rehashed} hashed), {missing} missing on disk "
+                              f"(see 'reconcile_datafiles').")
+
+        removed, freed = collect_garbage()
+        self.stdout.write(self.style.SUCCESS(
+            f"{removed} unreferenced blobs removed ({format_size(freed)} freed)."))
@@ -0,0 +1,119 @@
+"""
+Management command showing the query plans of the most frequent queries.
+
+With --compare, each plan is also shown without the indexes added for these
+queries: they are dropped inside a transaction that is rolled back, so the
+database is left unchanged (SQLite and PostgreSQL have transactional DDL).
+
+Usage:
+    python manage.py explain_queries
+    python manage.py explain_queries --compare
+"""
+
+# Third-party libraries
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+
+# Local application imports
+from ...models import (
+    Tbl_instrument,
+    Tbl_observatory,
+    Tbl_observing_block,
+    Tbl_observing_run,
+    Tbl_researcher,
+    Tbl_target,
+    Tbl_telescope,
+)
+from ...views import home_targets
+
+# Indexes designed for the queries below (see Meta.indexes of the models)
+HOT_QUERY_INDEXES = {
+    Tbl_instrument: ['instrument_lower_name_idx', 'instrument_name_idx'],
+    Tbl_observatory: ['observatory_lower_name_idx', 'observatory_name_idx'],
+    Tbl_telescope: ['telescope_lower_name_idx', 'telescope_name_idx'],
+    Tbl_observing_run: ['run_lower_name_idx', 'run_name_idx'],
+    Tbl_observing_block: ['block_lower_name_idx', 'block_name_idx', 'block_run_start_idx'],
+    Tbl_researcher: ['researcher_lower_name_idx'],
+    Tbl_target: ['target_lower_name_idx', 'target_ra_dec_idx', 'target_home_order_idx'],
+}
+
+
+# Undo the changes of the transaction
+class Rollback(Exception):
+    pass
+
+
+# (description, queryset) of the hot queries
+def hot_queries():
+    return [
+        ("Instruments by name (lists)",
+         Tbl_instrument.objects.order_by(Lower('name'), 'name')),
+        ("Targets by name (lists)",
+         Tbl_target.objects.order_by(Lower('name'), 'name')),
+        ("Observing blocks by name (lists)",
+         Tbl_observing_block.objects.order_by(Lower('name'), 'name')),
+        ("Observatory page",
+         Tbl_observatory.objects.filter(name='x')),
+        ("Telescope page",
+         Tbl_telescope.objects.filter(name='x')),
+        ("Observing run page",
+         Tbl_observing_run.objects.filter(name='x')),
+        ("Blocks of an observing run",
+         Tbl_observing_block.objects.filter(obs_run_id=1).order_by('start_time')),
+        ("Targets page (RA, Dec order)",
+         Tbl_target.objects.order_by('right_ascension_hours', 'declination_deg')),
+        ("Home page, first chunk",
+         home_targets(User(is_superuser=True))[:50]),
+        ("Blocks allowed to a group",
+         Tbl_observing_block.allowed_groups.through.objects.filter(group_id=1)),
+        ("Blocks denied to a researcher",
+         Tbl_researcher.denied_blocks.through.objects.filter(tbl_researcher_id=1)),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Show the query plans of the most frequent queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Also show the plans without the indexes designed for these queries.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["compare"]:
+            for description, plan in self.explain_all():
+                self.write_plan(description, plan)
+            return
+
+        before = None
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for index_names in HOT_QUERY_INDEXES.values():
+                    for name in index_names:
+                        cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+                before = self.explain_all()
+                raise Rollback
+        except Rollback:
+            pass
+
+        # New connection: SQLite would reuse the plans of its cached statements
+        connection.close()
+        after = self.explain_all()
+
+        for (description, plan_before), (_, plan_after) in zip(before, after):
+            self.write_plan(description, plan_before, "without indexes")
+            self.write_plan(description, plan_after, "with indexes")
+
+    # Plans of the hot queries
+    def explain_all(self):
+        return [(description, queryset.explain()) for description, queryset in hot_queries()]
+
+    def write_plan(self, description, plan, label=""):
+        title = f"{description} ({label})" if label else description
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for line in plan.splitlines():
+            self.stdout.write(f"  {line}")
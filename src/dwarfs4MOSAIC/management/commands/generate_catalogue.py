@@ -0,0 +1,60 @@
+"""
+Management command generating a synthetic catalogue (see synthetic.py).
+
+Usage:
+    python manage.py generate_catalogue 10000
+    python manage.py generate_catalogue 10000 --blocks 500 --files-per-target 5
+    python manage.py generate_catalogue 100000 --no-files    # manifest entries only
+    python manage.py generate_catalogue --clear              # remove the synthetic data
+"""
+
+# Third-party libraries
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from ...models import Tbl_target
+from ...synthetic import SYNTHETIC_PREFIX, clear_catalogue, generate_catalogue
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic catalogue of targets, observations, researchers and data files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="?", type=int, help="Number of targets.")
+        for name in ("observatories", "telescopes", "instruments", "runs", "blocks", "groups", "researchers"):
+            parser.add_argument(f"--{name}", type=int, help=f"Number of {name} (default: scaled to the targets).")
+        parser.add_argument("--files-per-target", type=int, default=2, help="Data files per target (default: 2).")
+        parser.add_argument("--no-files", action="store_true", help="Only create the manifest entries, not the files.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+        parser.add_argument("--clear", action="store_true", help="Remove the synthetic data first.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            removed = clear_catalogue()
+            self.stdout.write(self.style.SUCCESS(f"Synthetic catalogue removed ({removed} targets)."))
+
+        targets = options["targets"]
+        if targets is None:
+            if not options["clear"]:
+                raise CommandError("Give the number of targets (or --clear).")
+            return
+
+        if Tbl_target.objects.filter(name__startswith=SYNTHETIC_PREFIX).exists():
+            raise CommandError("A synthetic catalogue already exists: use --clear to replace it.")
+
+        sizes = {
+            name: options[name]
+            for name in ("observatories", "telescopes", "instruments", "runs", "blocks", "groups", "researchers")
+            if options[name] is not None
+        }
+        generate_catalogue(
+            targets,
+            sizes=sizes,
+            files_per_target=options["files_per_target"],
+            write_files=not options["no_files"],
+            seed=options["seed"],
+            progress=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic catalogue generated (users '{SYNTHETIC_PREFIX}userN', password 'synthetic')."
+        ))
@@ -0,0 +1,24 @@
+"""
+Management command to rebuild the precomputed visibility tables.
+
+Usage:
+    python manage.py rebuild_visibility
+"""
+
+# Third-party libraries
+from django.core.management.base import BaseCommand
+
+# Local application imports
+from ...models import Tbl_visible_block, Tbl_visible_target
+from ...visibility import refresh_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the visible blocks and targets of every user."
+
+    def handle(self, *args, **options):
+        refresh_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Visibility rebuilt: {Tbl_visible_block.objects.count()} block rows, "
+            f"{Tbl_visible_target.objects.count()} target rows."
+        ))
@@ -0,0 +1,94 @@
+"""
+Management command to reconcile the datafile manifest with the media storage.
+
+The data files folders are listed in parallel (see scanner.py). The rescan is
+incremental: folders whose modification time has not changed since the last
+run are skipped. Use --full after files were rewritten in place, or to fill in
+checksums left empty by --no-checksum. Targets named with --target are always
+rescanned.
+
+Usage:
+    python manage.py reconcile_datafiles [--target NAME ...] [--no-checksum]
+    python manage.py reconcile_datafiles --full [--workers 16]
+"""
+
+# Standard libraries
+from itertools import islice
+
+# Third-party libraries
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import prefetch_related_objects
+
+# Local application imports
+from ...manifest import reconcile_target
+from ...models import Tbl_target
+from ...scanner import scan_folders
+
+# Targets scanned, then reconciled, at a time
+SCAN_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Synchronize the datafile manifest with the files in the media storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", dest="targets", default=[],
+            help="Only reconcile the target with this name (can be repeated).")
+        parser.add_argument(
+            "--no-checksum", action="store_false", dest="checksum",
+            help="Do not compute SHA-256 checksums of new or changed files.")
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Rescan every folder, even if its modification time is unchanged.")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Threads listing the folders (default: SCAN_WORKERS).")
+
+    def handle(self, *args, **options):
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        targets = Tbl_target.objects.order_by("name")
+        if options["targets"]:
+            targets = targets.filter(name__in=options["targets"])
+        full = options["full"] or bool(options["targets"])
+
+        totals = {"added": 0, "updated": 0, "removed": 0}
+        skipped = 0
+        iterator = targets.iterator(chunk_size=SCAN_BATCH_SIZE)
+        while batch := list(islice(iterator, SCAN_BATCH_SIZE)):
+            with_folder = [target for target in batch if target.datafiles_path]
+            scans = scan_folders(
+                [(target.datafiles_path, None if full else target.datafiles_mtime) for target in with_folder],
+                workers=options["workers"],
+            )
+
+            # Targets without a folder have no files
+            changed = [(target, []) for target in batch if not target.datafiles_path]
+            for target, scan in zip(with_folder, scans):
+                if scan.files is None:
+                    skipped += 1
+                else:
+                    target.datafiles_mtime = scan.mtime
+                    changed.append((target, scan.files))
+
+            prefetch_related_objects([target for target, _ in changed], "manifest_files")
+            for target, files in changed:
+                result = reconcile_target(target, checksum=options["checksum"], files=files)
+                for key, value in result.items():
+                    totals[key] += value
+
+                if any(result.values()):
+                    self.stdout.write(
+                        f"{target.name}: {result['added']} added, "
+                        f"{result['updated']} updated, {result['removed']} removed")
+
+            # Recorded once the manifest is in sync, so an interrupted run scans them again
+            Tbl_target.objects.bulk_update([target for target, _ in changed], ["datafiles_mtime"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Manifest reconciled: {totals['added']} added, "
+            f"{totals['updated']} updated, {totals['removed']} removed "
+            f"({skipped} unchanged folders skipped)."
+        ))
@@ -0,0 +1,60 @@
+"""
+Management command running the background jobs queued in the database.
+
+Usage:
+    python manage.py run_jobs               # keep polling the queue
+    python manage.py run_jobs --once        # run the queued jobs, then exit
+    python manage.py run_jobs --requeue     # first requeue jobs left running by a stopped worker
+"""
+
+# Standard libraries
+import time
+
+# Third-party libraries
+from django.core.management.base import BaseCommand
+
+# Local application imports
+from ...jobs import claim_next, requeue_running, run_job
+
+
+class Command(BaseCommand):
+    help = "Run the queued background jobs (CSV imports, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty instead of waiting for new jobs.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds between checks of an empty queue (default: 5).",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="Queue again the jobs left 'running' by a worker that stopped "
+                 "(only use it when no other worker is running).",
+        )
+
+    def handle(self, *args, **options):
+        if options["requeue"]:
+            count = requeue_running()
+            self.stdout.write(f"{count} interrupted job(s) queued again.")
+
+        while True:
+            job = claim_next()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            self.stdout.write(f"{job}: started")
+            job = run_job(job)
+            if job.status == "done":
+                self.stdout.write(self.style.SUCCESS(f"{job}: done ({job.processed} processed)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{job}: failed ({job.message})"))
@@ -0,0 +1,47 @@
+"""
+Management command to queue the (re)build of the target thumbnails.
+
+One 'build_thumbnails' job is queued for the images of every target (or of
+the targets named with --target); it is executed by 'run_jobs'. Thumbnails
+that are already current are skipped unless --force is given.
+
+Usage:
+    python manage.py thumbnails [--target NAME ...] [--force]
+"""
+
+# Third-party libraries
+from django.core.management.base import BaseCommand
+
+# Local application imports
+from ...jobs import enqueue
+from ...models import Tbl_target
+
+
+class Command(BaseCommand):
+    help = "Queue a job building the missing or outdated target thumbnails."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", dest="targets", default=[],
+            help="Only the image of the target with this name (can be repeated).")
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Rebuild every thumbnail, even if it is current.")
+
+    def handle(self, *args, **options):
+        targets = Tbl_target.objects.order_by("name")
+        if options["targets"]:
+            targets = targets.filter(name__in=options["targets"])
+        images = [target.image for target in targets.iterator() if target.image_name]
+
+        if not images:
+            self.stdout.write("No target image.")
+            return
+
+        job = enqueue(
+            "build_thumbnails",
+            description=f"Build the thumbnails of {len(images)} image(s)",
+            params={"images": images, "force": options["force"]},
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Job {job.pk} queued for {len(images)} image(s); run it with 'run_jobs'."))
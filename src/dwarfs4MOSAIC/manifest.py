@@ -0,0 +1,157 @@
+"""
+Datafile manifest: database record of the files stored in each target's
+data files folder.
+
+The admin upload and delete paths keep the manifest up to date as files are
+written or removed, and reconcile_target() (used by the 'reconcile_datafiles'
+management command) brings it back in sync with what is actually stored.
+Views read file lists from the manifest instead of listing the media storage.
+With DATAFILE_STORE = 'content', recorded files are also moved into the
+content-addressed store and replaced by hardlinks (see blob_store.py).
+"""
+
+# Standard libraries
+import hashlib
+import os
+import posixpath
+
+# Third-party libraries
+from django.conf import settings
+from django.db import transaction
+
+# Local application imports
+from .blob_store import content_addressed, release_blobs, store_file
+from .models import Tbl_datafile
+from .storage import get_storage
+
+# Read size used when computing checksums (1 MiB)
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
+# Absolute path of the target's data files folder on the local filesystem, or
+# None if not set (with an object store, only used to stage chunked uploads)
+def datafiles_dir(target):
+    if not target.datafiles_path:
+        return None
+    return os.path.join(settings.MEDIA_ROOT, target.datafiles_path)
+
+
+# Name of one data file of the target in the media storage
+def datafile_name(target, name):
+    return posixpath.join(target.datafiles_path, name)
+
+
+# Compute the SHA-256 checksum of a binary file object, reading it in chunks
+def _checksum(f):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Compute the SHA-256 checksum of a local file
+def file_checksum(path):
+    with open(path, 'rb') as f:
+        return _checksum(f)
+
+
+# Compute the SHA-256 checksum of a file of the media storage
+def stored_checksum(name):
+    with get_storage().open(name) as f:
+        return _checksum(f)
+
+
+# Write an uploaded file into the target's data files folder and record it.
+# The checksum is computed while the chunks are written, so the file is read
+# only once. An existing file is replaced (see storage.LocalStorage.write).
+def save_uploaded_file(target, uploaded_file):
+    _, checksum = get_storage().write(datafile_name(target, uploaded_file.name), uploaded_file.chunks())
+    return record_file(target, uploaded_file.name, checksum=checksum)
+
+
+# Create or update the manifest entry of one file from its current stat data.
+# If no checksum is given, it is computed from the stored file.
+def record_file(target, name, checksum=None):
+    storage = get_storage()
+    stored_name = datafile_name(target, name)
+
+    if checksum is None:
+        checksum = stored_checksum(stored_name)
+    if content_addressed():
+        store_file(storage.path(stored_name), checksum)
+    stat = storage.stat(stored_name)
+
+    previous = Tbl_datafile.objects.filter(target=target, name=name).values_list("checksum", flat=True).first()
+    entry, _ = Tbl_datafile.objects.update_or_create(
+        target=target,
+        name=name,
+        defaults={
+            "size": stat.size,
+            "mtime": stat.mtime,
+            "checksum": checksum,
+        },
+    )
+
+    # The blob of a replaced file may not be referenced any more
+    if previous and previous != checksum:
+        transaction.on_commit(lambda: release_blobs([previous]))
+    return entry
+
+
+# Remove the manifest entry of one file
+def forget_file(target, name):
+    Tbl_datafile.objects.filter(target=target, name=name).delete()
+
+
+# Bring the manifest of one target in sync with its data files folder.
+# - New files, and files whose size or mtime changed, are (re)recorded.
+# - Entries for files no longer on disk are removed.
+# - With 'checksum' False, checksums of new or changed files are left empty.
+# 'files' is the storage.FileInfo list of the folder if already listed (see
+# scanner.py). The recorded entries are read from target.manifest_files, which
+# callers may prefetch.
+# Returns a dict with the number of added, updated and removed entries.
+def reconcile_target(target, checksum=True, files=None):
+    result = {"added": 0, "updated": 0, "removed": 0}
+    storage = get_storage()
+
+    if files is None and target.datafiles_path:
+        files = storage.listdir(target.datafiles_path)
+    on_disk = {info.name: info for info in files or []}
+
+    recorded = {entry.name: entry for entry in target.manifest_files.all()}
+
+    with transaction.atomic():
+        for name, stat in on_disk.items():
+            entry = recorded.get(name)
+            unchanged = (entry is not None
+                         and entry.size == stat.size
+                         and entry.mtime == stat.mtime)
+            if unchanged and (entry.checksum or not checksum):
+                continue
+
+            if entry is None:
+                entry = Tbl_datafile(target=target, name=name)
+                result["added"] += 1
+            else:
+                result["updated"] += 1
+
+            stored_name = datafile_name(target, name)
+            previous = entry.checksum
+            entry.checksum = stored_checksum(stored_name) if checksum else ""
+            if entry.checksum and content_addressed():
+                store_file(storage.path(stored_name), entry.checksum)
+                stat = storage.stat(stored_name)
+            entry.size = stat.size
+            entry.mtime = stat.mtime
+            entry.save()
+
+            if previous and previous != entry.checksum:
+                transaction.on_commit(lambda previous=previous: release_blobs([previous]))
+
+        missing = [name for name in recorded if name not in on_disk]
+        if missing:
+            Tbl_datafile.objects.filter(target=target, name__in=missing).delete()
+            result["removed"] = len(missing)
+
+    return result
@@ -0,0 +1,124 @@
+"""
+Target media folders (<sanitized target name> in the media storage): removal
+and relocation.
+
+Deleting targets does not remove their folders inside the request. Once the
+deletion is committed, each folder is moved to the trash of the media storage
+(see storage.py: renamed into TRASH_ROOT, atomic and instant, with local
+storage) and a single 'purge_trash' background job (see jobs.py, run by
+'run_jobs') removes them, then releases the blobs of the content-addressed
+store they referenced. Trashed folders are no longer downloadable: media_view
+never serves the hidden folders of the media storage.
+
+Renaming a target moves its folder to the new sanitized name once the rename
+is committed (see Tbl_target.save()). Its image and data files paths are only
+rewritten after the move succeeded: if it fails, or a folder of the new name
+appeared meanwhile, the target keeps its files in the old folder and the
+error is logged.
+"""
+
+# Standard libraries
+import logging
+import posixpath
+
+# Third-party libraries
+from django.db import transaction
+
+# Local application imports
+from .blob_store import content_addressed
+from .fragment_cache import bump_data_version
+from .jobs import enqueue
+from .models import Tbl_datafile, Tbl_target
+from .storage import get_storage
+from .utils import sanitize_filename
+
+logger = logging.getLogger(__name__)
+
+
+# Name of a target's media folder, or None for a name that does not give a
+# folder at the top of the media storage
+def target_folder(name):
+    folder = sanitize_filename(name)
+    if not folder or folder.startswith('.') or posixpath.basename(folder) != folder:
+        return None
+    return folder
+
+
+# Once the current transaction is committed, move the media folders of these
+# target names to the trash and queue their removal. 'checksums' are the blobs
+# their data files referenced (content-addressed store), released after removal.
+def schedule_folder_removal(names, checksums=()):
+    folders = [target_folder(name) for name in names]
+    checksums = sorted(set(checksums))
+
+    def remove():
+        storage = get_storage()
+        trashed = [token for token in (storage.trash_folder(folder) for folder in folders if folder) if token]
+        if trashed or checksums:
+            enqueue(
+                'purge_trash',
+                description=f"Remove {len(trashed)} deleted target folder(s)",
+                params={'folders': trashed, 'checksums': checksums},
+            )
+    transaction.on_commit(remove)
+
+
+# Blob checksums referenced by the data files of these targets (queryset)
+def referenced_checksums(targets):
+    if not content_addressed():
+        return []
+    return list(
+        Tbl_datafile.objects.filter(target__in=targets).exclude(checksum="")
+        .values_list('checksum', flat=True).distinct()
+    )
+
+
+# Delete targets (queryset) with one database delete; their folders are removed
+# in the background. Returns the number of targets deleted.
+def delete_targets(targets):
+    with transaction.atomic():
+        names = list(targets.values_list('name', flat=True))
+        checksums = referenced_checksums(targets)
+        targets.delete()
+        schedule_folder_removal(names, checksums)
+    return len(names)
+
+
+# Once the current transaction is committed, move the media folder of a
+# renamed target to the folder of its name and rewrite its image and data files
+# paths (paths outside the folder are kept). The folder and the name are read
+# at that time, so a folder left behind by an earlier failed move is moved
+# too. Nothing is rewritten if the folder cannot be moved.
+def schedule_folder_move(target):
+    def move():
+        targets = Tbl_target.objects.filter(pk=target.pk)
+        row = targets.values_list('name', 'image', 'datafiles_path').first()
+        if row is None:
+            return
+        name, image, datafiles_path = row
+        old_folder = (datafiles_path or image or "").split('/')[0]
+        new_folder = target_folder(name)
+        if not old_folder or not new_folder or old_folder == new_folder:
+            return
+
+        storage = get_storage()
+        if storage.folder_exists(new_folder):
+            logger.error("Media folder '%s' of target %s not moved: '%s' already exists.",
+                         old_folder, target.pk, new_folder)
+            return
+        try:
+            storage.move_folder(old_folder, new_folder)
+        except Exception:
+            logger.exception("Media folder '%s' of target %s could not be moved to '%s'.",
+                             old_folder, target.pk, new_folder)
+            return
+
+        def moved(path):
+            if path == old_folder or (path or "").startswith(old_folder + '/'):
+                return new_folder + path[len(old_folder):]
+            return path
+
+        target.image, target.datafiles_path = moved(image), moved(datafiles_path)
+        targets.update(image=target.image, datafiles_path=target.datafiles_path)
+        bump_data_version()
+    transaction.on_commit(move)
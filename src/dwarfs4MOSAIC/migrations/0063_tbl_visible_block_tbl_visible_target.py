@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Populate the visibility tables for existing collaborators
+def populate_visibility(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Tbl_observing_block = apps.get_model('dwarfs4MOSAIC', 'Tbl_observing_block')
+    Tbl_visible_block = apps.get_model('dwarfs4MOSAIC', 'Tbl_visible_block')
+    Tbl_visible_target = apps.get_model('dwarfs4MOSAIC', 'Tbl_visible_target')
+
+    users = (
+        User.objects
+        .filter(is_superuser=False)
+        .exclude(researcher__role='core_team')
+    )
+    for user in users:
+        allowed = Tbl_observing_block.objects.filter(allowed_groups__user=user).distinct()
+        denied = Tbl_observing_block.objects.filter(denied_researchers__user=user)
+
+        Tbl_visible_block.objects.bulk_create([
+            Tbl_visible_block(user=user, observing_block=block)
+            for block in allowed.exclude(pk__in=denied)
+        ])
+
+        target_ids = (
+            set(allowed.values_list('target', flat=True))
+            - set(denied.values_list('target', flat=True))
+        )
+        Tbl_visible_target.objects.bulk_create([
+            Tbl_visible_target(user=user, target_id=target_id)
+            for target_id in target_ids if target_id is not None
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dwarfs4MOSAIC', '0062_tbl_target_declination_deg_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tbl_visible_block',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('observing_block', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_to', to='dwarfs4MOSAIC.tbl_observing_block', verbose_name='Observing Block')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_blocks', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Visible Block',
+                'verbose_name_plural': 'Visible Blocks',
+                'constraints': [models.UniqueConstraint(fields=('user', 'observing_block'), name='unique_visible_block_per_user')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Tbl_visible_target',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_to', to='dwarfs4MOSAIC.tbl_target', verbose_name='Target')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_targets', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Visible Target',
+                'verbose_name_plural': 'Visible Targets',
+                'constraints': [models.UniqueConstraint(fields=('user', 'target'), name='unique_visible_target_per_user')],
+            },
+        ),
+        migrations.RunPython(populate_visibility, migrations.RunPython.noop),
+    ]
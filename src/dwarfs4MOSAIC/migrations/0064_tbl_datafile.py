@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:48
+
+import os
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Record the files already stored on disk.
+# Checksums are left empty: run 'manage.py reconcile_datafiles' to compute them.
+def populate_manifest(apps, schema_editor):
+    Tbl_target = apps.get_model('dwarfs4MOSAIC', 'Tbl_target')
+    Tbl_datafile = apps.get_model('dwarfs4MOSAIC', 'Tbl_datafile')
+
+    entries = []
+    for target in Tbl_target.objects.exclude(datafiles_path__isnull=True).exclude(datafiles_path=''):
+        directory = os.path.join(settings.MEDIA_ROOT, target.datafiles_path)
+        if not os.path.isdir(directory):
+            continue
+
+        with os.scandir(directory) as files:
+            for entry in files:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    entries.append(Tbl_datafile(
+                        target=target, name=entry.name, size=stat.st_size, mtime=stat.st_mtime))
+
+    Tbl_datafile.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dwarfs4MOSAIC', '0063_tbl_visible_block_tbl_visible_target'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tbl_datafile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Name')),
+                ('size', models.BigIntegerField(default=0, help_text='bytes', verbose_name='Size')),
+                ('mtime', models.FloatField(default=0, verbose_name='Modification time')),
+                ('checksum', models.CharField(blank=True, default='', max_length=64, verbose_name='SHA-256 checksum')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manifest_files', to='dwarfs4MOSAIC.tbl_target', verbose_name='Target')),
+            ],
+            options={
+                'verbose_name': 'Data File',
+                'verbose_name_plural': 'Data Files',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('target', 'name'), name='unique_datafile_per_target')],
+            },
+        ),
+        migrations.RunPython(populate_manifest, migrations.RunPython.noop),
+    ]
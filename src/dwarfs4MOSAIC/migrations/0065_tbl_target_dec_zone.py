@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:52
+
+import math
+
+from django.db import migrations, models
+
+
+# Compute the declination zone of existing targets (zone height: 0.5 degrees)
+def populate_dec_zone(apps, schema_editor):
+    Tbl_target = apps.get_model('dwarfs4MOSAIC', 'Tbl_target')
+
+    targets = list(Tbl_target.objects.exclude(declination_deg__isnull=True))
+    for target in targets:
+        target.dec_zone = min(int(math.floor((target.declination_deg + 90.0) / 0.5)), 359)
+    Tbl_target.objects.bulk_update(targets, ['dec_zone'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dwarfs4MOSAIC', '0064_tbl_datafile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tbl_target',
+            name='dec_zone',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_target',
+            index=models.Index(fields=['dec_zone', 'right_ascension_hours'], name='target_zone_ra_idx'),
+        ),
+        migrations.RunPython(populate_dec_zone, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('dwarfs4MOSAIC', '0066_tbl_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tbl_instrument',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='instrument_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_instrument',
+            index=models.Index(fields=['name'], name='instrument_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observatory',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='observatory_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observatory',
+            index=models.Index(fields=['name'], name='observatory_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observing_block',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='block_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observing_block',
+            index=models.Index(fields=['name'], name='block_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observing_block',
+            index=models.Index(fields=['obs_run', 'start_time'], name='block_run_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observing_run',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='run_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_observing_run',
+            index=models.Index(fields=['name'], name='run_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_researcher',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='researcher_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_target',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='target_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_target',
+            index=models.Index(fields=['right_ascension_hours', 'declination_deg'], name='target_ra_dec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_target',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('right_ascension_hours', django.db.models.expressions.RawSQL('-1.0', (), output_field=models.FloatField())), django.db.models.functions.comparison.Coalesce('declination_deg', django.db.models.expressions.RawSQL('-91.0', (), output_field=models.FloatField())), models.F('id'), name='target_home_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_telescope',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('name'), name='telescope_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tbl_telescope',
+            index=models.Index(fields=['name'], name='telescope_name_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dwarfs4MOSAIC', '0067_indexes_for_hot_queries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tbl_datafile',
+            index=models.Index(fields=['checksum'], name='datafile_checksum_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dwarfs4MOSAIC', '0068_datafile_checksum_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tbl_target',
+            name='datafiles_mtime',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Data files folder mtime'),
+        ),
+    ]
@@ -4,19 +4,27 @@ from individual modules in the 'models' package,
 allowing easy import of these models directly from 'models'.
 """
 
+from .tbl_datafile import Tbl_datafile
 from .tbl_instrument import Tbl_instrument
+from .tbl_job import Tbl_job
 from .tbl_observatory import Tbl_observatory
 from .tbl_observing_block import Tbl_observing_block
 from .tbl_observing_run import Tbl_observing_run
 from .tbl_researcher import Tbl_researcher
 from .tbl_target import Tbl_target
 from .tbl_telescope import Tbl_telescope
+from .tbl_visible_block import Tbl_visible_block
+from .tbl_visible_target import Tbl_visible_target
 
-__all__ = ["Tbl_instrument",
+__all__ = ["Tbl_datafile",
+           "Tbl_instrument",
+           "Tbl_job",
            "Tbl_observatory",
            "Tbl_observing_block",
            "Tbl_observing_run",
            "Tbl_researcher",
            "Tbl_target",
            "Tbl_telescope",
+           "Tbl_visible_block",
+           "Tbl_visible_target",
            ]
\ No newline at end of file
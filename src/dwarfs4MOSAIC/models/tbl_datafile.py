@@ -0,0 +1,61 @@
+"""
+This file contains the Django model that represents one data file stored in
+a target's data files folder (the datafile manifest).
+Storing name, size, modification time and checksum in the database lets views
+list files with a single query instead of scanning MEDIA_ROOT on every request.
+"""
+
+# Third-party libraries
+from django.db import models
+
+
+class Tbl_datafile(models.Model):
+
+    # Target the file belongs to
+    target = models.ForeignKey(
+        'Tbl_target',
+        on_delete       = models.CASCADE,
+        related_name    = "manifest_files",
+        verbose_name    = "Target")
+
+    # File name inside the target's data files folder
+    name = models.CharField(
+        max_length      = 255,
+        verbose_name    = "Name")
+
+    # File size in bytes
+    size = models.BigIntegerField(
+        default         = 0,
+        verbose_name    = "Size",
+        help_text       = "bytes")
+
+    # Last modification time (POSIX timestamp) when the entry was recorded
+    mtime = models.FloatField(
+        default         = 0,
+        verbose_name    = "Modification time")
+
+    # SHA-256 checksum of the file contents (empty until computed)
+    checksum = models.CharField(
+        max_length      = 64,
+        blank           = True,
+        default         = "",
+        verbose_name    = "SHA-256 checksum")
+
+    def __str__(self):
+        # Returns the file name when printed or displayed
+        return self.name
+
+    class Meta:
+        # Meta options for admin interface and query ordering
+        verbose_name = "Data File"
+        verbose_name_plural = "Data Files"
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=["target", "name"],
+                name="unique_datafile_per_target"),
+        ]
+        indexes = [
+            # References to a blob of the content-addressed store (see blob_store.py)
+            models.Index(fields=["checksum"], name="datafile_checksum_idx"),
+        ]
@@ -6,6 +6,7 @@ behaviors for managing astronomical observation data.
 
 # Third-party libraries
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import(
@@ -84,4 +85,10 @@ class Tbl_instrument(models.Model):
         verbose_name = "Instrument"
         verbose_name_plural = "Instruments"
         ordering = ['name']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='instrument_lower_name_idx'),
+            # Lookups by name (views and CSV imports)
+            models.Index(fields=['name'], name='instrument_name_idx'),
+        ]
 
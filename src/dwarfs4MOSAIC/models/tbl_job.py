@@ -0,0 +1,144 @@
+"""
+This file contains the Django model that represents a background job
+(for example a CSV import) queued in the database and run by the
+'run_jobs' management command.
+"""
+
+# Standard libraries
+import os
+
+# Third-party libraries
+from django.conf import settings
+from django.db import models
+
+
+class Tbl_job(models.Model):
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    # Job type, selects the handler registered in jobs.py
+    kind = models.CharField(
+        max_length      = 50,
+        verbose_name    = "Kind")
+
+    # Short human readable description
+    description = models.CharField(
+        max_length      = 255,
+        blank           = True,
+        verbose_name    = "Description")
+
+    # Current state of the job
+    status = models.CharField(
+        max_length      = 10,
+        choices         = STATUS_CHOICES,
+        default         = 'queued',
+        verbose_name    = "Status")
+
+    # Handler parameters
+    params = models.JSONField(
+        default         = dict,
+        blank           = True,
+        verbose_name    = "Parameters")
+
+    # Input file, relative to JOBS_ROOT
+    input_file = models.CharField(
+        max_length      = 255,
+        blank           = True,
+        verbose_name    = "Input file")
+
+    # Number of items to process (None until known)
+    total = models.PositiveIntegerField(
+        null            = True,
+        blank           = True,
+        verbose_name    = "Total")
+
+    # Number of items processed and committed; a resumed job restarts here
+    processed = models.PositiveIntegerField(
+        default         = 0,
+        verbose_name    = "Processed")
+
+    # Counters reported by the handler (e.g. created/updated)
+    result = models.JSONField(
+        default         = dict,
+        blank           = True,
+        verbose_name    = "Result")
+
+    # Item-level errors (e.g. CSV rows that were skipped)
+    errors = models.JSONField(
+        default         = list,
+        blank           = True,
+        verbose_name    = "Errors")
+
+    # Reason of the failure of a failed job
+    message = models.TextField(
+        blank           = True,
+        verbose_name    = "Message")
+
+    # User who queued the job
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete       = models.SET_NULL,
+        null            = True,
+        blank           = True,
+        related_name    = 'jobs',
+        verbose_name    = "Created by")
+
+    created_at = models.DateTimeField(
+        auto_now_add    = True,
+        verbose_name    = "Created at")
+
+    started_at = models.DateTimeField(
+        null            = True,
+        blank           = True,
+        verbose_name    = "Started at")
+
+    finished_at = models.DateTimeField(
+        null            = True,
+        blank           = True,
+        verbose_name    = "Finished at")
+
+    # Last time the job was saved (progress heartbeat)
+    updated_at = models.DateTimeField(
+        auto_now        = True,
+        verbose_name    = "Updated at")
+
+    @property
+    def percent(self):
+        """
+        Returns the progress in percent, or None if the total is unknown.
+        """
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return None
+        return min(100, int(100 * self.processed / self.total))
+
+    def delete(self, *args, **kwargs):
+        """
+        On deletion, remove the job input file from JOBS_ROOT, if it still exists.
+        """
+        if self.input_file:
+            path = os.path.join(settings.JOBS_ROOT, self.input_file)
+            if os.path.isfile(path):
+                os.remove(path)
+
+        super().delete(*args, **kwargs)
+
+    def __str__(self):
+        # Returns the job number and description when printed or displayed
+        return f"Job {self.pk}: {self.description or self.kind}"
+
+    class Meta:
+        # Meta options for admin interface and query ordering
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            # Worker: next queued job
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
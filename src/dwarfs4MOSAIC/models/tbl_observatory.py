@@ -6,6 +6,7 @@ behaviors for managing astronomical observation data.
 
 # Third-party libraries
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import(
@@ -72,4 +73,10 @@ class Tbl_observatory(models.Model):
         verbose_name = "Observatory"
         verbose_name_plural = "Observatories"
         ordering = ['name']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='observatory_lower_name_idx'),
+            # Lookups by name (views and CSV imports)
+            models.Index(fields=['name'], name='observatory_name_idx'),
+        ]
 
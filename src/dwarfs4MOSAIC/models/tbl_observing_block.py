@@ -9,6 +9,7 @@ behaviors for managing astronomical observation data.
 from django.contrib.auth.models import Group
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import(
@@ -158,3 +159,11 @@ class Tbl_observing_block(models.Model):
         verbose_name = "Observing Block"
         verbose_name_plural = "Observing Blocks"
         ordering = ['start_time']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='block_lower_name_idx'),
+            # Lookups by name (views and CSV imports)
+            models.Index(fields=['name'], name='block_name_idx'),
+            # Blocks of a run in time order
+            models.Index(fields=['obs_run', 'start_time'], name='block_run_start_idx'),
+        ]
@@ -7,6 +7,7 @@ behaviors for managing astronomical observation data.
 
 # Third-party libraries
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import NAME_MAX_LENGTH
@@ -68,3 +69,9 @@ class Tbl_observing_run(models.Model):
         verbose_name = "Observing Run"
         verbose_name_plural = "Observing Runs"
         ordering = ['start_date']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='run_lower_name_idx'),
+            # Lookups by name (views and CSV imports)
+            models.Index(fields=['name'], name='run_name_idx'),
+        ]
@@ -8,6 +8,7 @@ behaviors for managing astronomical observation data.
 # Third-party libraries
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import (
@@ -96,4 +97,8 @@ class Tbl_researcher(models.Model):
         verbose_name = "Researcher"
         verbose_name_plural = "Researchers"
         ordering = ['user__username']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='researcher_lower_name_idx'),
+        ]
 
@@ -7,18 +7,29 @@ behaviors for managing astronomical observation data.
 
 # Standard libraries
 import os
-import shutil
 
 # Third-party libraries
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Lower
 
 # Local application imports
 from ..constants import NAME_MAX_LENGTH
+from .. import spatial
+from ..storage import get_storage
 from ..utils import sanitize_filename
 from ..validators import validate_right_ascension, validate_declination
 
+# Sort keys of the home page: missing coordinates first (RA and Dec never reach
+# -1 / -91). The constants are literal SQL, not query parameters, so queries
+# match the expressions of the 'target_home_order_idx' index.
+HOME_RA_KEY = Coalesce('right_ascension_hours', RawSQL('-1.0', (), output_field=models.FloatField()))
+HOME_DEC_KEY = Coalesce('declination_deg', RawSQL('-91.0', (), output_field=models.FloatField()))
+
+
 class Tbl_target(models.Model):
 
     # Unique target name
@@ -73,6 +84,13 @@ class Tbl_target(models.Model):
         editable        = False,
     )
 
+    # Declination zone (spatial index bucket, see spatial.py)
+    dec_zone = models.IntegerField(
+        null            = True,
+        blank           = True,
+        editable        = False,
+    )
+
     # Apparent magnitude
     magnitude = models.FloatField(
         null            = True,
@@ -132,6 +150,15 @@ class Tbl_target(models.Model):
         editable        = False,
     )
 
+    # Modification time of the data files folder at the last manifest rescan
+    # (not editable in admin); 'reconcile_datafiles' skips folders left unchanged
+    datafiles_mtime = models.FloatField(
+        blank           = True,
+        null            = True,
+        verbose_name    = "Data files folder mtime",
+        editable        = False,
+    )
+
     @property
     def image_name(self):
         """
@@ -153,7 +180,48 @@ class Tbl_target(models.Model):
         if self.type not in valid_choices:
             self.type = 'other'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the stored name, to detect renames in save()
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+
+    def clean(self):
+        super().clean()
+        self.check_folder_rename()
+
+    def check_folder_rename(self):
+        """
+        A renamed target must not take the media folder of another one.
+        """
+        loaded_name = getattr(self, '_loaded_name', None)
+        if self.pk and loaded_name and loaded_name != self.name:
+            old_folder, new_folder = sanitize_filename(loaded_name), sanitize_filename(self.name)
+            if old_folder != new_folder and get_storage().folder_exists(new_folder):
+                raise ValidationError({'name': f"A media folder named '{new_folder}' already exists."})
+
     def save(self, *args, **kwargs):
+        self.update_coordinates()
+
+        # Renamed target: its media folder is moved and the paths rewritten
+        # once the save is committed (see media_folders.py)
+        loaded_name = getattr(self, '_loaded_name', None)
+        renamed = bool(self.pk and loaded_name and loaded_name != self.name)
+        if renamed:
+            self.check_folder_rename()
+
+        super().save(*args, **kwargs)
+        if renamed:
+            from ..media_folders import schedule_folder_move  # media_folders imports the models
+            schedule_folder_move(self)
+        self._loaded_name = self.name
+
+    def update_coordinates(self):
+        """
+        Compute the numeric coordinates (and spatial index bucket) from the
+        sexagesimal strings. Called by save() and by bulk imports, which bypass save().
+        """
 
         # RA -> hours
         if self.right_ascension:
@@ -170,27 +238,21 @@ class Tbl_target(models.Model):
                     int(d) + int(m) / 60 + float(s) / 3600
             )
 
-        super().save(*args, **kwargs)
+        # Spatial index bucket used by cone searches
+        self.dec_zone = spatial.dec_zone(self.declination_deg)
 
     def delete(self, *args, **kwargs):
         """
-        On deletion, remove the folder named after the sanitized target name inside MEDIA_ROOT,
-        if it exists, to clean up associated files.
+        On deletion, the folder named after the sanitized target name in the media
+        storage is moved to the trash once the deletion is committed, and removed in the
+        background (see media_folders.py).
         """
+        from ..media_folders import referenced_checksums, schedule_folder_removal
 
-        # Sanitize folder name, same as when created (requires sanitize_filename function)
-        safe_name = sanitize_filename(self.name)
-
-        # Construct absolute folder path under MEDIA_ROOT
-        folder_path = os.path.abspath(os.path.join(settings.MEDIA_ROOT, safe_name))
-        media_root = os.path.abspath(settings.MEDIA_ROOT)
-
-        # Safety check to ensure folder_path is within MEDIA_ROOT
-        if folder_path.startswith(media_root) and os.path.exists(folder_path):
-            shutil.rmtree(folder_path, ignore_errors=True)
-
-        # Call the parent class delete to remove the DB record
-        super().delete(*args, **kwargs)
+        checksums = referenced_checksums([self])
+        result = super().delete(*args, **kwargs)
+        schedule_folder_removal([self.name], checksums)
+        return result
 
     @property
     def image_url(self):
@@ -209,4 +271,14 @@ class Tbl_target(models.Model):
         # Meta options for admin interface and query ordering
         verbose_name = "Target"
         verbose_name_plural = "Targets"
-        ordering = ['name']
\ No newline at end of file
+        ordering = ['name']
+        indexes = [
+            # Cone search: one range scan per declination zone
+            models.Index(fields=['dec_zone', 'right_ascension_hours'], name='target_zone_ra_idx'),
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='target_lower_name_idx'),
+            # Targets page, sorted by (RA, Dec)
+            models.Index(fields=['right_ascension_hours', 'declination_deg'], name='target_ra_dec_idx'),
+            # Home page keyset order (see views.home_targets)
+            models.Index(HOME_RA_KEY, HOME_DEC_KEY, 'id', name='target_home_order_idx'),
+        ]
\ No newline at end of file
@@ -7,6 +7,7 @@ behaviors for managing astronomical observation data.
 # Third-party libraries
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Lower
 
 # Local application imports
 from ..constants import (
@@ -82,4 +83,10 @@ class Tbl_telescope(models.Model):
         verbose_name = "Telescope"
         verbose_name_plural = "Telescopes"
         ordering = ['name']
+        indexes = [
+            # Lists sorted by (Lower('name'), 'name')
+            models.Index(Lower('name'), 'name', name='telescope_lower_name_idx'),
+            # Lookups by name (views and CSV imports)
+            models.Index(fields=['name'], name='telescope_name_idx'),
+        ]
 
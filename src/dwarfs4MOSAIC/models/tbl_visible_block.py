@@ -0,0 +1,41 @@
+"""
+This file contains the Django model that stores, for each collaborator,
+the observing blocks they are allowed to see.
+Rows are derived data: they are rebuilt by the visibility module whenever
+group membership, allowed groups or denied blocks change.
+"""
+
+# Third-party libraries
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class Tbl_visible_block(models.Model):
+
+    # User the visibility row belongs to
+    user = models.ForeignKey(
+        User,
+        on_delete       = models.CASCADE,
+        related_name    = "visible_blocks",
+        verbose_name    = "User")
+
+    # Observing block the user may see
+    observing_block = models.ForeignKey(
+        'Tbl_observing_block',
+        on_delete       = models.CASCADE,
+        related_name    = "visible_to",
+        verbose_name    = "Observing Block")
+
+    def __str__(self):
+        # Returns a readable "user -> block" pair
+        return f"{self.user} -> {self.observing_block}"
+
+    class Meta:
+        # Meta options for admin interface and uniqueness of pairs
+        verbose_name = "Visible Block"
+        verbose_name_plural = "Visible Blocks"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "observing_block"],
+                name="unique_visible_block_per_user"),
+        ]
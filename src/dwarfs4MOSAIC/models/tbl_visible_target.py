@@ -0,0 +1,42 @@
+"""
+This file contains the Django model that stores, for each collaborator,
+the targets they are allowed to see.
+A target is visible when at least one of its observing blocks is visible
+and none of its observing blocks is denied to the user.
+Rows are derived data maintained by the visibility module.
+"""
+
+# Third-party libraries
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class Tbl_visible_target(models.Model):
+
+    # User the visibility row belongs to
+    user = models.ForeignKey(
+        User,
+        on_delete       = models.CASCADE,
+        related_name    = "visible_targets",
+        verbose_name    = "User")
+
+    # Target the user may see
+    target = models.ForeignKey(
+        'Tbl_target',
+        on_delete       = models.CASCADE,
+        related_name    = "visible_to",
+        verbose_name    = "Target")
+
+    def __str__(self):
+        # Returns a readable "user -> target" pair
+        return f"{self.user} -> {self.target}"
+
+    class Meta:
+        # Meta options for admin interface and uniqueness of pairs
+        verbose_name = "Visible Target"
+        verbose_name_plural = "Visible Targets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "target"],
+                name="unique_visible_target_per_user"),
+        ]
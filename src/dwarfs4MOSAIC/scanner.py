@@ -0,0 +1,53 @@
+"""
+Parallel scan of the target data files folders, used to rebuild the datafile
+manifest (see manifest.reconcile_target and the 'reconcile_datafiles' command).
+
+Folders are listed with the media storage (os.scandir with local storage: one
+directory read plus the stat data of its entries, no separate isfile/getsize
+calls per file). Listing is I/O bound, so folders are spread across a pool of
+SCAN_WORKERS threads, which hides the round trips of network filesystems and
+object stores. Database work stays in the calling thread.
+
+A folder whose modification time equals the one recorded at the previous scan
+has had no file added, removed or renamed since, and is not listed again.
+Files rewritten in place do not change the folder mtime: a full rescan
+(known mtime None) picks them up.
+"""
+
+# Standard libraries
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party libraries
+from django.conf import settings
+
+# Local application imports
+from .storage import get_storage
+
+# Result of one folder scan: 'mtime' is the folder modification time (None if
+# unknown), 'files' the storage.FileInfo list, or None if the folder is unchanged
+FolderScan = namedtuple('FolderScan', 'name mtime files')
+
+
+# Scan one folder, unless its modification time equals 'known_mtime'.
+# The mtime is read before listing, so a change made during the listing is
+# seen by the next scan.
+def scan_folder(name, known_mtime=None):
+    storage = get_storage()
+    mtime = storage.folder_mtime(name)
+    if mtime is not None and mtime == known_mtime:
+        return FolderScan(name, mtime, None)
+    return FolderScan(name, mtime, storage.listdir(name))
+
+
+# Scan folders, given as (name, known_mtime) pairs, with 'workers' threads
+# (SCAN_WORKERS by default). Yields one FolderScan per folder, in order.
+def scan_folders(folders, workers=None):
+    workers = workers or settings.SCAN_WORKERS
+    if workers <= 1:
+        for name, known_mtime in folders:
+            yield scan_folder(name, known_mtime)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as pool:
+        yield from pool.map(lambda folder: scan_folder(*folder), folders)
@@ -3,15 +3,32 @@ Signal handlers for synchronizing Django User and custom model Tbl_researcher.
 
 This module listens to creation or update events on User model to:
 - Update related Tbl_researcher fields when a User is updated.
+
+It also keeps the precomputed visibility tables (see visibility.py) up to date
+when group membership, allowed groups, denied blocks or block targets change,
+and invalidates the cached page fragments (see fragment_cache.py) when the
+data they show changes. With the content-addressed data file store, blobs
+are released when their last manifest entry is deleted (see blob_store.py).
 """
 
 # Third-party libraries
-from django.contrib.auth.models import User
-from django.db.models.signals import post_delete, post_save
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 # Local application imports
-from .models import Tbl_researcher
+from .blob_store import content_addressed, release_blobs
+from .fragment_cache import bump_data_version_on_commit
+from .models import (
+    Tbl_datafile,
+    Tbl_instrument,
+    Tbl_observing_block,
+    Tbl_observing_run,
+    Tbl_researcher,
+    Tbl_target,
+)
+from .visibility import refresh_users, users_for_blocks, users_for_groups
 
 
 # Create a Tbl_researcher automatically when a new User is created,
@@ -45,4 +62,120 @@ def update_researcher(sender, instance, **kwargs):
 def delete_user_with_researcher(sender, instance, **kwargs):
     user = instance.user
     if user:
-        user.delete()
\ No newline at end of file
+        user.delete()
+
+
+# VISIBILITY
+# ----------
+
+# Refresh visibility around a many-to-many change.
+# Affected users are collected before the change (so removed links are taken
+# into account) and after it, and refreshed once the change is applied.
+def _refresh_visibility_on_m2m(instance, action, affected_users):
+    if action.startswith("pre_"):
+        instance._visibility_pending = affected_users()
+    elif action.startswith("post_"):
+        pending = getattr(instance, "_visibility_pending", set())
+        refresh_users(pending | affected_users())
+        instance._visibility_pending = set()
+
+
+# Groups allowed on a block changed (from the block or from the group side)
+@receiver(m2m_changed, sender=Tbl_observing_block.allowed_groups.through)
+def allowed_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    def affected():
+        if reverse:
+            return users_for_groups([instance.pk])
+        return users_for_blocks([instance.pk])
+    _refresh_visibility_on_m2m(instance, action, affected)
+
+
+# Targets of a block changed (from the block or from the target side)
+@receiver(m2m_changed, sender=Tbl_observing_block.target.through)
+def block_targets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    def affected():
+        if reverse:
+            block_ids = set(pk_set or ()) | set(instance.observing_blocks.values_list("pk", flat=True))
+            return users_for_blocks(block_ids)
+        return users_for_blocks([instance.pk])
+    _refresh_visibility_on_m2m(instance, action, affected)
+
+
+# Group membership of a user changed (from the user or from the group side)
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    def affected():
+        if reverse:
+            return users_for_groups([instance.pk]) | set(pk_set or ())
+        return {instance.pk}
+    _refresh_visibility_on_m2m(instance, action, affected)
+
+
+# Denied blocks of a researcher changed (from the researcher or from the block side)
+@receiver(m2m_changed, sender=Tbl_researcher.denied_blocks.through)
+def denied_blocks_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    def affected():
+        if reverse:
+            return users_for_blocks([instance.pk]) | set(
+                Tbl_researcher.objects
+                .filter(pk__in=pk_set or (), user__isnull=False)
+                .values_list("user_id", flat=True))
+        return {instance.user_id}
+    _refresh_visibility_on_m2m(instance, action, affected)
+
+
+# A researcher's role may have changed (core team members keep no rows)
+@receiver(post_save, sender=Tbl_researcher)
+def researcher_saved(sender, instance, **kwargs):
+    refresh_users([instance.user_id])
+
+
+# Deleting a group or a block removes through rows without m2m signals:
+# collect affected users before deletion and refresh them afterwards.
+@receiver(pre_delete, sender=Group)
+def group_pre_delete(sender, instance, **kwargs):
+    instance._visibility_pending = users_for_groups([instance.pk])
+
+
+@receiver(pre_delete, sender=Tbl_observing_block)
+def observing_block_pre_delete(sender, instance, **kwargs):
+    instance._visibility_pending = users_for_blocks([instance.pk])
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Tbl_observing_block)
+def refresh_visibility_after_delete(sender, instance, **kwargs):
+    refresh_users(getattr(instance, "_visibility_pending", set()))
+
+
+# FRAGMENT CACHE
+# --------------
+
+# Models shown in cached fragments (home targets table)
+FRAGMENT_MODELS = (Tbl_target, Tbl_observing_block, Tbl_observing_run, Tbl_instrument, Tbl_datafile)
+
+
+# Any change of the data shown in cached fragments invalidates them
+def invalidate_fragments(sender, **kwargs):
+    bump_data_version_on_commit()
+
+
+for model in FRAGMENT_MODELS:
+    post_save.connect(invalidate_fragments, sender=model, dispatch_uid=f"fragments_save_{model.__name__}")
+    post_delete.connect(invalidate_fragments, sender=model, dispatch_uid=f"fragments_delete_{model.__name__}")
+
+
+# Targets and allowed groups of blocks (m2m changes send no post_save)
+@receiver(m2m_changed, sender=Tbl_observing_block.target.through)
+@receiver(m2m_changed, sender=Tbl_observing_block.allowed_groups.through)
+def invalidate_fragments_on_m2m(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_data_version_on_commit()
+
+
+# Remove the blob of a deleted manifest entry once nothing references it
+# (file deleted, or target deleted with its data files folder)
+@receiver(post_delete, sender=Tbl_datafile)
+def release_datafile_blob(sender, instance, **kwargs):
+    if content_addressed() and instance.checksum:
+        transaction.on_commit(lambda: release_blobs([instance.checksum]))
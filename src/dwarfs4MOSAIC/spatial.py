@@ -0,0 +1,124 @@
+"""
+Spatial indexing and cone search over target coordinates.
+
+Targets are bucketed into declination zones of ZONE_HEIGHT_DEG degrees
+(Tbl_target.dec_zone, kept up to date in Tbl_target.save()). A cone search
+turns "all targets within r of (RA, Dec)" into one indexed range scan on
+(dec_zone, right_ascension_hours) per zone touched by the cone, and only the
+few candidates returned are checked with the exact angular distance.
+"""
+
+# Standard libraries
+import math
+
+# Third-party libraries
+from django.db.models import Q
+
+# Height of a declination zone, in degrees
+ZONE_HEIGHT_DEG = 0.5
+
+
+# Declination zone of a declination in degrees (None if unknown)
+def dec_zone(declination_deg):
+    if declination_deg is None:
+        return None
+    zone = int(math.floor((declination_deg + 90.0) / ZONE_HEIGHT_DEG))
+    return min(zone, int(180.0 / ZONE_HEIGHT_DEG) - 1)  # +90 belongs to the last zone
+
+
+# Parse a right ascension given in degrees ("150.25") or as HH:MM:SS[.sss]
+# Returns degrees, raises ValueError if the value cannot be parsed.
+def parse_right_ascension(value):
+    value = str(value).strip()
+    try:
+        if ':' in value:
+            h, m, s = value.split(':')
+            degrees = (int(h) + int(m) / 60 + float(s) / 3600) * 15
+        else:
+            degrees = float(value)
+    except ValueError:
+        raise ValueError("Invalid format.")
+
+    if not 0 <= degrees < 360:
+        raise ValueError("Right ascension must be between 0 and 360 degrees.")
+    return degrees
+
+
+# Parse a declination given in degrees ("-12.5") or as ±DD:MM:SS[.sss]
+# Returns degrees, raises ValueError if the value cannot be parsed.
+def parse_declination(value):
+    value = str(value).strip()
+    try:
+        if ':' in value:
+            sign = -1 if value.startswith('-') else 1
+            d, m, s = value.lstrip('+-').split(':')
+            degrees = sign * (int(d) + int(m) / 60 + float(s) / 3600)
+        else:
+            degrees = float(value)
+    except ValueError:
+        raise ValueError("Invalid format.")
+
+    if not -90 <= degrees <= 90:
+        raise ValueError("Declination must be between -90 and 90 degrees.")
+    return degrees
+
+
+# Angular separation between two positions (all values in degrees), haversine formula
+def angular_separation(ra1, dec1, ra2, dec2):
+    ra1, dec1, ra2, dec2 = map(math.radians, (ra1, dec1, ra2, dec2))
+    sin_ddec = math.sin((dec2 - dec1) / 2)
+    sin_dra = math.sin((ra2 - ra1) / 2)
+    a = sin_ddec ** 2 + math.cos(dec1) * math.cos(dec2) * sin_dra ** 2
+    return math.degrees(2 * math.asin(min(1.0, math.sqrt(a))))
+
+
+# Half-width in RA (degrees) of the box enclosing a cone, or None if the cone
+# contains a pole and every RA must be searched
+def _ra_half_width(dec, radius):
+    if abs(dec) + radius >= 90:
+        return None
+    dec_r, radius_r = math.radians(dec), math.radians(radius)
+    denominator = math.sqrt(abs(math.cos(dec_r - radius_r) * math.cos(dec_r + radius_r)))
+    return math.degrees(math.atan(math.sin(radius_r) / denominator))
+
+
+# Q object selecting the candidates of a cone: one (dec_zone, RA range) pair per zone
+def cone_filter(ra, dec, radius):
+    first_zone = dec_zone(max(dec - radius, -90.0))
+    last_zone = dec_zone(min(dec + radius, 90.0))
+
+    half_width = _ra_half_width(dec, radius)
+    if half_width is None or half_width >= 180:
+        ra_ranges = [(0.0, 24.0)]
+    else:
+        low, high = (ra - half_width) / 15, (ra + half_width) / 15  # hours
+        if low < 0:
+            ra_ranges = [(low + 24, 24.0), (0.0, high)]
+        elif high >= 24:
+            ra_ranges = [(low, 24.0), (0.0, high - 24)]
+        else:
+            ra_ranges = [(low, high)]
+
+    condition = Q()
+    for zone in range(first_zone, last_zone + 1):
+        for low, high in ra_ranges:
+            condition |= Q(dec_zone=zone, right_ascension_hours__range=(low, high))
+    return condition
+
+
+# Return the targets of 'queryset' within 'radius' degrees of (ra, dec) degrees,
+# as a list of (target, separation in arcsec) sorted by separation
+def cone_search(queryset, ra, dec, radius):
+    candidates = queryset.filter(
+        cone_filter(ra, dec, radius),
+        declination_deg__range=(dec - radius, dec + radius),
+    )
+
+    matches = []
+    for target in candidates:
+        separation = angular_separation(ra, dec, target.right_ascension_hours * 15, target.declination_deg)
+        if separation <= radius:
+            matches.append((target, separation * 3600))
+
+    matches.sort(key=lambda match: match[1])
+    return matches
@@ -0,0 +1,264 @@
+// Resumable chunked uploads of large data files (see chunked_upload.py).
+//
+// Each selected file is uploaded as soon as it is selected:
+// 1. the SHA-256 of the whole file is computed, then POST {name, size, checksum}
+//    to the uploads URL starts an upload (its URL is kept in localStorage, so
+//    selecting the same file again resumes it);
+// 2. each chunk is sent with PATCH at the current Upload-Offset, with its
+//    SHA-256 in Upload-Checksum when the browser can compute it;
+// 3. after a network error the offset is asked again with HEAD and the upload
+//    continues from there.
+// The server checks the file checksum before moving the file into place.
+document.addEventListener('DOMContentLoaded', function () {
+    const MAX_RETRIES = 10;
+
+    // Bytes of the file read at a time while computing its checksum (8 MiB)
+    const HASH_READ_SIZE = 8 * 1024 * 1024;
+
+    const csrfInput = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    const csrfToken = csrfInput ? csrfInput.value : '';
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function formatSize(bytes) {
+        const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+        let i = 0;
+        while (bytes >= 1024 && i < units.length - 1) {
+            bytes /= 1024;
+            i++;
+        }
+        return bytes.toFixed(i ? 1 : 0) + ' ' + units[i];
+    }
+
+    // Base64 SHA-256 digest of a blob, or null without WebCrypto (non-HTTPS pages)
+    async function chunkChecksum(blob) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return null;
+        }
+        const digest = await window.crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+        return btoa(String.fromCharCode(...new Uint8Array(digest)));
+    }
+
+    // Incremental SHA-256 (FIPS 180-4). WebCrypto only hashes a whole buffer,
+    // which does not fit in memory for large data files.
+    const SHA256_K = new Int32Array([
+        0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+        0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+        0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+        0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+        0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+        0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+        0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+        0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+    ]);
+
+    class Sha256 {
+        constructor() {
+            this.state = new Int32Array([
+                0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+            ]);
+            this.words = new Int32Array(64);
+            this.buffer = new Uint8Array(64);  // bytes of an incomplete block
+            this.buffered = 0;
+            this.length = 0;
+        }
+
+        update(data) {
+            let i = 0;
+            this.length += data.length;
+            if (this.buffered) {
+                i = Math.min(64 - this.buffered, data.length);
+                this.buffer.set(data.subarray(0, i), this.buffered);
+                this.buffered += i;
+                if (this.buffered < 64) {
+                    return;
+                }
+                this.compress(this.buffer, 0);
+                this.buffered = 0;
+            }
+            for (; i + 64 <= data.length; i += 64) {
+                this.compress(data, i);
+            }
+            this.buffer.set(data.subarray(i));
+            this.buffered = data.length - i;
+        }
+
+        // Hex digest (the object must not be updated afterwards)
+        hexdigest() {
+            const tail = new Uint8Array(this.buffered < 56 ? 64 : 128);
+            tail.set(this.buffer.subarray(0, this.buffered));
+            tail[this.buffered] = 0x80;
+            const bits = this.length * 8;
+            const view = new DataView(tail.buffer);
+            view.setUint32(tail.length - 8, Math.floor(bits / 0x100000000));
+            view.setUint32(tail.length - 4, bits >>> 0);
+            for (let i = 0; i < tail.length; i += 64) {
+                this.compress(tail, i);
+            }
+            return Array.from(this.state, x => (x >>> 0).toString(16).padStart(8, '0')).join('');
+        }
+
+        compress(data, offset) {
+            const w = this.words;
+            for (let t = 0; t < 16; t++) {
+                const j = offset + 4 * t;
+                w[t] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | data[j + 3];
+            }
+            for (let t = 16; t < 64; t++) {
+                const x = w[t - 15], y = w[t - 2];
+                const s0 = ((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3);
+                const s1 = ((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10);
+                w[t] = (w[t - 16] + s0 + w[t - 7] + s1) | 0;
+            }
+
+            const state = this.state;
+            let a = state[0], b = state[1], c = state[2], d = state[3];
+            let e = state[4], f = state[5], g = state[6], h = state[7];
+            for (let t = 0; t < 64; t++) {
+                const S1 = ((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7));
+                const t1 = (h + S1 + ((e & f) ^ (~e & g)) + SHA256_K[t] + w[t]) | 0;
+                const S0 = ((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10));
+                const t2 = (S0 + ((a & b) ^ (a & c) ^ (b & c))) | 0;
+                h = g; g = f; f = e; e = (d + t1) | 0;
+                d = c; c = b; b = a; a = (t1 + t2) | 0;
+            }
+            state[0] += a; state[1] += b; state[2] += c; state[3] += d;
+            state[4] += e; state[5] += f; state[6] += g; state[7] += h;
+        }
+    }
+
+    // Hex SHA-256 digest of a whole file, read in slices
+    async function fileChecksum(file, status) {
+        const hash = new Sha256();
+        for (let offset = 0; offset < file.size; offset += HASH_READ_SIZE) {
+            status.textContent = `Computing checksum... ${Math.floor(100 * offset / file.size)}%`;
+            hash.update(new Uint8Array(await file.slice(offset, offset + HASH_READ_SIZE).arrayBuffer()));
+        }
+        return hash.hexdigest();
+    }
+
+    // Offset of an existing upload, or null if the server does not know it any more
+    async function currentOffset(uploadUrl) {
+        const response = await fetch(uploadUrl, {method: 'HEAD', credentials: 'same-origin'});
+        if (!response.ok) {
+            return null;
+        }
+        return parseInt(response.headers.get('Upload-Offset'), 10);
+    }
+
+    async function startUpload(url, file, status) {
+        const checksum = await fileChecksum(file, status);
+        const response = await fetch(url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken},
+            body: JSON.stringify({name: file.name, size: file.size, checksum: checksum}),
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP ${response.status}`);
+        }
+        return data.url;
+    }
+
+    async function uploadFile(container, file, item) {
+        const url = container.dataset.url;
+        const chunkSize = parseInt(container.dataset.chunkSize, 10);
+        const key = `chunked-upload:${url}:${file.name}:${file.size}:${file.lastModified}`;
+        const progress = item.querySelector('progress');
+        const status = item.querySelector('.status');
+
+        // Resume the upload of the same file if the server still has it
+        let uploadUrl = localStorage.getItem(key);
+        let offset = uploadUrl ? await currentOffset(uploadUrl) : null;
+        if (offset === null) {
+            uploadUrl = await startUpload(url, file, status);
+            localStorage.setItem(key, uploadUrl);
+            offset = 0;
+        }
+
+        let retries = 0;
+        while (true) {
+            progress.value = file.size ? offset / file.size : 0;
+            status.textContent = `${formatSize(offset)} / ${formatSize(file.size)}`;
+
+            const chunk = file.slice(offset, offset + chunkSize);
+            const headers = {
+                'Content-Type': 'application/offset+octet-stream',
+                'Upload-Offset': String(offset),
+                'X-CSRFToken': csrfToken,
+            };
+            const checksum = await chunkChecksum(chunk);
+            if (checksum) {
+                headers['Upload-Checksum'] = `sha256 ${checksum}`;
+            }
+
+            let response;
+            try {
+                response = await fetch(uploadUrl, {
+                    method: 'PATCH', credentials: 'same-origin', headers: headers, body: chunk,
+                });
+            } catch (error) {
+                response = null;  // network error
+            }
+
+            if (response && response.status === 204) {
+                offset = parseInt(response.headers.get('Upload-Offset'), 10);
+                retries = 0;
+                continue;
+            }
+            if (response && response.ok) {
+                // Last chunk: the file is in place
+                localStorage.removeItem(key);
+                progress.value = 1;
+                status.textContent = `${formatSize(file.size)} uploaded`;
+                return;
+            }
+            if (response && ![409, 460].includes(response.status) && response.status < 500) {
+                const data = await response.json().catch(() => ({}));
+                localStorage.removeItem(key);
+                throw new Error(data.error || `HTTP ${response.status}`);
+            }
+
+            // Network error, offset conflict, checksum mismatch or server error:
+            // wait, ask the server where to continue and try again
+            if (++retries > MAX_RETRIES) {
+                throw new Error('Upload interrupted, select the file again to resume it.');
+            }
+            status.textContent = `Connection problem, retrying (${retries}/${MAX_RETRIES})...`;
+            await sleep(Math.min(30000, 1000 * 2 ** retries));
+            const resumed = await currentOffset(uploadUrl).catch(() => offset);
+            if (resumed === null) {
+                localStorage.removeItem(key);
+                throw new Error('The upload expired on the server, select the file again.');
+            }
+            offset = resumed;
+        }
+    }
+
+    document.querySelectorAll('.chunked-upload').forEach(function (container) {
+        const input = container.querySelector('input[type="file"]');
+        const list = container.querySelector('.chunked-upload-list');
+
+        input.addEventListener('change', async function () {
+            const files = Array.from(input.files);
+            input.value = '';
+
+            // One upload at a time, in selection order
+            for (const file of files) {
+                const item = document.createElement('li');
+                item.innerHTML = '<strong></strong> <progress max="1" value="0"></progress> <span class="status"></span>';
+                item.querySelector('strong').textContent = file.name;
+                list.appendChild(item);
+
+                try {
+                    await uploadFile(container, file, item);
+                } catch (error) {
+                    item.querySelector('.status').textContent = `Error: ${error.message}`;
+                }
+            }
+        });
+    });
+});
@@ -0,0 +1,395 @@
+"""
+Storage of the target media (images, thumbnails and data files).
+
+Files are named by their path relative to MEDIA_ROOT, with '/' separators
+(e.g. 'NGC_1052/datafiles/cube.fits', as stored in Tbl_target.image and
+Tbl_target.datafiles_path). get_storage() returns the backend selected by
+MEDIA_STORAGE:
+- 'local': files under MEDIA_ROOT (default);
+- 's3': an S3-compatible object store (AWS S3, MinIO, ...), configured with the
+  MEDIA_S3_* settings and the usual AWS credentials (requires 'boto3').
+  Large files are written with multipart uploads and downloads are redirected
+  to presigned URLs, so the bytes never go through Django.
+
+Both backends offer the same operations: listdir, stat, exists, open,
+read_range, write (streamed, returns size and SHA-256), delete, makedirs,
+folder_exists, folder_mtime, move_folder, and trash_folder/purge for deferred
+folder removal.
+Features relying on the local filesystem (hardlinked blob store, web server
+offload) require 'local'.
+"""
+
+# Standard libraries
+import hashlib
+import itertools
+import os
+import posixpath
+import shutil
+import time
+import uuid
+from collections import namedtuple
+
+# Third-party libraries
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.http import content_disposition_header
+
+# Local application imports
+from .instrumentation import InstrumentedStorage
+
+# Read size used when streaming files (1 MiB)
+STORAGE_CHUNK_SIZE = 1024 * 1024
+
+# One file: name (without folder), size in bytes, modification time (POSIX timestamp)
+FileInfo = namedtuple('FileInfo', 'name size mtime')
+
+
+# Normalized name of a file relative to MEDIA_ROOT; names leaving MEDIA_ROOT are refused
+def clean_name(name):
+    name = posixpath.normpath(str(name).replace(os.sep, '/'))
+    if name.startswith(('/', '../')) or name in ('.', '..'):
+        raise SuspiciousFileOperation(f"Invalid media path '{name}'.")
+    return name
+
+
+# Regroup an iterable of byte strings into blocks of 'size' bytes (the last one may be shorter)
+def _blocks(chunks, size):
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class LocalStorage:
+    """
+    Files under MEDIA_ROOT.
+    """
+
+    local = True
+
+    # Absolute path of a file
+    def path(self, name):
+        return os.path.join(settings.MEDIA_ROOT, clean_name(name))
+
+    # Files (not sub-folders, nor hidden files) of a folder
+    def listdir(self, name):
+        try:
+            with os.scandir(self.path(name)) as entries:
+                return [
+                    FileInfo(entry.name, stat.st_size, stat.st_mtime)
+                    for entry in entries
+                    if entry.is_file() and not entry.name.startswith('.')
+                    for stat in (entry.stat(),)
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+    # FileInfo of a file; raises FileNotFoundError
+    def stat(self, name):
+        path = self.path(name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(name)
+        stat = os.stat(path)
+        return FileInfo(os.path.basename(path), stat.st_size, stat.st_mtime)
+
+    def exists(self, name):
+        return os.path.isfile(self.path(name))
+
+    # Binary file object
+    def open(self, name):
+        return open(self.path(name), 'rb')
+
+    # Yield 'length' bytes of a file starting at 'start'
+    def read_range(self, name, start, length):
+        with self.open(name) as f:
+            f.seek(start)
+            while length > 0:
+                chunk = f.read(min(STORAGE_CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+    # Write a file from an iterable of byte strings; returns (size, SHA-256 hex digest).
+    # The file is written under a temporary name and renamed into place, so an
+    # existing file (possibly a hardlink to a shared blob) is replaced, never overwritten.
+    def write(self, name, chunks):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.upload")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temporary_path, 'wb') as destination:
+                for chunk in chunks:
+                    destination.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        return size, digest.hexdigest()
+
+    # Move a local file (e.g. a finished upload) into place
+    def move_in(self, local_path, name):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(local_path, path)
+
+    def delete(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def makedirs(self, name):
+        os.makedirs(self.path(name), exist_ok=True)
+
+    def folder_exists(self, name):
+        return os.path.isdir(self.path(name))
+
+    # Modification time of a folder (changes when files are added, removed or
+    # renamed in it), or None if it does not exist
+    def folder_mtime(self, name):
+        try:
+            return os.stat(self.path(name)).st_mtime
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    # Rename a folder (atomic)
+    def move_folder(self, old_name, new_name):
+        if os.path.isdir(self.path(old_name)):
+            os.rename(self.path(old_name), self.path(new_name))
+
+    # Rename a folder into TRASH_ROOT (same filesystem, atomic) and return the
+    # purge() token, or None if the folder does not exist
+    def trash_folder(self, name):
+        path = self.path(name)
+        if not os.path.isdir(path):
+            return None
+        os.makedirs(settings.TRASH_ROOT, exist_ok=True)
+        trashed = f"{uuid.uuid4().hex}-{os.path.basename(path)}"
+        os.rename(path, os.path.join(settings.TRASH_ROOT, trashed))
+        return trashed
+
+    # Remove a trashed folder
+    def purge(self, token):
+        path = os.path.join(settings.TRASH_ROOT, os.path.basename(token))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+    # Local files are sent by Django or the web server (see downloads.send_file)
+    def download_url(self, name, filename, as_attachment=True):
+        return None
+
+
+class S3Storage:
+    """
+    Files in an S3-compatible bucket (MEDIA_S3_BUCKET), under MEDIA_S3_PREFIX.
+    Folders do not exist as such: a folder is the set of keys sharing its prefix.
+    """
+
+    local = False
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured("MEDIA_STORAGE = 's3' requires the 'boto3' package.")
+
+        if not settings.MEDIA_S3_BUCKET:
+            raise ImproperlyConfigured("MEDIA_STORAGE = 's3' requires MEDIA_S3_BUCKET.")
+
+        self.bucket = settings.MEDIA_S3_BUCKET
+        self.prefix = settings.MEDIA_S3_PREFIX.strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=settings.MEDIA_S3_ENDPOINT_URL or None,
+            region_name=settings.MEDIA_S3_REGION or None,
+            config=Config(signature_version='s3v4'),
+        )
+
+    def key(self, name):
+        name = clean_name(name)
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    # Keys of every object under a folder, with their last modification time
+    def _objects(self, name):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(name) + '/'):
+            for obj in page.get('Contents', []):
+                yield obj['Key'], obj['LastModified'].timestamp()
+
+    # Delete objects by key, 1000 per request
+    def _delete_keys(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True},
+            )
+
+    def listdir(self, name):
+        paginator = self.client.get_paginator('list_objects_v2')
+        files = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(name) + '/', Delimiter='/'):
+            for obj in page.get('Contents', []):
+                filename = posixpath.basename(obj['Key'])
+                if filename and not filename.startswith('.'):
+                    files.append(FileInfo(filename, obj['Size'], obj['LastModified'].timestamp()))
+        return files
+
+    def stat(self, name):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except self.client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(name)
+            raise
+        return FileInfo(posixpath.basename(name), head['ContentLength'], head['LastModified'].timestamp())
+
+    def exists(self, name):
+        try:
+            self.stat(name)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def open(self, name):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(name))['Body']
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(name)
+
+    def read_range(self, name, start, length):
+        if length <= 0:
+            return
+        body = self.client.get_object(
+            Bucket=self.bucket, Key=self.key(name), Range=f"bytes={start}-{start + length - 1}")['Body']
+        try:
+            yield from body.iter_chunks(STORAGE_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    # Files smaller than one part are sent with a single request,
+    # larger ones with a multipart upload (aborted on error)
+    def write(self, name, chunks):
+        key = self.key(name)
+        part_size = settings.MEDIA_S3_MULTIPART_SIZE
+        digest = hashlib.sha256()
+        size = 0
+
+        blocks = _blocks(chunks, part_size)
+        first = next(blocks, b"")
+        second = next(blocks, None)
+        if second is None:
+            digest.update(first)
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=first)
+            return len(first), digest.hexdigest()
+
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+        parts = []
+        try:
+            for number, block in enumerate(itertools.chain((first, second), blocks), start=1):
+                digest.update(block)
+                size += len(block)
+                response = self.client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=block)
+                parts.append({'PartNumber': number, 'ETag': response['ETag']})
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts})
+        except BaseException:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return size, digest.hexdigest()
+
+    # Upload a local file (e.g. a finished upload), then remove it
+    def move_in(self, local_path, name):
+        with open(local_path, 'rb') as f:
+            self.write(name, iter(lambda: f.read(STORAGE_CHUNK_SIZE), b''))
+        os.remove(local_path)
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(name))
+
+    def makedirs(self, name):
+        pass
+
+    def folder_exists(self, name):
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self.key(name) + '/', MaxKeys=1)
+        return response.get('KeyCount', 0) > 0
+
+    # Prefixes have no modification time: folders are always listed again
+    def folder_mtime(self, name):
+        return None
+
+    # Copy every object to the new folder, then delete the old ones (not atomic)
+    def move_folder(self, old_name, new_name):
+        old_prefix, new_prefix = self.key(old_name) + '/', self.key(new_name) + '/'
+        keys = [key for key, _ in self._objects(old_name)]
+        for key in keys:
+            self.client.copy(
+                {'Bucket': self.bucket, 'Key': key}, self.bucket, new_prefix + key[len(old_prefix):])
+        self._delete_keys(keys)
+
+    # Objects cannot be renamed: the token records the folder and the time of the
+    # deletion, and purge() only removes objects older than that, so the files of a
+    # new target created with the same name in the meantime are kept
+    def trash_folder(self, name):
+        return {'folder': clean_name(name), 'before': time.time()}
+
+    def purge(self, token):
+        self._delete_keys(key for key, mtime in self._objects(token['folder']) if mtime <= token['before'])
+
+    # Presigned URL downloading the file straight from the object store
+    def download_url(self, name, filename, as_attachment=True):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self.key(name),
+                'ResponseContentDisposition': content_disposition_header(as_attachment, filename),
+            },
+            ExpiresIn=settings.MEDIA_S3_URL_EXPIRY,
+        )
+
+
+# Backends by MEDIA_STORAGE value
+STORAGE_BACKENDS = {
+    'local': LocalStorage,
+    's3': S3Storage,
+}
+
+_storage = None
+
+
+# Storage backend selected by MEDIA_STORAGE (one instance per process), with
+# its calls counted when INSTRUMENTATION_ENABLED is True
+def get_storage():
+    global _storage
+    if _storage is None:
+        backend = getattr(settings, 'MEDIA_STORAGE', 'local')
+        if backend not in STORAGE_BACKENDS:
+            raise ImproperlyConfigured(
+                f"MEDIA_STORAGE must be one of {', '.join(STORAGE_BACKENDS)}, not '{backend}'.")
+        _storage = STORAGE_BACKENDS[backend]()
+        if getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            _storage = InstrumentedStorage(_storage)
+    return _storage
+
+
+# Build the backend again when its settings change (tests)
+@receiver(setting_changed)
+def reset_storage(setting, **kwargs):
+    global _storage
+    if setting in ('MEDIA_STORAGE', 'INSTRUMENTATION_ENABLED') or setting.startswith('MEDIA_S3_'):
+        _storage = None
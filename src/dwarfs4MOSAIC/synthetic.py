@@ -0,0 +1,270 @@
+"""
+Synthetic catalogue generator for benchmarks and load tests.
+
+generate_catalogue() fills the database with a realistic, reproducible
+(seeded) dataset: observatories, telescopes, instruments, observing runs,
+observing blocks linked to targets and allowed groups, users with researchers
+(core team members and collaborators with denied blocks), data file manifest
+entries and, optionally, the data files themselves in the media storage.
+
+Every generated name starts with SYNTHETIC_PREFIX, so the dataset can be
+removed with clear_catalogue() without touching real data.
+Rows are written with bulk inserts (no model signals): visibility tables and
+cached fragments are refreshed once at the end.
+"""
+
+# Standard libraries
+import math
+import os
+import random
+from datetime import date, datetime, time, timedelta
+
+# Third-party libraries
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+# Local application imports
+from .fragment_cache import bump_data_version_on_commit
+from .models import (
+    Tbl_datafile,
+    Tbl_instrument,
+    Tbl_observatory,
+    Tbl_observing_block,
+    Tbl_observing_run,
+    Tbl_researcher,
+    Tbl_target,
+    Tbl_telescope,
+)
+from .storage import get_storage
+from .utils import sanitize_filename
+from .visibility import refresh_all
+
+# Prefix of every generated name (and username)
+SYNTHETIC_PREFIX = "SYN-"
+
+# Password of the generated users
+SYNTHETIC_PASSWORD = "synthetic"
+
+# Rows per bulk insert
+GENERATOR_BATCH_SIZE = 2000
+
+# Size in bytes of each generated data file
+DATAFILE_SIZE = 4096
+
+
+# Default number of each kind of object for a number of targets
+def default_sizes(targets):
+    return {
+        'observatories': max(2, targets // 20000),
+        'telescopes': max(4, targets // 10000),
+        'instruments': max(8, targets // 5000),
+        'runs': max(10, targets // 500),
+        'blocks': max(20, targets // 25),
+        'groups': max(3, min(50, targets // 2000)),
+        'researchers': max(10, min(500, targets // 200)),
+    }
+
+
+# Sexagesimal RA and Dec strings of a random position, uniform on the sphere
+def random_position(rng):
+    ra_hours = rng.uniform(0, 24)
+    dec_deg = math.degrees(math.asin(rng.uniform(-1, 1)))
+
+    h, rest = divmod(ra_hours * 3600, 3600)
+    m, s = divmod(rest, 60)
+    sign = '+' if dec_deg >= 0 else '-'
+    d, rest = divmod(abs(dec_deg) * 3600, 3600)
+    dm, ds = divmod(rest, 60)
+    return f"{int(h):02d}:{int(m):02d}:{s:05.2f}", f"{sign}{int(d):02d}:{int(dm):02d}:{ds:04.1f}"
+
+
+# Insert objects in batches and return them (with primary keys)
+def _bulk(model, objects):
+    return model.objects.bulk_create(objects, batch_size=GENERATOR_BATCH_SIZE)
+
+
+# Generate the dataset. 'sizes' overrides default_sizes(); with 'files_per_target'
+# > 0 the data files are written to the media storage unless 'write_files' is False.
+# 'progress' (optional) is called with a message after each step.
+def generate_catalogue(targets, sizes=None, files_per_target=2, write_files=True, seed=0, progress=None):
+    rng = random.Random(seed)
+    sizes = {**default_sizes(targets), **(sizes or {})}
+    report = progress or (lambda message: None)
+    p = SYNTHETIC_PREFIX
+
+    with transaction.atomic():
+        observatories = _bulk(Tbl_observatory, [
+            Tbl_observatory(
+                name=f"{p}Observatory {i}",
+                location=f"Site {i}",
+                longitude=f"{rng.uniform(-180, 180):.4f}",
+                latitude=f"{rng.uniform(-90, 90):.4f}",
+                altitude=rng.uniform(0, 5000))
+            for i in range(sizes['observatories'])
+        ])
+        telescopes = _bulk(Tbl_telescope, [
+            Tbl_telescope(
+                name=f"{p}Telescope {i}",
+                obs_tel=rng.choice(observatories),
+                aperture=rng.uniform(0.5, 40),
+                status='operational')
+            for i in range(sizes['telescopes'])
+        ])
+        instruments = _bulk(Tbl_instrument, [
+            Tbl_instrument(
+                name=f"{p}Instrument {i}",
+                tel_ins=rng.choice(telescopes),
+                status='operational',
+                filters="g, r, i, z",
+                configuration="imaging, long slit")
+            for i in range(sizes['instruments'])
+        ])
+        report(f"{len(observatories)} observatories, {len(telescopes)} telescopes, "
+               f"{len(instruments)} instruments")
+
+        # Users and researchers: a fifth of them are core team members
+        password = make_password(SYNTHETIC_PASSWORD)
+        users = _bulk(User, [
+            User(username=f"{p}user{i}", password=password, first_name="Synthetic", last_name=f"User {i}")
+            for i in range(sizes['researchers'])
+        ])
+        researchers = _bulk(Tbl_researcher, [
+            Tbl_researcher(
+                user=user,
+                name=f"{p}Researcher {i}",
+                email=f"user{i}@example.org",
+                role='core_team' if i % 5 == 0 else 'collaborator')
+            for i, user in enumerate(users)
+        ])
+        groups = _bulk(Group, [Group(name=f"{p}Group {i}") for i in range(sizes['groups'])])
+        _bulk(User.groups.through, [
+            User.groups.through(user_id=user.pk, group_id=group.pk)
+            for user in users
+            for group in rng.sample(groups, rng.randint(1, min(2, len(groups))))
+        ])
+        report(f"{len(users)} users, {len(groups)} groups")
+
+        start = date(2024, 1, 1)
+        runs = []
+        for i in range(sizes['runs']):
+            start_date = start + timedelta(days=rng.randint(0, 1000))
+            runs.append(Tbl_observing_run(
+                name=f"{p}Run {i}",
+                instrument=rng.choice(instruments),
+                start_date=start_date,
+                end_date=start_date + timedelta(days=rng.randint(1, 7))))
+        runs = _bulk(Tbl_observing_run, runs)
+        _bulk(Tbl_observing_run.researchers.through, [
+            Tbl_observing_run.researchers.through(tbl_observing_run_id=run.pk, tbl_researcher_id=researcher.pk)
+            for run in runs
+            for researcher in rng.sample(researchers, min(3, len(researchers)))
+        ])
+
+        blocks = []
+        for i in range(sizes['blocks']):
+            run = rng.choice(runs)
+            start_time = datetime.combine(run.start_date, time(rng.randint(18, 23), rng.choice((0, 30))))
+            blocks.append(Tbl_observing_block(
+                name=f"{p}Block {i}",
+                obs_run=run,
+                semester=f"{run.start_date.year}{'A' if run.start_date.month < 7 else 'B'}",
+                start_time=timezone.make_aware(start_time),
+                observation_mode=rng.choice(('photometry', 'spectroscopy', 'imaging')),
+                filters="r",
+                exposure_time=rng.choice((60.0, 300.0, 900.0)),
+                seeing=round(rng.uniform(0.5, 2.0), 2)))
+        blocks = _bulk(Tbl_observing_block, blocks)
+        _bulk(Tbl_observing_block.allowed_groups.through, [
+            Tbl_observing_block.allowed_groups.through(tbl_observing_block_id=block.pk, group_id=group.pk)
+            for block in blocks
+            for group in rng.sample(groups, rng.randint(1, min(2, len(groups))))
+        ])
+        _bulk(Tbl_researcher.denied_blocks.through, [
+            Tbl_researcher.denied_blocks.through(tbl_researcher_id=researcher.pk, tbl_observing_block_id=block.pk)
+            for researcher in researchers if researcher.role == 'collaborator'
+            for block in rng.sample(blocks, min(rng.randint(0, 3), len(blocks)))
+        ])
+        report(f"{len(runs)} observing runs, {len(blocks)} observing blocks")
+
+        target_objects = []
+        for i in range(targets):
+            name = f"{p}Target {i:07d}"
+            safe_name = sanitize_filename(name)
+            right_ascension, declination = random_position(rng)
+            target = Tbl_target(
+                name=name,
+                type=rng.choice(('galaxy', 'galaxy', 'galaxy', 'calibration', 'other')),
+                right_ascension=right_ascension,
+                declination=declination,
+                magnitude=round(rng.uniform(10, 24), 2),
+                redshift_value=round(rng.uniform(0, 0.1), 5),
+                size=round(rng.uniform(1, 600), 1),
+                semester=rng.choice(('2024A', '2024B', '2025A', '2025B')),
+                image=os.path.join(safe_name, "image"),
+                datafiles_path=os.path.join(safe_name, "datafiles"))
+            target.update_coordinates()
+            target_objects.append(target)
+        target_objects = _bulk(Tbl_target, target_objects)
+
+        # Each target is observed in one or two blocks
+        _bulk(Tbl_observing_block.target.through, [
+            Tbl_observing_block.target.through(tbl_observing_block_id=block.pk, tbl_target_id=target.pk)
+            for target in target_objects
+            for block in rng.sample(blocks, rng.randint(1, min(2, len(blocks))))
+        ])
+        report(f"{len(target_objects)} targets")
+
+        # Data files: manifest entries and, optionally, the files themselves
+        payload = bytes(rng.getrandbits(8) for _ in range(DATAFILE_SIZE))
+        datafiles = []
+        storage = get_storage()
+        for target in target_objects:
+            if write_files:
+                storage.makedirs(target.datafiles_path)
+                storage.makedirs(target.image)
+            for j in range(files_per_target):
+                filename = f"frame_{j:03d}.fits"
+                mtime = 0.0
+                if write_files:
+                    path = os.path.join(target.datafiles_path, filename)
+                    storage.write(path, [payload])
+                    mtime = storage.stat(path).mtime
+                datafiles.append(Tbl_datafile(target=target, name=filename, size=DATAFILE_SIZE, mtime=mtime))
+        _bulk(Tbl_datafile, datafiles)
+        report(f"{len(datafiles)} data files")
+
+        bump_data_version_on_commit()
+
+    refresh_all()
+    report("Visibility refreshed")
+
+
+# Remove every generated object and the generated folders of the media storage
+def clear_catalogue():
+    p = SYNTHETIC_PREFIX
+    folders = [
+        sanitize_filename(name)
+        for name in Tbl_target.objects.filter(name__startswith=p).values_list('name', flat=True)
+    ]
+
+    with transaction.atomic():
+        # Children first (protected foreign keys); querysets delete without
+        # calling Tbl_target.delete(), the folders are removed below
+        Tbl_observing_block.objects.filter(name__startswith=p).delete()
+        Tbl_observing_run.objects.filter(name__startswith=p).delete()
+        Tbl_target.objects.filter(name__startswith=p).delete()
+        Tbl_instrument.objects.filter(name__startswith=p).delete()
+        Tbl_telescope.objects.filter(name__startswith=p).delete()
+        Tbl_observatory.objects.filter(name__startswith=p).delete()
+        Tbl_researcher.objects.filter(name__startswith=p).delete()  # also deletes their users
+        User.objects.filter(username__startswith=p).delete()
+        Group.objects.filter(name__startswith=p).delete()
+
+    storage = get_storage()
+    for folder in folders:
+        token = storage.trash_folder(folder)
+        if token:
+            storage.purge(token)
+    return len(folders)
@@ -1,9 +1,14 @@
 """
-Custom template tags for generating HTML titles in the Dwarfs4MOSAIC project.
-Each function returns a formatted title string for different entities.
+Custom template tags for the Dwarfs4MOSAIC project:
+- HTML titles: each function returns a formatted title string for different entities.
+- Target thumbnails: responsive <picture> elements for target images.
 """
 
 from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_WIDTHS, thumbnail_url, thumbnails_ready
 
 # Register a new template library
 register = template.Library()
@@ -29,4 +34,37 @@ def html_telescope_title(telescope_name):
 @register.simple_tag
 def html_observing_run_title(observing_run_name):
     base_title = f"Observing Run: {observing_run_name}"
-    return html_title(base_title)
\ No newline at end of file
+    return html_title(base_title)
+
+# Responsive thumbnail of a target image, displayed 'width' pixels wide.
+# Renders a <picture> with WebP and JPEG srcsets of the cached thumbnails, so
+# the browser downloads the smallest file matching the screen density.
+# Falls back to the original image while its thumbnails are being built or if
+# it cannot be thumbnailed (and to the placeholder if the target has no image).
+# Images are lazy-loaded by default.
+@register.simple_tag
+def target_thumbnail(target, width=150, lazy=True):
+    loading = "lazy" if lazy else "eager"
+
+    if not target.image_name:
+        return format_html(
+            '<img src="{}" alt="No image available" style="width: {}px;" loading="{}">',
+            static('dwarfs4MOSAIC/images/no_image.jpg'), width, loading)
+
+    if not thumbnails_ready(target.image):
+        return format_html(
+            '<img src="{}" alt="{}" style="width: {}px;" loading="{}">',
+            target.image_url, target.name, width, loading)
+
+    def srcset(extension):
+        return ", ".join(f"{thumbnail_url(target.image, w, extension)} {w}w" for w in THUMBNAIL_WIDTHS)
+
+    (webp, _, _), (jpeg, _, _) = THUMBNAIL_FORMATS
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}px">'
+        '<img src="{}" srcset="{}" sizes="{}px" alt="{}" style="width: {}px;" loading="{}" decoding="async">'
+        '</picture>',
+        srcset(webp), width,
+        thumbnail_url(target.image, THUMBNAIL_WIDTHS[0], jpeg), srcset(jpeg), width,
+        target.name, width, loading)
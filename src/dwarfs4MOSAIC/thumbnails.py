@@ -0,0 +1,178 @@
+"""
+Thumbnails of target images.
+
+Pages show target images at small sizes, so downloading the full-resolution
+uploads is wasteful. Derivatives at THUMBNAIL_WIDTHS are generated in WebP
+and JPEG with Pillow and cached next to the original image, in a hidden
+'.thumbs' folder:
+
+    <target>/image/galaxy.png
+    <target>/image/.thumbs/galaxy-150.webp, galaxy-150.jpg, ...
+
+Images and thumbnails are read and written through the media storage (see
+storage.py).
+
+They are generated when an image is uploaded in the admin. The state of the
+thumbnails of each image ('ready', 'pending' or 'failed') is kept in the
+'thumbnails' cache, so rendering a page does not touch the storage for every
+row (see thumbnails_ready). Missing or outdated thumbnails are rebuilt by a
+'build_thumbnails' background job, queued when a page first needs them or by
+the 'thumbnails' management command. Until then the original image is shown.
+The {% target_thumbnail %} template tag renders them with srcset.
+"""
+
+# Standard libraries
+import hashlib
+import io
+import os
+from urllib.parse import quote
+
+# Third-party libraries
+from django.conf import settings
+from django.core.cache import caches
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Local application imports
+from .storage import get_storage
+
+# Widths (pixels) of the generated thumbnails
+THUMBNAIL_WIDTHS = (150, 300, 600)
+
+# Generated formats: (file extension, Pillow format, save options)
+THUMBNAIL_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+# Folder of the thumbnails, inside the image folder
+THUMBNAIL_DIR = '.thumbs'
+
+# Cache alias of the thumbnail states (see CACHES in settings.py)
+THUMBNAIL_CACHE = 'thumbnails'
+
+# States of the thumbnails of an image
+READY, PENDING, FAILED = 'ready', 'pending', 'failed'
+
+
+# Cache key of the thumbnail state of an image
+def _state_key(image):
+    return 'thumbnails:' + hashlib.sha1(image.encode()).hexdigest()
+
+
+# Record the thumbnail state of an image
+def _set_state(image, state):
+    caches[THUMBNAIL_CACHE].set(_state_key(image), state)
+
+
+# Name (in the media storage) of one thumbnail of an image
+def thumbnail_name(image, width, extension):
+    folder, filename = os.path.split(image)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, THUMBNAIL_DIR, f"{stem}-{width}.{extension}")
+
+
+# URL of one thumbnail of an image
+def thumbnail_url(image, width, extension):
+    return settings.MEDIA_URL + quote(thumbnail_name(image, width, extension).replace(os.sep, '/'))
+
+
+# Generate every thumbnail of an image (name in the media storage).
+# Returns False if the file is not an image Pillow can read.
+def generate_thumbnails(image):
+    storage = get_storage()
+    try:
+        with storage.open(image) as source:
+            # Pillow needs a seekable file: objects of an object store are read in memory
+            with Image.open(source if storage.local else io.BytesIO(source.read())) as original:
+                original = ImageOps.exif_transpose(original)
+                original.load()
+    except (OSError, UnidentifiedImageError):
+        _set_state(image, FAILED)
+        return False
+
+    if original.mode not in ('RGB', 'RGBA'):
+        transparent = 'A' in original.getbands() or 'transparency' in original.info
+        original = original.convert('RGBA' if transparent else 'RGB')
+
+    for width in THUMBNAIL_WIDTHS:
+        # Never upscale: small originals are only re-encoded
+        resized = original
+        if original.width > width:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+
+        for extension, image_format, options in THUMBNAIL_FORMATS:
+            if image_format == 'JPEG' and resized.mode != 'RGB':
+                to_save = resized.convert('RGB')
+            else:
+                to_save = resized
+
+            encoded = io.BytesIO()
+            to_save.save(encoded, image_format, **options)
+            storage.write(thumbnail_name(image, width, extension), [encoded.getvalue()])  # readers never see a partial file
+    _set_state(image, READY)
+    return True
+
+
+# Whether the thumbnails of an image exist and are not older than the image.
+# Only one thumbnail is checked: all of them are written together.
+# Returns None if the image itself is missing.
+def thumbnails_current(image):
+    storage = get_storage()
+    marker = thumbnail_name(image, THUMBNAIL_WIDTHS[-1], THUMBNAIL_FORMATS[-1][0])
+    try:
+        source_mtime = storage.stat(image).mtime
+    except OSError:
+        return None
+
+    try:
+        return storage.stat(marker).mtime >= source_mtime
+    except OSError:
+        return False
+
+
+# Whether the thumbnails of an image can be shown, answered from the
+# 'thumbnails' cache. On a miss the storage is checked once; missing or
+# outdated thumbnails are queued for a background rebuild (once, while
+# 'pending') and False is returned meanwhile.
+def thumbnails_ready(image):
+    cache = caches[THUMBNAIL_CACHE]
+    key = _state_key(image)
+    state = cache.get(key)
+    if state is not None:
+        return state == READY
+
+    current = thumbnails_current(image)
+    if current is None:
+        cache.set(key, FAILED)
+        return False
+    if current:
+        cache.set(key, READY)
+        return True
+
+    if cache.add(key, PENDING):
+        from .jobs import enqueue  # jobs.py imports this module
+        enqueue('build_thumbnails', description=f"Build the thumbnails of {image}", params={'images': [image]})
+    return False
+
+
+# Rebuild the thumbnails of an image if they are missing or outdated (always
+# with 'force') and record their state. Returns 'built', 'current' or 'failed'.
+def refresh_thumbnails(image, force=False):
+    current = thumbnails_current(image)
+    if current is None:
+        _set_state(image, FAILED)
+        return FAILED
+    if current and not force:
+        _set_state(image, READY)
+        return 'current'
+    return 'built' if generate_thumbnails(image) else FAILED
+
+
+# Remove the thumbnails of an image
+def delete_thumbnails(image):
+    storage = get_storage()
+    for width in THUMBNAIL_WIDTHS:
+        for extension, _, _ in THUMBNAIL_FORMATS:
+            storage.delete(thumbnail_name(image, width, extension))
+    caches[THUMBNAIL_CACHE].delete(_state_key(image))
@@ -12,7 +12,7 @@ All pages except login/logout require authentication.
 #from django.contrib.auth import views as auth_views  # to reset password
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
-from django.urls import path
+from django.urls import include, path
 
 # Local application imports
 from . import views
@@ -21,6 +21,7 @@ from . import views
 urlpatterns = [
     # Home page - requires login
     path('home/', views.home_view, name='home'),
+    path('home/rows/', login_required(views.home_rows_view), name='home_rows'),
 
     # Login and logout pages using Django's built-in views
     path('login/', LoginView.as_view(template_name='admin/login.html'), name='login'),
@@ -52,10 +53,18 @@ urlpatterns = [
     path('observing_run/<str:observing_run_name>/', login_required(views.observing_run_view), name='observing_run'),
     path('observing_blocks/', login_required(views.observing_blocks_view), name='observing_blocks'),
     path('target/', login_required(views.targets_view), name='targets'),
+    path('target/cone_search/', login_required(views.cone_search_view), name='cone_search'),
 
     # File download for a specific target - requires login
     path('download_files/<int:target_id>/', login_required(views.download_files_view), name='download_files_view'),
+    path('download_files/<int:target_id>/<str:filename>/', login_required(views.download_file_view), name='download_file_view'),
 
 
     path('ajax/get-instrument-choices/', views.ajax_get_instrument_choices, name='ajax_get_instrument_choices'),
+
+    # Per-view metrics (Prometheus text format); access is checked by the view
+    path('metrics/', views.metrics_view, name='metrics'),
+
+    # Read-only JSON API (authentication is handled by REST_FRAMEWORK settings)
+    path('api/', include('dwarfs4MOSAIC.api.urls')),
 ]
@@ -5,27 +5,20 @@ Provides reusable helper functions for common backend tasks.
 """
 
 # Standard libraries
-import os
 import re
 import unicodedata
 
-# Third-party libraries
-from django.conf import settings
+# Local application imports
+from .storage import get_storage
 
 
-# List files inside a directory relative to MEDIA_ROOT.
-# Returns a list of filenames or empty list if directory does not exist.
+# List files inside a folder of the media storage.
+# Returns a list of filenames or empty list if the folder does not exist.
 def get_files(path):
     if not path:
         return []
 
-    full_path = os.path.join(settings.MEDIA_ROOT, path)
-
-    try:
-        files = os.listdir(full_path)
-        return files
-    except FileNotFoundError:
-        return []
+    return [info.name for info in get_storage().listdir(path)]
 
 # Sanitize a filename by:
 # - Removing accents and special Unicode characters.
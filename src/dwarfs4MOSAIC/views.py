@@ -4,91 +4,153 @@ Views for the dwarfs4MOSAIC web interface.
 This module provides page rendering and logic for:
 - Viewing all tables (targets, observatories, telescopes, etc.)
 - Navigating between related entities
-- Downloading data files (individually or as ZIP)
+- Downloading data files (individually or as a streamed ZIP)
 """
 
 # Standard libraries
 import os
+import posixpath
 import re
-import tempfile
-import zipfile
+from urllib.parse import urlencode
 
 # Third-party libraries
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import Group, User
-from django.db.models import Prefetch
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Prefetch, Q
 from django.db.models.functions import Lower
-from django.http import FileResponse, JsonResponse
-from django.shortcuts import render, redirect
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 
 # Local application imports
 from . import models
-from .utils import get_files, sanitize_filename
+from .downloads import send_file, zip_response
+from .forms import ConeSearchForm
+from .fragment_cache import cached_fragment
+from .instrumentation import metrics_text
+from .models.tbl_target import HOME_DEC_KEY, HOME_RA_KEY
+from .spatial import cone_search
+from .storage import clean_name, get_storage
+from .thumbnails import THUMBNAIL_DIR
+from .utils import sanitize_filename
+from .visibility import visible_blocks, visible_targets
+
+# Number of target rows rendered by the home page and by each further chunk
+HOME_PAGE_SIZE = 50
+
+# Targets of the home page, in (RA, Dec) order with their visible blocks and data files.
+# Missing coordinates sort first (see HOME_RA_KEY); the id makes the order total
+# so rows can be paged with a keyset ('after' = ra_key, dec_key and id of the last row).
+def home_targets(user, after=None):
+    targets = (
+        visible_targets(user)
+        .annotate(
+            ra_key=HOME_RA_KEY,
+            dec_key=HOME_DEC_KEY)
+        .prefetch_related(
+            Prefetch(
+                'observing_blocks',
+                queryset=visible_blocks(user).select_related('obs_run__instrument')),
+            'manifest_files')
+        .order_by('ra_key', 'dec_key', 'id')
+    )
 
-# Home page showing all targets and their files for authenticated users
+    if after is not None:
+        ra_key, dec_key, pk = after
+        targets = targets.filter(
+            Q(ra_key__gt=ra_key)
+            | Q(ra_key=ra_key, dec_key__gt=dec_key)
+            | Q(ra_key=ra_key, dec_key=dec_key, id__gt=pk))
+    return targets
+
+# Build the home table rows: each target with its files, unique runs and unique instruments
+def home_rows(targets):
+    lst_targets_and_files = []
+
+    for target in targets:
+        # Get list of files for the target from the datafile manifest
+        files = [datafile.name for datafile in target.manifest_files.all()]
+
+        # Remove duplicate observing runs for this target
+        seen_runs = set() # Set to track already added obs_run
+        unique_runs = []  # Final list of unique obs_run objects
+
+        for block in target.observing_blocks.all():
+            run = block.obs_run
+            key = str(run)
+            if key not in seen_runs:
+                seen_runs.add(key)
+                unique_runs.append(run)
+
+        # Remove duplicate instruments from the unique observing runs
+        seen_instruments = set()  # Set to track already added instruments
+        unique_instruments = []   # Final list of unique instrument objects
+        for run in unique_runs:
+            instr = run.instrument
+            key = str(instr)
+            if key not in seen_instruments:
+                seen_instruments.add(key)
+                unique_instruments.append(instr)
+
+        # Add target info and related data to the context list
+        lst_targets_and_files.append({
+            'target': target,
+            'files': files,
+            'unique_obs_runs': unique_runs,
+            'unique_instruments': unique_instruments,
+        })
+
+    return lst_targets_and_files
+
+# Render one chunk of home rows. Returns the rows HTML and the URL of the next chunk
+# (None at the end). Chunks are cached per visibility class and data version
+# (see fragment_cache.py), so most page loads do not touch the targets tables.
+def home_chunk(request, after=None):
+    def build():
+        targets = list(home_targets(request.user, after)[:HOME_PAGE_SIZE + 1])
+
+        next_url = None
+        if len(targets) > HOME_PAGE_SIZE:
+            targets = targets[:HOME_PAGE_SIZE]
+            last = targets[-1]
+            next_url = reverse('home_rows') + '?' + urlencode({'after': f"{last.ra_key!r},{last.dec_key!r},{last.id}"})
+
+        return render_home_rows(request, home_rows(targets)), next_url
+
+    return cached_fragment('home_rows', request.user, after, build)
+
+# Render every home row at once (page without JavaScript)
+def home_all(request):
+    def build():
+        return render_home_rows(request, home_rows(home_targets(request.user))), None
+
+    return cached_fragment('home_rows', request.user, 'all', build)
+
+# HTML of home table rows
+def render_home_rows(request, lst_targets_and_files):
+    return render_to_string(
+        'dwarfs4MOSAIC/home_rows.html',
+        {'lst_targets_and_files': lst_targets_and_files},
+        request=request)
+
+# Home page showing the targets and their files for authenticated users.
+# The first HOME_PAGE_SIZE rows are rendered with the page; the following ones are
+# fetched in chunks from home_rows_view while the user scrolls ('?all=1' renders everything).
 def home_view(request):
     context = {}
     if request.user.is_authenticated:
-        if request.user.is_superuser or request.user.researcher.role == "core_team":
-            # If user is admin or core team, show all targets with related data
-            lst_targets = (
-                models.Tbl_target.objects
-                .prefetch_related('observing_blocks__obs_run__instrument')
-                .distinct()
-                .order_by('right_ascension_hours', 'declination_deg')
-            )
-
+        if request.GET.get('all'):
+            rows_html, next_url = home_all(request)
         else:
-            # For collaborators, filter targets by allowed groups and exclude denied blocks
-            denied_blocks = request.user.researcher.denied_blocks.all()
-
-            lst_targets = (
-                models.Tbl_target.objects
-                .filter(observing_blocks__allowed_groups__in=request.user.groups.all())
-                .exclude(observing_blocks__in=denied_blocks)
-                .prefetch_related('observing_blocks__obs_run__instrument')
-                .distinct()
-                .order_by('right_ascension_hours', 'declination_deg')
-            )
-
-        lst_targets_and_files = []
-
-        for target in lst_targets:
-            # Get list of files for the target if datafiles_path is set
-            files = get_files(target.datafiles_path) if target.datafiles_path else []
-
-            # Remove duplicate observing runs for this target
-            seen_runs = set() # Set to track already added obs_run
-            unique_runs = []  # Final list of unique obs_run objects
-
-            for block in target.observing_blocks.all():
-                run = block.obs_run
-                key = str(run)
-                if key not in seen_runs:
-                    seen_runs.add(key)
-                    unique_runs.append(run)
-
-            # Remove duplicate instruments from the unique observing runs
-            seen_instruments = set()  # Set to track already added instruments
-            unique_instruments = []   # Final list of unique instrument objects
-            for run in unique_runs:
-                instr = run.instrument
-                key = str(instr)
-                if key not in seen_instruments:
-                    seen_instruments.add(key)
-                    unique_instruments.append(instr)
-
-            # Add target info and related data to the context list
-            lst_targets_and_files.append({
-                'target': target,
-                'files': files,
-                'unique_obs_runs': unique_runs,
-                'unique_instruments': unique_instruments,
-            })
+            rows_html, next_url = home_chunk(request)
 
         context['authenticated'] = True
-        context['lst_targets_and_files'] = lst_targets_and_files
+        context['rows_html'] = rows_html
+        context['next_rows_url'] = next_url
     else:
         # User not authenticated
         context['authenticated'] = False
@@ -96,6 +158,18 @@ def home_view(request):
     # Render the home page template with context
     return render(request, 'dwarfs4MOSAIC/home.html', context)
 
+# Next chunk of home table rows, as an HTML fragment of <tr> elements in JSON,
+# with the URL of the following chunk ('next' is null after the last one)
+def home_rows_view(request):
+    try:
+        ra_key, dec_key, pk = request.GET['after'].split(',')
+        after = (float(ra_key), float(dec_key), int(pk))
+    except (KeyError, ValueError):
+        return JsonResponse({'error': "Invalid 'after' parameter."}, status=400)
+
+    rows_html, next_url = home_chunk(request, after)
+    return JsonResponse({'html': rows_html, 'next': next_url})
+
 # Info page showing any information relative to the platform
 
 # Path to the HTML file
@@ -145,7 +219,9 @@ def groups_view(request):
         # Order observing blocks inside each group
             Prefetch(
                 'allowed_blocks',
-                queryset=models.Tbl_observing_block.objects.order_by(Lower('name'), 'name'))
+                queryset=models.Tbl_observing_block.objects
+                .select_related('obs_run__instrument')  # detailed_name
+                .order_by(Lower('name'), 'name'))
         )
         # Order table rows (by group name)
         .order_by(Lower("name"), 'name')
@@ -295,52 +371,64 @@ def observing_blocks_view(request):
 def targets_view(request):
     lst_targets = (
         models.Tbl_target.objects
+        .prefetch_related(
+            Prefetch(
+                'observing_blocks',
+                queryset=models.Tbl_observing_block.objects.select_related('obs_run__instrument')))
         .order_by('right_ascension_hours', 'declination_deg')
     )
 
     return render(request, 'dwarfs4MOSAIC/targets.html', {
         'lst_targets': lst_targets})
 
+# Cone search: targets within a radius of a position, closest first
+def cone_search_view(request):
+    form = ConeSearchForm(request.GET or None)
+    matches = None
+
+    if form.is_valid():
+        matches = cone_search(
+            visible_targets(request.user),
+            form.cleaned_data['ra'],
+            form.cleaned_data['dec'],
+            form.cleaned_data['radius'] / 3600)
+
+    return render(request, 'dwarfs4MOSAIC/cone_search.html', {
+        'form': form,
+        'lst_matches': matches})
+
 # Allow download of one or multiple files for a target
-# - Single file served directly
-# - Multiple files compressed into a ZIP archive
+# - Single file redirected to download_file_view
+# - Multiple files streamed as a ZIP archive
 def download_files_view(request, target_id):
-    # Try to get the target by primary key, returns None if not found
-    target = models.Tbl_target.objects.filter(pk=target_id).first()
+    # Try to get the target by primary key among the targets visible to the user,
+    # returns None if not found or not allowed
+    target = visible_targets(request.user).filter(pk=target_id).first()
 
-    # Get files and size only if target exists and has a datafiles_path, else empty list
+    # Get files and size from the datafile manifest only if target exists, else empty list
     files = []
 
-    if target and target.datafiles_path:
-        source_dir = os.path.join(settings.MEDIA_ROOT, target.datafiles_path)
-        filenames = get_files(target.datafiles_path)
+    if target:
+        files = [{'name': datafile.name, 'size': datafile.size}
+                 for datafile in target.manifest_files.all()]
 
-        for filename in filenames:
-            file_path = os.path.join(source_dir, filename)
-            if os.path.isfile(file_path):
-                size_bytes = os.path.getsize(file_path)
-                files.append({'name': filename, 'size': size_bytes})
-
-    if request.method == "POST":
+    if request.method == "POST" and target:
         selected_files = request.POST.getlist('checkbox_single[]')
-        source_dir = os.path.join(settings.MEDIA_ROOT, target.datafiles_path)
 
-        # Serve a single selected file
+        # Serve a single selected file through its own GET URL,
+        # so that browsers can resume and revalidate the download
         if len(selected_files) == 1:
             filename = os.path.basename(selected_files[0])
-            filepath = os.path.join(source_dir, sanitize_filename(filename))
-            if not os.path.exists(filepath):
-                messages.error(request, "File not found.")
-            return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename)
-
-        # Create a ZIP file for multiple selected files
-        tmp_zip = tempfile.NamedTemporaryFile(suffix=".zip", delete=False)
-        with zipfile.ZipFile(tmp_zip.name, 'w') as zipf:
-            for fname in selected_files:
-                safe_name = os.path.basename(fname)
-                full_path = os.path.join(source_dir, safe_name)
-                if os.path.exists(full_path):
-                    zipf.write(full_path, arcname=safe_name)  # Add file without folder structure
+            if target.manifest_files.filter(name=filename).exists():
+                return redirect('download_file_view', target_id=target.pk, filename=filename)
+            messages.error(request, "File not found.")
+            return redirect('download_files_view', target_id=target.pk)
+
+        # Stream a ZIP archive for multiple selected files (built on the fly, no temporary file)
+        zip_files = []
+        for fname in selected_files:
+            safe_name = os.path.basename(fname)
+            zip_files.append((safe_name, posixpath.join(target.datafiles_path, safe_name)))  # Add file without folder structure
 
         # Define the ZIP file name
         if hasattr(target, 'name'):
@@ -350,7 +438,7 @@ def download_files_view(request, target_id):
             zip_filename = "files.zip"
 
         # Serve the ZIP archive for download
-        return FileResponse(open(tmp_zip.name, 'rb'), as_attachment=True, filename=zip_filename)
+        return zip_response(zip_files, zip_filename)
 
     # Render the file selection page
     return render(request, 'dwarfs4MOSAIC/download_files.html', {
@@ -360,6 +448,46 @@ def download_files_view(request, target_id):
         'btn_download_tooltip': 'Download selected files',
     })
 
+# Serve one data file of a target.
+# Supports Range/If-Range and conditional GET so interrupted downloads can be
+# resumed and repeated downloads revalidated instead of transferred again.
+def download_file_view(request, target_id, filename):
+    target = get_object_or_404(visible_targets(request.user), pk=target_id)
+    datafile = get_object_or_404(target.manifest_files, name=filename)
+
+    name = posixpath.join(target.datafiles_path, datafile.name)
+    if not get_storage().exists(name):
+        raise Http404("File not found.")
+
+    return send_file(request, name, datafile.name, checksum=datafile.checksum)
+
+# Serve a file of the media storage (target images and data files).
+# Any authenticated user may see target images (as in targets_view),
+# but data files are only served for targets visible to the user.
+# Hidden folders (blob store, trash, upload staging) are never served, except
+# the thumbnails of the images.
+# The bytes are sent by the configured backend (see downloads.send_file).
+def media_view(request, path):
+    try:
+        name = clean_name(path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+
+    parts = name.split('/')
+    if any(part.startswith('.') and part != THUMBNAIL_DIR for part in parts):
+        raise Http404("File not found.")
+
+    # Data files live in <target folder>/datafiles/
+    if len(parts) > 2 and parts[1] == 'datafiles':
+        datafiles_path = os.path.join(parts[0], parts[1])
+        if not visible_targets(request.user).filter(datafiles_path=datafiles_path).exists():
+            raise Http404("File not found.")
+
+    if not get_storage().exists(name):
+        raise Http404("File not found.")
+
+    return send_file(request, name, parts[-1], as_attachment=False)
+
 # Return filters and configurations from the instrument of the given observing_run
 def ajax_get_instrument_choices(request):
 
@@ -376,4 +504,15 @@ def ajax_get_instrument_choices(request):
         except models.Tbl_observing_run.DoesNotExist:
             pass
 
-    return JsonResponse(data)
\ No newline at end of file
+    return JsonResponse(data)
+
+
+# Per-view metrics of this process in the Prometheus text format (see instrumentation.py).
+# Available to staff users, or to scrapers sending 'Authorization: Bearer <METRICS_TOKEN>'.
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not request.user.is_staff and not (token and constant_time_compare(authorization, f"Bearer {token}")):
+        raise Http404("Page not found.")
+
+    return HttpResponse(metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
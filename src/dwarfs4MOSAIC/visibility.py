@@ -0,0 +1,179 @@
+"""
+Precomputed visibility of observing blocks and targets.
+
+Superusers and core team members see every block and target. For collaborators
+the answer depends on their groups, the groups allowed on each block and the
+blocks explicitly denied to them. Instead of resolving those joins on every
+page load, the result is materialized in Tbl_visible_block and
+Tbl_visible_target, so views only need one indexed lookup on the user.
+
+The signal handlers in signals.py call refresh_users() whenever one of the
+inputs changes. The 'rebuild_visibility' management command rebuilds
+everything from scratch.
+"""
+
+# Standard libraries
+from collections import defaultdict
+
+# Third-party libraries
+from django.contrib.auth.models import User
+from django.db import transaction
+
+# Local application imports
+from .models import (
+    Tbl_observing_block,
+    Tbl_researcher,
+    Tbl_target,
+    Tbl_visible_block,
+    Tbl_visible_target,
+)
+
+# Number of users refreshed per batch (keeps IN clauses below SQLite limits)
+REFRESH_BATCH_SIZE = 500
+
+
+# Return True if the user may see every target and observing block
+def sees_everything(user):
+    if user.is_superuser:
+        return True
+
+    # Anonymous users and users without a linked researcher have no role
+    researcher = getattr(user, "researcher", None)
+    return researcher is not None and researcher.role == "core_team"
+
+
+# Observing blocks the user may see
+def visible_blocks(user):
+    blocks = Tbl_observing_block.objects.all()
+    if sees_everything(user):
+        return blocks
+    return blocks.filter(visible_to__user=user)
+
+
+# Targets the user may see
+def visible_targets(user):
+    targets = Tbl_target.objects.all()
+    if sees_everything(user):
+        return targets
+    return targets.filter(visible_to__user=user)
+
+
+# Compute the visible (user_id, block_id) and (user_id, target_id) pairs
+# for the given collaborators.
+# - A block is visible if one of its allowed groups contains the user
+#   and the block is not denied to the user.
+# - A target is visible if it has a visible block and none of its blocks
+#   is denied to the user (data files are stored per target).
+def _compute_rows(user_ids):
+    membership = User.groups.through.objects
+    allowed_groups = Tbl_observing_block.allowed_groups.through.objects
+    denied_blocks = Tbl_researcher.denied_blocks.through.objects
+    block_targets = Tbl_observing_block.target.through.objects
+
+    groups_by_user = defaultdict(set)
+    for user_id, group_id in (membership
+                              .filter(user_id__in=user_ids)
+                              .values_list("user_id", "group_id")):
+        groups_by_user[user_id].add(group_id)
+
+    blocks_by_group = defaultdict(set)
+    all_groups = set().union(*groups_by_user.values())
+    for block_id, group_id in (allowed_groups
+                               .filter(group_id__in=all_groups)
+                               .values_list("tbl_observing_block_id", "group_id")):
+        blocks_by_group[group_id].add(block_id)
+
+    denied_by_user = defaultdict(set)
+    for user_id, block_id in (denied_blocks
+                              .filter(tbl_researcher__user_id__in=user_ids)
+                              .values_list("tbl_researcher__user_id", "tbl_observing_block_id")):
+        denied_by_user[user_id].add(block_id)
+
+    allowed_by_user = {
+        user_id: set().union(*(blocks_by_group[g] for g in groups))
+        for user_id, groups in groups_by_user.items()
+    }
+
+    targets_by_block = defaultdict(set)
+    all_blocks = set().union(*allowed_by_user.values(), *denied_by_user.values())
+    for block_id, target_id in (block_targets
+                                .filter(tbl_observing_block_id__in=all_blocks)
+                                .values_list("tbl_observing_block_id", "tbl_target_id")):
+        targets_by_block[block_id].add(target_id)
+
+    block_rows = []
+    target_rows = []
+    for user_id, allowed in allowed_by_user.items():
+        denied = denied_by_user.get(user_id, set())
+
+        for block_id in allowed - denied:
+            block_rows.append(Tbl_visible_block(user_id=user_id, observing_block_id=block_id))
+
+        targets = set().union(*(targets_by_block[b] for b in allowed))
+        hidden = set().union(*(targets_by_block[b] for b in denied))
+        for target_id in targets - hidden:
+            target_rows.append(Tbl_visible_target(user_id=user_id, target_id=target_id))
+
+    return block_rows, target_rows
+
+
+# Rebuild the stored visibility of the given users.
+# Users who see everything keep no rows: their queries are not filtered.
+def refresh_users(user_ids):
+    user_ids = [pk for pk in set(user_ids) if pk is not None]
+
+    for start in range(0, len(user_ids), REFRESH_BATCH_SIZE):
+        batch = user_ids[start:start + REFRESH_BATCH_SIZE]
+
+        collaborators = list(
+            User.objects
+            .filter(pk__in=batch, is_superuser=False)
+            .exclude(researcher__role="core_team")
+            .values_list("pk", flat=True)
+        )
+        block_rows, target_rows = _compute_rows(collaborators)
+
+        with transaction.atomic():
+            Tbl_visible_block.objects.filter(user_id__in=batch).delete()
+            Tbl_visible_target.objects.filter(user_id__in=batch).delete()
+            Tbl_visible_block.objects.bulk_create(block_rows, batch_size=REFRESH_BATCH_SIZE)
+            Tbl_visible_target.objects.bulk_create(target_rows, batch_size=REFRESH_BATCH_SIZE)
+
+
+# Rebuild the stored visibility of every user
+def refresh_all():
+    refresh_users(User.objects.values_list("pk", flat=True))
+
+
+# Users whose visibility depends on the given observing blocks
+# (currently allowed, previously allowed or denied)
+def users_for_blocks(block_ids):
+    block_ids = [pk for pk in block_ids if pk is not None]
+    if not block_ids:
+        return set()
+
+    user_ids = set(
+        Tbl_visible_block.objects
+        .filter(observing_block_id__in=block_ids)
+        .values_list("user_id", flat=True)
+    )
+    user_ids |= set(
+        User.objects
+        .filter(groups__allowed_blocks__in=block_ids)
+        .values_list("pk", flat=True)
+    )
+    user_ids |= set(
+        Tbl_researcher.objects
+        .filter(denied_blocks__in=block_ids, user__isnull=False)
+        .values_list("user_id", flat=True)
+    )
+    return user_ids
+
+
+# Users belonging to the given groups
+def users_for_groups(group_ids):
+    return set(
+        User.objects
+        .filter(groups__in=group_ids)
+        .values_list("pk", flat=True)
+    )
@@ -1,16 +1,58 @@
 """
-Middleware to safely handle session interruptions.
-If a session expires, the user is notified and redirected to the login page.
+Project middleware.
+
+- SafeSessionMiddleware: safely handles session interruptions.
+  If a session expires, the user is notified and redirected to the login page.
+  It also refreshes the sliding expiry of sessions at most once every
+  SESSION_REFRESH_INTERVAL seconds instead of saving them on every request.
+- InstrumentationMiddleware: measures the SQL queries, template rendering and
+  media storage calls of each view, streamed content included (see
+  dwarfs4MOSAIC/instrumentation.py), adds a Server-Timing header for staff users
+  and checks the per-view query budgets.
+- OffloadEmulationMiddleware: local stand-in for nginx/Apache that serves
+  X-Accel-Redirect and X-Sendfile responses, so the offload backends can be
+  tested without a front-end web server.
 """
 
+# Standard libraries
+import os
+import time
+from contextlib import ExitStack, contextmanager
+
 # Third-party libraries
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.sessions.exceptions import SessionInterrupted
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import Http404
 from django.shortcuts import redirect
 
+# Local application imports
+from dwarfs4MOSAIC.downloads import internal_name, serve_file
+from dwarfs4MOSAIC.instrumentation import RequestStats, check_budget, current_stats, install, record
+from dwarfs4MOSAIC.storage import get_storage
+
+# Session key of the last time the session expiry was refreshed
+SESSION_REFRESHED_KEY = '_refreshed_at'
+
+
 # Custom middleware that extends Django's SessionMiddleware
 class SafeSessionMiddleware(SessionMiddleware):
+    # Sessions are saved when modified and, to keep the idle timeout sliding,
+    # when their expiry was last refreshed more than SESSION_REFRESH_INTERVAL
+    # seconds ago (instead of SESSION_SAVE_EVERY_REQUEST, which writes on every hit)
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        interval = getattr(settings, 'SESSION_REFRESH_INTERVAL', None)
+        if (interval is not None and session is not None and session.accessed
+                and not session.modified and not session.is_empty()):
+            now = int(time.time())
+            if now - session.get(SESSION_REFRESHED_KEY, 0) >= interval:
+                session[SESSION_REFRESHED_KEY] = now
+        return super().process_response(request, response)
+
     # Handle exceptions raised during the request
     def process_exception(self, request, exception):
         # If the session was interrupted, notify the user and redirect to login page
@@ -18,4 +60,104 @@ class SafeSessionMiddleware(SessionMiddleware):
             messages.warning(request, "Your session has expired. Please log in again.")
             return redirect('/admin/login/')
         # For all other exceptions, let Django handle them normally
-        return None
\ No newline at end of file
+        return None
+
+
+# Middleware measuring each request and adding the totals to those of its view
+# (only when INSTRUMENTATION_ENABLED is True). It should come first in MIDDLEWARE.
+# The Server-Timing header is only sent to staff users; it covers the response
+# up to its first byte. Streaming responses (ZIP archives, file downloads) are
+# also measured while their content is sent: their totals are recorded, and
+# their query budget checked, when the response is closed.
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', False):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        with measuring(stats):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = stats.server_timing()
+
+        if not response.streaming:
+            record(view_name, stats, response.status_code)
+            check_budget(view_name, stats)
+            return response
+
+        # Files sent with wsgi.file_wrapper run no queries nor storage calls
+        if getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = measured_content(stats, response.streaming_content)
+
+        close = response.close
+        def close_and_record():
+            try:
+                close()
+            finally:
+                record(view_name, stats, response.status_code)
+                check_budget(view_name, stats)
+        response.close = close_and_record
+        return response
+
+
+# Count the SQL queries and storage calls made in the block in 'stats'
+@contextmanager
+def measuring(stats):
+    token = current_stats.set(stats)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats.execute_wrapper))
+            yield
+    finally:
+        current_stats.reset(token)
+
+
+# Content of a streaming response, each chunk produced while measuring 'stats'
+def measured_content(stats, content):
+    iterator = iter(content)
+    while True:
+        with measuring(stats):
+            chunk = next(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+# Middleware that replaces X-Accel-Redirect/X-Sendfile responses with the file
+# itself, as the front-end web server would (only when FILE_SERVING_EMULATE_OFFLOAD is True).
+class OffloadEmulationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'FILE_SERVING_EMULATE_OFFLOAD', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('X-Accel-Redirect'):
+            name = internal_name(response['X-Accel-Redirect'])
+        elif response.has_header('X-Sendfile'):
+            name = os.path.relpath(response['X-Sendfile'], settings.MEDIA_ROOT)
+        else:
+            return response
+
+        try:
+            if not name or not get_storage().exists(name):
+                raise Http404("Internal location not found.")
+        except SuspiciousFileOperation:
+            raise Http404("Internal location not found.")
+
+        # Serve the file like the web server would, keeping the headers set by Django
+        emulated = serve_file(request, name, os.path.basename(name))
+        for header in ('Content-Type', 'Content-Disposition'):
+            if response.has_header(header):
+                emulated[header] = response[header]
+        return emulated
@@ -43,12 +43,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'dwarfs4MOSAIC.apps.Dwarfs4MOSAICConfig',
 ]
 
 # === Middleware Stack ===
 
 MIDDLEWARE = [
+    'dwarfs4MOSAIC_website.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'dwarfs4MOSAIC_website.middleware.SafeSessionMiddleware', #'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dwarfs4MOSAIC_website.middleware.OffloadEmulationMiddleware',
 ]
 
 # === URL Configuration ===
@@ -90,11 +93,127 @@ WSGI_APPLICATION = 'dwarfs4MOSAIC_website.wsgi.application'
 
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database profile, selected with DJANGO_DB_ENGINE:
+# - 'sqlite' (default): db.sqlite3 (or DJANGO_DB_NAME), tuned for concurrent readers
+#   and one writer: WAL journal, synchronous=NORMAL, memory-mapped reads and a busy
+#   timeout instead of immediate 'database is locked' errors.
+# - 'postgresql': DJANGO_DB_NAME, DJANGO_DB_USER, DJANGO_DB_PASSWORD, DJANGO_DB_HOST,
+#   DJANGO_DB_PORT (requires 'psycopg'). Connections are kept in a psycopg pool
+#   (DJANGO_DB_POOL=1, requires 'psycopg[pool]') or persistent for
+#   DJANGO_DB_CONN_MAX_AGE seconds.
+# An existing SQLite database is copied to PostgreSQL with 'manage.py copy_database'.
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = os.environ.get('DJANGO_DB_POOL', '') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'dwarfs4mosaic'),
+            'USER': os.environ.get('DJANGO_DB_USER', ''),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', ''),
+            'PORT': os.environ.get('DJANGO_DB_PORT', ''),
+            # The pool and persistent connections are mutually exclusive
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE', 10)),
+                    'timeout': 10,
+                },
+            } if DB_POOL else {},
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds to wait for the write lock
+                'timeout': 20,
+                # Writers take the lock when the transaction starts, so they wait
+                # for it instead of failing when upgrading a read lock
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'  # 256 MB
+                    'PRAGMA cache_size=-65536;'    # 64 MB
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
+
+
+# === Cache ===
+
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Cache shared by every worker of the host: files in CACHE_ROOT by default, or
+# Redis if DJANGO_CACHE_REDIS_URL is set (e.g. 'redis://127.0.0.1:6379/1',
+# requires the 'redis' package). With Redis, the aliases share the database and
+# are kept apart by KEY_PREFIX; clearing an alias only deletes its own keys
+# (see cache_backends.RedisCache). Aliases:
+# - 'default': small shared values (e.g. counters)
+# - 'pages': rendered page fragments (see fragment_cache.py)
+# - 'thumbnails': thumbnail metadata
+# - 'sessions': cached copies of the user sessions (see SESSION_ENGINE)
+# The file cache culls entries at random when full: only data that can be
+# rebuilt is kept in it.
+# Usage: python manage.py cache stats | clear [alias ...]
+CACHE_ROOT = os.path.join(BASE_DIR, 'cache')
+CACHE_REDIS_URL = os.environ.get('DJANGO_CACHE_REDIS_URL', '')
+
+CACHE_ALIASES = {
+    # alias: (timeout in seconds, maximum number of entries of the file cache)
+    'default': (300, 1000),
+    'pages': (60 * 60, 10000),
+    'thumbnails': (24 * 60 * 60, 10000),
+    'sessions': (15 * 60, 100000),
+}
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        alias: {
+            'BACKEND': 'dwarfs4MOSAIC.cache_backends.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': alias,
+            'TIMEOUT': timeout,
+        }
+        for alias, (timeout, max_entries) in CACHE_ALIASES.items()
+    }
+else:
+    CACHES = {
+        alias: {
+            'BACKEND': 'dwarfs4MOSAIC.cache_backends.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_ROOT, alias),
+            'TIMEOUT': timeout,
+            'OPTIONS': {'MAX_ENTRIES': max_entries},
+        }
+        for alias, (timeout, max_entries) in CACHE_ALIASES.items()
+    }
+
+
+# === REST API ===
+
+# Read-only API for batch clients: authenticated users only,
+# session login (browser) or HTTP Basic (scripts, over HTTPS)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 
@@ -164,12 +283,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # === Session Settings ===
 
+# Sessions are stored in the database and read through the shared 'sessions'
+# cache, so page views do not query the database for them. The database copy
+# is authoritative: an entry culled from the cache (or 'cache clear sessions')
+# does not log anyone out. Expired rows are removed with 'manage.py clearsessions'.
+# Alternative without server storage:
 #SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
 
 # Idle time before session expires
 SESSION_COOKIE_AGE = 900  # Session timeout in seconds (15 minutes)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True # Session expires when the browser is closed
-SESSION_SAVE_EVERY_REQUEST = True # Save the session on every request
+SESSION_SAVE_EVERY_REQUEST = False # Saved when modified or refreshed (see below)
+
+# The expiry of an active session is refreshed at most once per interval (seconds),
+# by SafeSessionMiddleware: the idle timeout stays sliding, between
+# SESSION_COOKIE_AGE - SESSION_REFRESH_INTERVAL and SESSION_COOKIE_AGE.
+SESSION_REFRESH_INTERVAL = 60
 
 # Optional security settings:
 #SESSION_COOKIE_NAME = 'sessionid'
@@ -182,6 +313,110 @@ SESSION_SAVE_EVERY_REQUEST = True # Save the session on every request
 MEDIA_URL = f'{SUBDIR}/media/' # URL to serve media files
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # Filesystem path where uploaded media files are stored
 
+# Folders of deleted targets are moved here, then removed by the 'purge_trash'
+# background job (see media_folders.py). Must be on the same filesystem as MEDIA_ROOT.
+# Never served: media_view refuses the hidden folders of MEDIA_ROOT, so trashed data
+# files are not downloadable while they wait for removal.
+TRASH_ROOT = os.path.join(MEDIA_ROOT, '.trash')
+
+# === Media Storage ===
+
+# Where the target media (images, thumbnails, data files) are stored (see storage.py):
+# - 'local': files under MEDIA_ROOT
+# - 's3': an S3-compatible object store (AWS S3, MinIO, ...); requires 'boto3'
+#   (pip install .[s3]) and the usual AWS credentials (environment, ~/.aws, IAM role).
+#   Downloads are redirected to presigned URLs valid MEDIA_S3_URL_EXPIRY seconds;
+#   files larger than MEDIA_S3_MULTIPART_SIZE are written with multipart uploads.
+#   The content-addressed data file store and FILE_SERVING_BACKEND require 'local'.
+MEDIA_STORAGE = os.environ.get('DJANGO_MEDIA_STORAGE', 'local')
+MEDIA_S3_BUCKET = os.environ.get('DJANGO_MEDIA_S3_BUCKET', '')
+MEDIA_S3_PREFIX = os.environ.get('DJANGO_MEDIA_S3_PREFIX', '')
+MEDIA_S3_ENDPOINT_URL = os.environ.get('DJANGO_MEDIA_S3_ENDPOINT_URL', '')  # e.g. http://localhost:9000 for MinIO
+MEDIA_S3_REGION = os.environ.get('DJANGO_MEDIA_S3_REGION', '')
+MEDIA_S3_URL_EXPIRY = 3600
+MEDIA_S3_MULTIPART_SIZE = 16 * 1024 * 1024
+
+# === Data File Store ===
+
+# How the data files of the targets are stored (see blob_store.py):
+# - 'folders': each file is stored in the data files folder of its target
+# - 'content': each distinct content is stored once in BLOB_ROOT, named after its
+#   SHA-256, and the target folders hold hardlinks to it (BLOB_ROOT must be on the
+#   same filesystem as MEDIA_ROOT; hidden folders of MEDIA_ROOT are never served by
+#   media_view). Existing files are converted with 'dedupe_datafiles'.
+DATAFILE_STORE = os.environ.get('DJANGO_DATAFILE_STORE', 'folders')
+BLOB_ROOT = os.path.join(MEDIA_ROOT, '.blobs')
+
+# Threads listing the data files folders during manifest rescans (see scanner.py).
+# Listing is I/O bound: more threads hide the latency of network filesystems
+# (NFS, SMB; set e.g. 8) and object stores. A local disk is scanned sequentially.
+SCAN_WORKERS = int(os.environ.get('DJANGO_SCAN_WORKERS', 8 if MEDIA_STORAGE == 's3' else 1))
+
+# === File Serving ===
+
+# Backend used to send data files and media once Django has checked permissions:
+# - 'python': Django streams the bytes itself (development fallback)
+# - 'nginx': X-Accel-Redirect to FILE_SERVING_INTERNAL_URL (an 'internal' location aliased to MEDIA_ROOT)
+# - 'apache': X-Sendfile with the absolute path (requires mod_xsendfile)
+#
+# nginx example:
+#   location /dwarfs4mosaic-data/protected-media/ { internal; alias /path/to/src/media/; }
+FILE_SERVING_BACKEND = os.environ.get('DJANGO_FILE_SERVING_BACKEND', 'python')
+FILE_SERVING_INTERNAL_URL = f'{SUBDIR}/protected-media/'
+
+# Set to True to let Django emulate the web server for X-Accel-Redirect/X-Sendfile
+# responses (local testing of the offload backends without nginx or Apache)
+FILE_SERVING_EMULATE_OFFLOAD = False
+
+# === Chunked Uploads ===
+
+# Resumable uploads of data files from the target admin page (see chunked_upload.py):
+# size of the chunks sent by the browser, largest file size, and time after which
+# an upload not written to is removed
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_SIZE = 100 * 1024 ** 3
+UPLOAD_EXPIRY = 24 * 3600
+
+# === Instrumentation ===
+
+# Measure the SQL queries, template rendering and media storage calls of each view:
+# Server-Timing headers for staff users, totals per view at /metrics/ (Prometheus
+# text format, for staff users or with 'Authorization: Bearer <METRICS_TOKEN>').
+# Off unless DEBUG; DJANGO_INSTRUMENTATION=1 (or 0) overrides it.
+INSTRUMENTATION_ENABLED = os.environ.get('DJANGO_INSTRUMENTATION', '1' if DEBUG else '0') == '1'
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+# Largest number of SQL queries of each view (URL name). Going over budget logs a
+# warning, or raises QueryBudgetExceeded if QUERY_BUDGET_RAISE is True (set by the
+# 'benchmark' command, which fails on views over budget).
+QUERY_BUDGETS = {
+    'home': 10,
+    'home_rows': 10,
+    'info': 2,
+    'database': 2,
+    'groups': 6,
+    'observatories': 4,
+    'observatory': 6,
+    'telescopes': 4,
+    'telescope': 6,
+    'instruments': 4,
+    'researchers': 8,
+    'observing_runs': 4,
+    'observing_run': 6,
+    'observing_blocks': 5,
+    'targets': 5,
+    'cone_search': 4,
+    'download_files_view': 5,
+    'download_file_view': 5,
+}
+QUERY_BUDGET_RAISE = False
+
+# === Background Jobs ===
+
+# Folder where the input files of background jobs (e.g. CSV imports) are kept
+# until the job is done. It must not be served by the web server.
+JOBS_ROOT = os.path.join(BASE_DIR, 'jobs')
+
 # === Authentication Redirects ===
 
 LOGIN_URL = f'{SUBDIR}/admin/login/'
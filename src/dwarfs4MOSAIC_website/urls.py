@@ -14,14 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+# Standard libraries
+import re
+
 # Third-party libraries
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 #from django.contrib.auth import views as auth_views  # to change/reset password
-from django.urls import include, path
+from django.contrib.auth.decorators import login_required
+from django.urls import include, path, re_path
 from django.views.generic import RedirectView
 
+# Local application imports
+from dwarfs4MOSAIC.views import media_view
+
 urlpatterns = [
     # Admin panel
     path('admin/', admin.site.urls),
@@ -50,8 +56,13 @@ urlpatterns = [
     # path('accounts/reset/done/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
 ]
 
-# Serve media files during development
-urlpatterns += static(settings.MEDIA_URL, document_root= settings.MEDIA_ROOT)
+# Serve media files after checking permissions in Django.
+# The bytes are sent by the backend configured in FILE_SERVING_BACKEND
+# (pure Python during development, nginx/Apache offload in production).
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            login_required(media_view), name='media'),
+]
 
 # Serve static files during development
 #urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)